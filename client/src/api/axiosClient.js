@@ -12,6 +12,28 @@ export const axiosClient = axios.create({
     : 3500,
 })
 
+// Pass the same key when retrying an order, checkout, offer or message so the
+// server replays the first response instead of writing twice.
+export const idempotencyHeaders = (key) => (key ? { headers: { 'Idempotency-Key': key } } : {})
+
+// One key per user intent (e.g. "order listing 12"), kept until the server
+// answers. After a timeout or dropped connection the first attempt may still
+// have gone through, so trying again reuses its key. Any 4xx answer settles
+// the intent; 5xx answers are never stored server-side, so they keep the key too.
+const pendingIntentKeys = new Map()
+
+export async function withIntentKey(intent, send) {
+  if (!pendingIntentKeys.has(intent)) pendingIntentKeys.set(intent, crypto.randomUUID())
+  try {
+    const result = await send(pendingIntentKeys.get(intent))
+    pendingIntentKeys.delete(intent)
+    return result
+  } catch (error) {
+    if (error?.response && error.response.status < 500) pendingIntentKeys.delete(intent)
+    throw error
+  }
+}
+
 // ── Request interceptor ──────────────────────────────────────────
 axiosClient.interceptors.request.use(
   (config) => {
@@ -1,4 +1,4 @@
-import { axiosClient } from './axiosClient'
+import { axiosClient, idempotencyHeaders } from './axiosClient'
 
 function normalizeListing(item) {
   if (!item) return item
@@ -13,17 +13,23 @@ function normalizeListing(item) {
   return { ...item, quantity, status }
 }
 
+function cursorFrom(link) {
+  // `next` is a full URL; only its cursor is needed to ask for the next page.
+  return link ? new URL(link).searchParams.get('cursor') : null
+}
+
 export const listingsApi = {
   async getListings(params = {}) {
     const response = await axiosClient.get('/listings/', { params })
     const data = response?.data ?? response
     if (Array.isArray(data)) {
-      return { items: data.map(normalizeListing), total: data.length }
+      return { items: data.map(normalizeListing), total: data.length, cursor: null }
     }
     const items = (data?.items || []).map(normalizeListing)
     return {
       items,
       total: data?.total ?? items.length ?? 0,
+      cursor: cursorFrom(data?.next),
     }
   },
   async getMyListings(params = {}) {
@@ -33,6 +39,7 @@ export const listingsApi = {
     return {
       items,
       total: data?.total ?? items.length,
+      cursor: cursorFrom(data?.next),
     }
   },
   getListingById(id) {
@@ -55,6 +62,17 @@ export const listingsApi = {
   reportListing(id, payload) {
     return axiosClient.post(`/listings/${id}/report/`, payload).then((response) => response?.data ?? response)
   },
+  getListingReviews(id, params = {}) {
+    return axiosClient.get(`/listings/${id}/reviews/`, { params }).then((response) => {
+      const data = response?.data ?? response
+      return {
+        items: data?.items || [],
+        cursor: cursorFrom(data?.next),
+        rating: data?.rating ?? 0,
+        reviewCount: data?.reviewCount ?? 0,
+      }
+    })
+  },
   submitReview(id, payload) {
     const normalizedPayload = {
       ...payload,
@@ -64,11 +82,24 @@ export const listingsApi = {
 
     return axiosClient.post(`/listings/${id}/review/`, normalizedPayload).then((response) => response?.data ?? response)
   },
-  createOrder(id) {
-    return axiosClient.post(`/listings/${id}/order/`).then((response) => response?.data ?? response)
+  createOrder(id, idempotencyKey) {
+    return axiosClient.post(`/listings/${id}/order/`, null, idempotencyHeaders(idempotencyKey)).then((response) => response?.data ?? response)
+  },
+  checkout(items, idempotencyKey) {
+    return axiosClient
+      .post('/orders/checkout/', { items }, idempotencyHeaders(idempotencyKey))
+      .then((response) => response?.data ?? response)
+  },
+  reserveListing(id, quantity = 1, idempotencyKey) {
+    return axiosClient
+      .post(`/listings/${id}/reserve/`, { quantity }, idempotencyHeaders(idempotencyKey))
+      .then((response) => response?.data ?? response)
+  },
+  releaseReservation(id) {
+    return axiosClient.delete(`/listings/${id}/reserve/`).then((response) => response?.data ?? response)
   },
-  submitOffer(id, payload) {
-    return axiosClient.post(`/listings/${id}/offer/`, payload).then((response) => response?.data ?? response)
+  submitOffer(id, payload, idempotencyKey) {
+    return axiosClient.post(`/listings/${id}/offer/`, payload, idempotencyHeaders(idempotencyKey)).then((response) => response?.data ?? response)
   },
   uploadImage(file) {
     const formData = new FormData()
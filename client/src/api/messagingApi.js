@@ -1,4 +1,4 @@
-import { axiosClient } from './axiosClient'
+import { axiosClient, idempotencyHeaders } from './axiosClient'
 
 const CONVERSATIONS_STORAGE_KEY = 'campustrade-local-conversations'
 const MESSAGES_STORAGE_KEY = 'campustrade-local-messages'
@@ -32,8 +32,12 @@ export const messagingApi = {
     const response = await axiosClient.get(`/messaging/conversations/${conversationId}`)
     return response?.data ?? response
   },
-  async sendMessage(conversationId, payload) {
-    const response = await axiosClient.post(`/messaging/conversations/${conversationId}`, payload)
+  async sendMessage(conversationId, payload, idempotencyKey) {
+    const response = await axiosClient.post(
+      `/messaging/conversations/${conversationId}`,
+      payload,
+      idempotencyHeaders(idempotencyKey),
+    )
     return response?.data ?? response
   },
   async upsertConversation(payload) {
@@ -1,8 +1,11 @@
 import { axiosClient } from './axiosClient'
 
 export const notificationsApi = {
-  getNotifications() {
-    return axiosClient.get('/notifications').then((response) => response?.data ?? response)
+  getNotifications(params = {}) {
+    return axiosClient.get('/notifications', { params }).then((response) => response?.data ?? response)
+  },
+  getUnreadCount() {
+    return axiosClient.get('/notifications/unread-count').then((response) => response?.data ?? response)
   },
   markAsRead(id) {
     return axiosClient.patch(`/notifications/${id}/read`).then((response) => response?.data ?? response)
@@ -10,4 +13,45 @@ export const notificationsApi = {
   markAllRead() {
     return axiosClient.patch('/notifications/read-all').then((response) => response?.data ?? response)
   },
+  // Reads the server-sent event stream until it ends. fetch is used instead
+  // of EventSource so the JWT can travel in the Authorization header.
+  async streamNotifications({ lastEventId, signal, onNotification }) {
+    const headers = { Accept: 'text/event-stream' }
+    const token = localStorage.getItem('access_token')
+    if (token) headers.Authorization = `Bearer ${token}`
+    if (lastEventId != null) headers['Last-Event-ID'] = String(lastEventId)
+
+    const response = await fetch(`${axiosClient.defaults.baseURL}/notifications/stream`, {
+      headers,
+      signal,
+      credentials: 'include',
+    })
+    if (!response.ok || !response.body) {
+      const error = new Error(`Notification stream failed (${response.status})`)
+      error.status = response.status
+      throw error
+    }
+
+    const reader = response.body.pipeThrough(new TextDecoderStream()).getReader()
+    let buffer = ''
+    for (;;) {
+      const { value, done } = await reader.read()
+      if (done) return
+      buffer += value
+      const frames = buffer.split('\n\n')
+      buffer = frames.pop()
+      frames.forEach((frame) => {
+        const fields = {}
+        frame.split('\n').forEach((line) => {
+          if (!line || line.startsWith(':')) return
+          const separator = line.indexOf(':')
+          const name = separator === -1 ? line : line.slice(0, separator)
+          fields[name] = line.slice(separator + 1).replace(/^ /, '')
+        })
+        if (fields.event === 'notification' && fields.data) {
+          onNotification(JSON.parse(fields.data), Number(fields.id))
+        }
+      })
+    }
+  },
 }
@@ -17,8 +17,13 @@ export const profileApi = {
 
     return axiosClient.put('/me/', normalizedPayload).then((response) => response?.data ?? response)
   },
-  getTransactions() {
-    return axiosClient.get('/me/transactions/').then((response) => response?.data ?? response)
+  getTransactions(params = {}) {
+    return axiosClient.get('/me/transactions/', { params }).then((response) => {
+      const data = response?.data ?? response
+      // `next` is a full URL; only its cursor is needed to ask for the next page.
+      const cursor = data?.next ? new URL(data.next).searchParams.get('cursor') : null
+      return { items: data?.items || [], cursor }
+    })
   },
   getPublicProfile(userId) {
     return axiosClient.get(`/users/${userId}/`).then((response) => response?.data ?? response)
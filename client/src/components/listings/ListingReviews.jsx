@@ -0,0 +1,36 @@
+import { Button } from '@/components/ui/Button'
+import { Card } from '@/components/ui/Card'
+import { formatDate } from '@/utils/formatters'
+
+export function ListingReviews({ reviews, rating, reviewCount, onLoadMore }) {
+  return (
+    <Card className="mt-8 space-y-3">
+      <div className="flex flex-wrap items-baseline justify-between gap-2">
+        <h2 className="text-xl font-semibold text-slate-900">Reviews</h2>
+        <p className="text-sm text-slate-500">
+          {reviewCount > 0
+            ? `Rating ${rating} | ${reviewCount} review${reviewCount === 1 ? '' : 's'}`
+            : 'No reviews yet.'}
+        </p>
+      </div>
+      {reviews.map((review) => (
+        <article key={review.id} className="border-t border-slate-100 pt-3">
+          <div className="flex flex-wrap items-center justify-between gap-2">
+            <p className="text-sm font-semibold text-slate-800">{review.reviewer_name || 'Anonymous'}</p>
+            <p className="text-xs text-slate-500">
+              {review.rating}/5 | {formatDate(review.created_at)}
+            </p>
+          </div>
+          {review.content ? <p className="mt-1 text-sm text-slate-600">{review.content}</p> : null}
+        </article>
+      ))}
+      {onLoadMore ? (
+        <div className="flex justify-center">
+          <Button variant="secondary" size="sm" onClick={onLoadMore}>
+            Load more
+          </Button>
+        </div>
+      ) : null}
+    </Card>
+  )
+}
@@ -3,7 +3,7 @@ import { Button } from '@/components/ui/Button'
 import { Card } from '@/components/ui/Card'
 import { formatDate, formatPrice } from '@/utils/formatters'
 
-export function TransactionHistory({ items, onReview, title = 'Transaction History' }) {
+export function TransactionHistory({ items, onReview, onLoadMore, title = 'Transaction History' }) {
   return (
     <Card>
       <h3 className="mb-3 text-lg font-semibold text-slate-900">{title}</h3>
@@ -46,6 +46,13 @@ export function TransactionHistory({ items, onReview, title = 'Transaction Histo
           </tbody>
         </table>
       </div>
+      {onLoadMore ? (
+        <div className="mt-3 flex justify-center">
+          <Button variant="secondary" size="sm" onClick={onLoadMore}>
+            Load more
+          </Button>
+        </div>
+      ) : null}
     </Card>
   )
 }
@@ -1,10 +1,12 @@
 import { createContext, useContext, useEffect, useMemo, useState } from 'react'
+import { withIntentKey } from '@/api/axiosClient'
 import { listingsApi } from '@/api/listingsApi'
 import { profileApi } from '@/api/profileApi'
 import { useAuth } from '@/context/AuthContext'
 const AppContext = createContext(null)
 
 const defaultCampus = 'all'
+const LISTINGS_PAGE_SIZE = 48
 const WISHLIST_STORAGE_KEY = 'campustrade-wishlist-by-user'
 
 function readWishlistStore() {
@@ -56,6 +58,8 @@ export function AppProvider({ children }) {
   const [isTransactionsLoading, setIsTransactionsLoading] = useState(true)
   const [listingsError, setListingsError] = useState('')
   const [transactionsError, setTransactionsError] = useState('')
+  const [transactionsCursor, setTransactionsCursor] = useState(null)
+  const [listingsCursor, setListingsCursor] = useState(null)
   const [currentPage, setCurrentPage] = useState(1)
 
   useEffect(() => {
@@ -67,8 +71,10 @@ export function AppProvider({ children }) {
       setIsListingsLoading(true)
       setListingsError('')
       try {
-        const data = await listingsApi.getListings()
+        // Newest listings first; older pages load on demand.
+        const data = await listingsApi.getListings({ page_size: LISTINGS_PAGE_SIZE })
         setListings(data?.items || [])
+        setListingsCursor(data?.cursor ?? null)
       } catch {
         setListingsError('Could not load listings')
       } finally {
@@ -78,10 +84,21 @@ export function AppProvider({ children }) {
     loadListings()
   }, [])
 
+  const loadMoreListings = async () => {
+    if (!listingsCursor) return
+    const data = await listingsApi.getListings({ page_size: LISTINGS_PAGE_SIZE, cursor: listingsCursor })
+    setListings((previous) => {
+      const seen = new Set(previous.map((item) => item.id))
+      return [...previous, ...data.items.filter((item) => !seen.has(item.id))]
+    })
+    setListingsCursor(data.cursor)
+  }
+
   useEffect(() => {
     async function loadTransactions() {
       if (!currentUser?.id) {
         setTransactions([])
+        setTransactionsCursor(null)
         setTransactionsError('')
         setIsTransactionsLoading(false)
         return
@@ -90,8 +107,10 @@ export function AppProvider({ children }) {
       setIsTransactionsLoading(true)
       setTransactionsError('')
       try {
-        const data = await profileApi.getTransactions()
-        setTransactions(data?.items || [])
+        // The profile only shows purchases; older pages load on demand.
+        const data = await profileApi.getTransactions({ role: 'buyer' })
+        setTransactions(data.items)
+        setTransactionsCursor(data.cursor)
       } catch {
         setTransactionsError('Could not load orders')
       } finally {
@@ -102,6 +121,20 @@ export function AppProvider({ children }) {
     loadTransactions()
   }, [currentUser?.id])
 
+  const loadMoreTransactions = async () => {
+    if (!transactionsCursor) return
+    try {
+      const data = await profileApi.getTransactions({ role: 'buyer', cursor: transactionsCursor })
+      setTransactions((previous) => {
+        const seen = new Set(previous.map((item) => item.id))
+        return [...previous, ...data.items.filter((item) => !seen.has(item.id))]
+      })
+      setTransactionsCursor(data.cursor)
+    } catch {
+      setTransactionsError('Could not load more orders')
+    }
+  }
+
   useEffect(() => {
     if (!listings.length) return
 
@@ -254,7 +287,7 @@ export function AppProvider({ children }) {
     if (idsEqual(listing.sellerId, user.id)) return null
     if (listing.status !== 'AVAILABLE') return null
 
-    const response = await listingsApi.createOrder(listing.id)
+    const response = await withIntentKey(`order:${listing.id}`, (key) => listingsApi.createOrder(listing.id, key))
     const nextTransaction = {
       id: response?.order_id || `t-${Date.now()}`,
       listingId: listing.id,
@@ -305,6 +338,10 @@ export function AppProvider({ children }) {
       isTransactionsLoading,
       listingsError,
       transactionsError,
+      hasMoreListings: Boolean(listingsCursor),
+      loadMoreListings,
+      hasMoreTransactions: Boolean(transactionsCursor),
+      loadMoreTransactions,
       currentPage,
       setCurrentPage,
       toggleWishlist,
@@ -325,6 +362,8 @@ export function AppProvider({ children }) {
       isTransactionsLoading,
       listingsError,
       transactionsError,
+      listingsCursor,
+      transactionsCursor,
       currentPage,
       currentUser?.id,
     ],
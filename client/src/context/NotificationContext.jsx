@@ -4,11 +4,16 @@ import { useAuth } from '@/context/AuthContext'
 import { useFirebaseNotifications } from '@/hooks/useFirebaseNotifications'
 
 const NotificationContext = createContext(null)
-const NOTIFICATION_POLL_MS = 15000
+// New notifications arrive over the server-sent event stream; polling is
+// only the fallback when the API runs without the ASGI server.
+const STREAM_RETRY_MS = 3000
+const STREAM_MAX_RETRY_MS = 60000
+const FALLBACK_POLL_MS = 60000
 
 export function NotificationProvider({ children }) {
   const { user } = useAuth()
   const [notifications, setNotifications] = useState([])
+  const [unreadCount, setUnreadCount] = useState(0)
   const [toasts, setToasts] = useState([])
 
   const addToast = (payload) => {
@@ -26,43 +31,114 @@ export function NotificationProvider({ children }) {
   useEffect(() => {
     if (!user?.id) {
       setNotifications([])
+      setUnreadCount(0)
       return undefined
     }
 
     let isMounted = true
+    let fallbackIntervalId = null
+    const controller = new AbortController()
 
-    async function loadNotifications(showToastForNew = false) {
+    let newestId = null
+
+    const trackNewest = (items) => {
+      items.forEach((item) => {
+        const id = Number(item.id) || 0
+        if (newestId === null || id > newestId) newestId = id
+      })
+    }
+
+    async function loadNotifications() {
       let data
       try {
         data = await notificationsApi.getNotifications()
       } catch {
         if (isMounted) setNotifications([])
+        return false
+      }
+      if (!isMounted) return false
+
+      const items = data?.items || []
+      newestId = 0
+      trackNewest(items)
+      setNotifications(items)
+      setUnreadCount(data?.unreadCount ?? items.filter((item) => !item.isRead).length)
+      return true
+    }
+
+    // A folded notification comes back under a new id; `replaces` names the
+    // first id of its chain, so drop whichever earlier version we hold.
+    const isReplacedBy = (existing, item) =>
+      item.replaces != null && (existing.id === item.replaces || existing.replaces === item.replaces)
+
+    const receiveNotification = (item) => {
+      trackNewest([item])
+      setNotifications((previous) =>
+        previous.some((existing) => existing.id === item.id)
+          ? previous
+          : [item, ...previous.filter((existing) => !isReplacedBy(existing, item))],
+      )
+      addToast({ type: 'info', message: item.title })
+    }
+
+    // Fallback poll: only rows newer than the newest one we hold.
+    async function loadNewNotifications() {
+      let data
+      try {
+        data = await notificationsApi.getNotifications(newestId === null ? {} : { since: newestId })
+      } catch {
         return
       }
       if (!isMounted) return
+      const items = data?.items || []
+      // Oldest first, so each one lands on top in order.
+      items.slice().reverse().forEach(receiveNotification)
+      if (typeof data?.unreadCount === 'number') setUnreadCount(data.unreadCount)
+    }
 
-      const nextItems = data?.items || []
-      setNotifications((previous) => {
-        if (showToastForNew) {
-          const previousIds = new Set(previous.map((item) => item.id))
-          const newItems = nextItems.filter((item) => !previousIds.has(item.id))
-          newItems.forEach((item) => {
-            addToast({ type: 'info', message: item.title })
+    const wait = (ms) => new Promise((resolve) => setTimeout(resolve, ms))
+
+    async function streamNotifications() {
+      const loaded = await loadNotifications()
+      // Resume from the newest row we already have so nothing slips in between.
+      let lastEventId = loaded ? newestId : null
+      let retryMs = STREAM_RETRY_MS
+
+      while (isMounted) {
+        try {
+          await notificationsApi.streamNotifications({
+            lastEventId,
+            signal: controller.signal,
+            onNotification: (item, id) => {
+              lastEventId = id
+              retryMs = STREAM_RETRY_MS
+              if (!isMounted) return
+              receiveNotification(item)
+              // A fold replaces a row that was already unread.
+              if (!item.isRead && item.replaces == null) setUnreadCount((count) => count + 1)
+            },
           })
+        } catch (error) {
+          if (!isMounted || controller.signal.aborted) return
+          if (error?.status === 503 || error?.status === 404) {
+            fallbackIntervalId = setInterval(loadNewNotifications, FALLBACK_POLL_MS)
+            return
+          }
+          if (error?.status === 401) {
+            // A plain API call lets the axios interceptor refresh the token.
+            await loadNewNotifications()
+          }
+          retryMs = Math.min(retryMs * 2, STREAM_MAX_RETRY_MS)
         }
-        return nextItems
-      })
+        await wait(retryMs)
+      }
     }
 
-    loadNotifications()
-
-    const intervalId = setInterval(() => {
-      loadNotifications(true)
-    }, NOTIFICATION_POLL_MS)
+    streamNotifications()
 
     const handleVisibilityChange = () => {
-      if (document.visibilityState === 'visible') {
-        loadNotifications(true)
+      if (document.visibilityState === 'visible' && fallbackIntervalId) {
+        loadNewNotifications()
       }
     }
 
@@ -70,7 +146,8 @@ export function NotificationProvider({ children }) {
 
     return () => {
       isMounted = false
-      clearInterval(intervalId)
+      controller.abort()
+      if (fallbackIntervalId) clearInterval(fallbackIntervalId)
       document.removeEventListener('visibilitychange', handleVisibilityChange)
     }
   }, [user?.id])
@@ -84,6 +161,7 @@ export function NotificationProvider({ children }) {
       isRead: false,
     }
     setNotifications((previous) => [notification, ...previous])
+    setUnreadCount((count) => count + 1)
     addToast({ type: 'info', message: notification.title })
   }
 
@@ -95,18 +173,19 @@ export function NotificationProvider({ children }) {
 
   const markAsRead = async (id) => {
     await notificationsApi.markAsRead(id)
+    const wasUnread = notifications.some((item) => item.id === id && !item.isRead)
     setNotifications((previous) =>
       previous.map((item) => (item.id === id ? { ...item, isRead: true } : item)),
     )
+    if (wasUnread) setUnreadCount((count) => Math.max(0, count - 1))
   }
 
   const markAllRead = async () => {
-    await notificationsApi.markAllRead()
+    const data = await notificationsApi.markAllRead()
     setNotifications((previous) => previous.map((item) => ({ ...item, isRead: true })))
+    setUnreadCount(data?.unreadCount ?? 0)
   }
 
-  const unreadCount = notifications.filter((item) => !item.isRead).length
-
   const value = useMemo(
     () => ({
       notifications,
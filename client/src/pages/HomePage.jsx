@@ -6,6 +6,7 @@ import { useAuth } from '@/context/AuthContext'
 import { useNotifications } from '@/context/NotificationContext'
 import { useDebounce } from '@/hooks/useDebounce'
 import { usePagination } from '@/hooks/usePagination'
+import { Button } from '@/components/ui/Button'
 import { SearchBar } from '@/components/ui/SearchBar'
 import { Pagination } from '@/components/ui/Pagination'
 import { ErrorState } from '@/components/ui/ErrorState'
@@ -25,6 +26,8 @@ function HomePage() {
     filteredListings,
     isListingsLoading,
     listingsError,
+    hasMoreListings,
+    loadMoreListings,
     currentPage,
     setCurrentPage,
     deleteListing,
@@ -78,6 +81,14 @@ function HomePage() {
     }
   }
 
+  const handleLoadMore = async () => {
+    try {
+      await loadMoreListings()
+    } catch (error) {
+      addToast({ type: 'error', message: extractApiErrorMessage(error, 'Unable to load more listings.') })
+    }
+  }
+
   return (
     <div className="space-y-5">
       <section className="card-surface relative overflow-hidden bg-white/90 p-5 sm:p-6">
@@ -125,6 +136,13 @@ function HomePage() {
             onOrderListing={handleOrderListing}
           />
           <Pagination currentPage={safePage} totalPages={totalPages} onPageChange={setCurrentPage} />
+          {hasMoreListings && safePage === totalPages ? (
+            <div className="flex justify-center">
+              <Button variant="secondary" size="sm" onClick={handleLoadMore}>
+                Load more listings
+              </Button>
+            </div>
+          ) : null}
         </motion.section>
       </div>
     </div>
@@ -10,6 +10,7 @@ import { extractApiErrorMessage } from '@/utils/apiErrors'
 import { ErrorState } from '@/components/ui/ErrorState'
 import { Skeleton } from '@/components/ui/Skeleton'
 import { ListingDetails } from '@/components/listings/ListingDetails'
+import { ListingReviews } from '@/components/listings/ListingReviews'
 import { RelatedListings } from '@/components/listings/RelatedListings'
 import { ReportModal } from '@/components/listings/ReportModal'
 import { ReviewModal } from '@/components/listings/ReviewModal'
@@ -23,6 +24,7 @@ function ListingDetailsPage() {
 
   const [listing, setListing] = useState(null)
   const [related, setRelated] = useState([])
+  const [reviews, setReviews] = useState({ items: [], cursor: null, rating: 0, reviewCount: 0 })
   const [isLoading, setIsLoading] = useState(true)
   const [error, setError] = useState('')
 
@@ -49,6 +51,24 @@ function ListingDetailsPage() {
     loadDetails()
   }, [listingId])
 
+  const loadReviews = async (cursor) => {
+    try {
+      const page = await listingsApi.getListingReviews(listingId, cursor ? { cursor } : {})
+      setReviews((previous) => ({
+        ...page,
+        items: cursor ? [...previous.items, ...page.items] : page.items,
+      }))
+    } catch {
+      // Reviews are secondary; the listing stays usable without them.
+      if (cursor) addToast({ type: 'error', message: 'Unable to load more reviews.' })
+    }
+  }
+
+  useEffect(() => {
+    loadReviews()
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [listingId])
+
   const resolvedListing = useMemo(
     () => listings.find((item) => String(item.id) === String(listingId)) || listing,
     [listings, listingId, listing],
@@ -108,6 +128,7 @@ function ListingDetailsPage() {
     try {
       await listingsApi.submitReview(listingId, values)
       addToast({ type: 'success', message: 'Review submitted' })
+      loadReviews()
     } catch (error) {
       addToast({ type: 'error', message: extractApiErrorMessage(error, 'Unable to submit your review.') })
       throw error
@@ -215,6 +236,13 @@ function ListingDetailsPage() {
         onMessageSeller={handleMessageSeller}
       />
 
+      <ListingReviews
+        reviews={reviews.items}
+        rating={reviews.rating}
+        reviewCount={reviews.reviewCount}
+        onLoadMore={reviews.cursor ? () => loadReviews(reviews.cursor) : null}
+      />
+
       <RelatedListings
         listings={related}
         currentUser={currentUser}
@@ -1,5 +1,6 @@
 import { useEffect, useMemo, useState } from 'react'
 import { useLocation, useNavigate } from 'react-router-dom'
+import { withIntentKey } from '@/api/axiosClient'
 import { messagingApi } from '@/api/messagingApi'
 import { useAuth } from '@/context/AuthContext'
 import { useNotifications } from '@/context/NotificationContext'
@@ -90,7 +91,10 @@ function MessagingPage() {
     if (!activeConversationId) return
 
     try {
-      const response = await messagingApi.sendMessage(activeConversationId, { message })
+      // Resending the same text after a failure reuses its key, so it can't post twice.
+      const response = await withIntentKey(`message:${activeConversationId}:${message}`, (key) =>
+        messagingApi.sendMessage(activeConversationId, { message }, key),
+      )
       const sentMessage = response?.item
       if (!sentMessage) return
 
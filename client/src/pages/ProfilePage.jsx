@@ -32,6 +32,8 @@ function ProfilePage() {
     transactions,
     isTransactionsLoading,
     transactionsError,
+    hasMoreTransactions,
+    loadMoreTransactions,
     toggleWishlist,
   } = useApp()
   const { user: currentUser, setUser } = useAuth()
@@ -176,7 +178,12 @@ function ProfilePage() {
           </div>
         </Card>
 
-        <TransactionHistory title="My Orders" items={myOrders} onReview={setReviewTarget} />
+        <TransactionHistory
+          title="My Orders"
+          items={myOrders}
+          onReview={setReviewTarget}
+          onLoadMore={hasMoreTransactions ? loadMoreTransactions : null}
+        />
       </div>
 
       <Card>
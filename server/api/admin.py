@@ -1,9 +1,10 @@
 from django.contrib import admin
-from .models import Conversation, ConversationParticipant, Message, Notification, Profile, UniversityEmail
+from .models import Conversation, ConversationParticipant, Message, Notification, NotificationOutbox, Profile, UniversityEmail
 
 admin.site.register(Profile)
 admin.site.register(UniversityEmail)
 admin.site.register(Notification)
+admin.site.register(NotificationOutbox)
 admin.site.register(Conversation)
 admin.site.register(ConversationParticipant)
 admin.site.register(Message)
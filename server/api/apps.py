@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class AccountsConfig(AppConfig):
     name = 'api'
+
+    def ready(self):
+        from . import events  # noqa: F401
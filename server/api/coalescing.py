@@ -0,0 +1,156 @@
+"""
+Notification coalescing and digests, applied when the outbox delivers.
+
+* Entries with a ``group_key`` (e.g. orders on one listing) are folded: the
+  first in a ``NOTIFICATION_COALESCE_MINUTES`` window inserts a row, later
+  ones add to its ``count`` ("5 new orders on "Desk Lamp"") and take over
+  its body and timestamp. This is a single ``INSERT ... ON CONFLICT DO UPDATE``
+  against the ``notification_open_group`` unique index, so concurrent
+  workers can't lose an increment. The index only covers unread rows, so
+  once the user reads a row, the next event starts a new one.
+* Kinds listed in ``NOTIFICATION_DIGEST_KINDS`` wait in the outbox until the
+  next ``NOTIFICATION_DIGEST_MINUTES`` boundary. Each recipient then gets
+  one digest row summarising them. Digests need the drain worker running.
+* Everything else is inserted as is.
+
+Streams and ``?since=`` polls follow notification ids, so a folded row is
+then moved to a new id (deleted and re-inserted in the same transaction,
+while the upsert still holds its lock). Its ``replaces`` names the chain's
+first id so clients can swap the old entry out. Folding doesn't change
+unread counts.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from .models import Notification
+
+DIGEST_KIND = 'digest'
+
+UPSERT_COLUMNS = (
+    'recipient_id', 'title', 'body', 'is_read', 'created_at', 'kind', 'group_key', 'subject', 'window_start', 'count',
+)
+
+UPSERT_SQL = """
+    INSERT INTO {table} ({columns})
+    VALUES {rows}
+    ON CONFLICT (recipient_id, kind, group_key, window_start) WHERE NOT is_read
+    DO UPDATE SET count = {table}.count + excluded.count,
+                  body = excluded.body,
+                  created_at = excluded.created_at
+    RETURNING id, recipient_id, kind, group_key, count
+"""
+
+
+def window_start(moment, minutes):
+    size = minutes * 60
+    return datetime.fromtimestamp(int(moment.timestamp()) // size * size, tz=dt_timezone.utc)
+
+
+def digest_time(now):
+    """When a digest-kind notification enqueued at ``now`` is delivered."""
+    minutes = settings.NOTIFICATION_DIGEST_MINUTES
+    return window_start(now, minutes) + timedelta(minutes=minutes)
+
+
+def is_digested(entry):
+    return bool(settings.NOTIFICATION_DIGEST_MINUTES) and entry.kind in settings.NOTIFICATION_DIGEST_KINDS
+
+
+def summary_line(entries):
+    template = Notification.COALESCED_TITLES.get(entries[0].kind)
+    if len(entries) > 1 and template:
+        return template.format(count=len(entries), subject=entries[0].subject)
+    return entries[-1].body
+
+
+def digest_notification(recipient_id, entries):
+    groups = defaultdict(list)
+    for entry in entries:
+        groups[(entry.kind, entry.group_key or entry.pk)].append(entry)
+    return Notification(
+        recipient_id=recipient_id,
+        title=f'{len(entries)} updates since your last digest',
+        body='\n'.join(summary_line(group) for group in groups.values()),
+        kind=DIGEST_KIND,
+        count=len(entries),
+    )
+
+
+def upsert(window, groups, now):
+    """
+    Fold ``{(recipient_id, kind, group_key): entries}`` into ``window``'s
+    rows; returns ``(created notifications, folded notifications)``.
+    """
+    table = connection.ops.quote_name(Notification._meta.db_table)
+    columns = ', '.join(connection.ops.quote_name(column) for column in UPSERT_COLUMNS)
+    placeholders = '(' + ', '.join(['%s'] * len(UPSERT_COLUMNS)) + ')'
+    # Stored exactly as the ORM would, so window values compare equal to existing rows.
+    now, window = (Notification._meta.get_field(name).get_db_prep_value(value, connection) for name, value in (
+        ('created_at', now), ('window_start', window),
+    ))
+    params = []
+    for (recipient_id, kind, group_key), entries in groups.items():
+        latest = entries[-1]
+        params += [recipient_id, entries[0].title, latest.body, False, now, kind, group_key, latest.subject, window, len(entries)]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            UPSERT_SQL.format(table=table, columns=columns, rows=', '.join([placeholders] * len(groups))), params,
+        )
+        returned = cursor.fetchall()
+
+    created, folded_ids = [], []
+    for pk, recipient_id, kind, group_key, count in returned:
+        entries = groups[(recipient_id, kind, group_key)]
+        # Entries are pre-folded per group, so a row holding only our count is new.
+        if count == len(entries):
+            notification = entries[0].as_notification()
+            notification.pk, notification.count = pk, count
+            created.append(notification)
+        else:
+            folded_ids.append(pk)
+    return created, move_to_new_ids(folded_ids)
+
+
+def move_to_new_ids(ids):
+    """Re-insert folded rows under fresh ids; returns the new rows."""
+    if not ids:
+        return []
+    rows = list(Notification.objects.filter(pk__in=ids))
+    Notification.objects.filter(pk__in=ids).delete()
+    return Notification.objects.bulk_create([
+        Notification(
+            recipient_id=row.recipient_id, title=row.title, body=row.body, kind=row.kind, group_key=row.group_key,
+            subject=row.subject, window_start=row.window_start, count=row.count, replaces=row.replaces or row.pk,
+        )
+        for row in rows
+    ])
+
+
+def deliver(entries, now=None):
+    """Write outbox ``entries`` as notifications; returns ``(created, folded)`` notifications."""
+    now = now or timezone.now()
+    plain = []
+    windows = defaultdict(lambda: defaultdict(list))
+    digests = defaultdict(list)
+    for entry in entries:
+        if is_digested(entry):
+            digests[entry.recipient_id].append(entry)
+        elif entry.group_key and settings.NOTIFICATION_COALESCE_MINUTES:
+            window = window_start(entry.created_at, settings.NOTIFICATION_COALESCE_MINUTES)
+            windows[window][(entry.recipient_id, entry.kind, entry.group_key)].append(entry)
+        else:
+            plain.append(entry.as_notification())
+    plain.extend(digest_notification(recipient_id, group) for recipient_id, group in digests.items())
+
+    created = Notification.objects.bulk_create(plain)
+    folded = []
+    # Usually a single window; one statement each keeps conflict keys distinct.
+    for window, groups in windows.items():
+        upserted, folded_into = upsert(window, groups, now)
+        created += upserted
+        folded += folded_into
+    return created, folded
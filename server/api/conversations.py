@@ -0,0 +1,47 @@
+"""
+Last-message summary on ``Conversation``.
+
+The inbox shows each conversation's latest message. Rather than load every
+message to find it, the send path copies it onto the conversation with
+``record_message``, which also bumps ``updated_at`` so the inbox (ordered by
+it) puts the conversation on top. ``backfill_summaries`` fills the columns
+for conversations whose messages predate them.
+"""
+from django.db.models import F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Conversation, Message
+
+
+def record_message(message):
+    """Make ``message`` its conversation's summary, unless a newer one is already there."""
+    Conversation.objects.filter(
+        Q(last_message_at__isnull=True) | Q(last_message_at__lte=message.created_at),
+        pk=message.conversation_id,
+    ).update(
+        last_message_body=message.body,
+        last_message_at=message.created_at,
+        last_sender_id=message.sender_id,
+        updated_at=message.created_at,
+    )
+
+
+def backfill_summaries(batch_size=1000):
+    """Recompute every conversation's summary, one UPDATE per ``batch_size`` conversations; returns rows updated."""
+    latest = Message.objects.filter(conversation=OuterRef('pk')).order_by('-created_at', '-pk')
+    last_message_at = Subquery(latest.values('created_at')[:1])
+    updated = 0
+    last_id = 0
+    while True:
+        ids = list(
+            Conversation.objects.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return updated
+        updated += Conversation.objects.filter(pk__in=ids).update(
+            last_message_body=Coalesce(Subquery(latest.values('body')[:1]), Value('')),
+            last_message_at=last_message_at,
+            last_sender_id=Subquery(latest.values('sender_id')[:1]),
+            updated_at=Greatest(F('updated_at'), Coalesce(last_message_at, F('updated_at'))),
+        )
+        last_id = ids[-1]
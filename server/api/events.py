@@ -0,0 +1,217 @@
+"""
+Server-sent events for notifications: ``GET /api/notifications/stream``.
+
+The stream is an async view served by ``core/asgi.py``. An open connection
+waits on a broker subscription, so it holds no worker thread or database
+connection while idle.
+
+After a Notification commits, its recipient is announced to the broker.
+``publish_notifications`` covers bulk creates, which skip ``post_save``. The
+stream then reads that user's rows with ``id`` past the last one it sent.
+The SSE event id is the notification id, so a reconnecting client's
+``Last-Event-ID`` resumes exactly where it stopped.
+
+Every ``NOTIFICATION_STREAM_HEARTBEAT`` seconds the stream sends a comment so
+proxies don't close the idle connection. Each heartbeat also re-reads the
+table, which catches rows announced to another process's broker.
+Streams end after ``NOTIFICATION_STREAM_MAX_SECONDS``. The client then
+reconnects, which re-checks its token.
+"""
+import asyncio
+import json
+import threading
+import time
+from collections import Counter, defaultdict
+from functools import lru_cache
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.module_loading import import_string
+from rest_framework.exceptions import APIException
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from .models import Notification
+from .serializers import NotificationSerializer
+from .unread import adjust_unread
+
+BATCH_SIZE = 50
+RETRY_MS = 3000
+
+
+class Subscription:
+    def __init__(self, broker, user_id):
+        self.broker = broker
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.event = asyncio.Event()
+
+    def wake(self):
+        # Called from whichever thread committed the notification.
+        try:
+            self.loop.call_soon_threadsafe(self.event.set)
+        except RuntimeError:  # the stream's event loop has already shut down
+            pass
+
+    async def wait(self, timeout):
+        """True when woken by a publish, False after ``timeout`` seconds."""
+        try:
+            await asyncio.wait_for(self.event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self.event.clear()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class LocalBroker:
+    """
+    In-process fan-out of "user N has new notifications".
+
+    It only reaches streams served by the same process. Deployments that run
+    several ASGI processes can point ``NOTIFICATION_BROKER`` at a shared
+    implementation (e.g. Redis pub/sub) with the same three methods. Until
+    then the heartbeat re-read delivers within one heartbeat.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = defaultdict(set)
+
+    def subscribe(self, user_id):
+        subscription = Subscription(self, user_id)
+        with self.lock:
+            self.subscribers[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscribers = self.subscribers.get(subscription.user_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self.subscribers[subscription.user_id]
+
+    def publish(self, user_id):
+        with self.lock:
+            subscribers = list(self.subscribers.get(user_id, ()))
+        for subscription in subscribers:
+            subscription.wake()
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    return import_string(settings.NOTIFICATION_BROKER)()
+
+
+def publish_notifications(notifications, folded=()):
+    """
+    Once the transaction commits, bump the recipients' unread counters and
+    announce ``notifications`` to their streams. ``folded`` rows replace an
+    unread row (see ``api.coalescing``): they are announced, but the
+    counters don't move.
+    """
+    unread = Counter(notification.recipient_id for notification in notifications if not notification.is_read)
+    recipients = {notification.recipient_id for notification in [*notifications, *folded]}
+    broker = get_broker()
+
+    def publish():
+        for user_id, count in unread.items():
+            adjust_unread(user_id, count)
+        for user_id in recipients:
+            broker.publish(user_id)
+
+    transaction.on_commit(publish)
+
+
+@receiver(post_save, sender=Notification)
+def publish_created_notification(sender, instance, created, **kwargs):
+    if created:
+        publish_notifications([instance])
+
+
+def format_event(notification):
+    data = json.dumps(NotificationSerializer(notification).data, cls=DjangoJSONEncoder)
+    return f'id: {notification.id}\nevent: notification\ndata: {data}\n\n'
+
+
+@sync_to_async
+def events_after(user_id, last_id):
+    rows = list(Notification.objects.filter(recipient_id=user_id, id__gt=last_id).order_by('id')[:BATCH_SIZE])
+    return [format_event(row) for row in rows], (rows[-1].id if rows else last_id)
+
+
+@sync_to_async
+def latest_id(user_id):
+    return Notification.objects.filter(recipient_id=user_id).order_by('-id').values_list('id', flat=True).first() or 0
+
+
+@sync_to_async
+def authenticate(request):
+    try:
+        result = JWTAuthentication().authenticate(request)
+    except APIException:
+        return None
+    return result[0] if result else None
+
+
+def parse_last_event_id(request):
+    raw_value = request.headers.get('Last-Event-ID') or request.GET.get('lastEventId')
+    try:
+        return max(int(raw_value), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+async def event_stream(user_id, last_id, heartbeat, max_seconds):
+    subscription = get_broker().subscribe(user_id)
+    deadline = time.monotonic() + max_seconds
+    try:
+        yield f'retry: {RETRY_MS}\n\n'
+        while time.monotonic() < deadline:
+            # Subscribed before reading, so a row committed in between still wakes us.
+            events, last_id = await events_after(user_id, last_id)
+            if events:
+                yield ''.join(events)
+                if len(events) == BATCH_SIZE:
+                    continue
+            if not await subscription.wait(min(heartbeat, max(deadline - time.monotonic(), 0))):
+                yield ': heartbeat\n\n'
+    finally:
+        subscription.close()
+
+
+async def notification_stream(request):
+    if request.method != 'GET':
+        return JsonResponse({'detail': 'Method not allowed'}, status=405)
+    user = await authenticate(request)
+    if user is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+    if not isinstance(request, ASGIRequest):
+        # A WSGI server would buffer the endless stream instead of sending it.
+        return JsonResponse({'detail': 'Notification stream requires the ASGI server.'}, status=503)
+
+    last_id = parse_last_event_id(request)
+    if last_id is None:
+        # A fresh connection has just loaded the list; only newer rows are news.
+        last_id = await latest_id(user.id)
+    response = StreamingHttpResponse(
+        event_stream(
+            user.id,
+            last_id,
+            heartbeat=settings.NOTIFICATION_STREAM_HEARTBEAT,
+            max_seconds=settings.NOTIFICATION_STREAM_MAX_SECONDS,
+        ),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,140 @@
+"""
+Streaming admin exports for listings, orders and reports.
+
+Rows are read with ``values()`` + ``iterator(chunk_size=...)`` (a server-side
+cursor on Postgres) and written out a chunk at a time, so memory stays flat
+however many rows match.
+"""
+import csv
+from types import SimpleNamespace
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.dateparse import parse_date, parse_datetime
+
+from listings.models import Order, Report
+from listings.views import ListingFilterMixin
+
+CHUNK_SIZE = 2000
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+# Leading characters that make Excel/Sheets treat a CSV cell as a formula.
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def parse_bound(value):
+    """Accept an ISO date or datetime query value; None when blank or invalid."""
+    if not value:
+        return None
+    return parse_datetime(value) or parse_date(value)
+
+
+def filter_created(queryset, params):
+    start = parse_bound(params.get('from'))
+    end = parse_bound(params.get('to'))
+    if start: queryset = queryset.filter(created_at__gte=start)
+    if end:   queryset = queryset.filter(created_at__lte=end)
+    return queryset
+
+
+def listing_rows(request):
+    # Same filters as GET /api/listings/ for an admin, includeInactive included.
+    filters = ListingFilterMixin()
+    filters.request = request
+    return filters.get_filtered_queryset().order_by('id').values_list(
+        'id', 'title', 'description', 'price', 'category', 'campus', 'condition', 'type',
+        'status', 'quantity', 'is_active', 'seller_id', 'seller__email', 'created_at', 'updated_at',
+    )
+
+
+def order_rows(request):
+    params = request.query_params
+    queryset = Order.objects.all()
+    if params.get('buyerId'):   queryset = queryset.filter(buyer_id=params['buyerId'])
+    if params.get('sellerId'):  queryset = queryset.filter(seller_id=params['sellerId'])
+    if params.get('listingId'): queryset = queryset.filter(listing_id=params['listingId'])
+    return filter_created(queryset, params).order_by('id').values_list(
+        'id', 'listing_id', 'listing__title', 'buyer_id', 'buyer__email', 'seller_id', 'seller__email',
+        'amount', 'created_at',
+    )
+
+
+def report_rows(request):
+    params = request.query_params
+    queryset = Report.objects.all()
+    if params.get('status'): queryset = queryset.filter(status=params['status'])
+    return filter_created(queryset, params).order_by('id').values_list(
+        'id', 'listing_id', 'listing__title', 'reporter_id', 'reporter__email', 'reason', 'status', 'created_at',
+    )
+
+
+EXPORTS = {
+    'listings': SimpleNamespace(
+        rows=listing_rows,
+        columns=[
+            'id', 'title', 'description', 'price', 'category', 'campus', 'condition', 'type',
+            'status', 'quantity', 'isActive', 'sellerId', 'sellerEmail', 'createdAt', 'updatedAt',
+        ],
+    ),
+    'orders': SimpleNamespace(
+        rows=order_rows,
+        columns=[
+            'id', 'listingId', 'listingTitle', 'buyerId', 'buyerEmail', 'sellerId', 'sellerEmail',
+            'amount', 'createdAt',
+        ],
+    ),
+    'reports': SimpleNamespace(
+        rows=report_rows,
+        columns=['id', 'listingId', 'listingTitle', 'reporterId', 'reporterEmail', 'reason', 'status', 'createdAt'],
+    ),
+}
+
+
+class LineBuffer:
+    """File-like sink that hands back whatever csv.writer writes."""
+
+    def write(self, value):
+        return value
+
+
+def csv_cell(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        # Spreadsheets would evaluate user text such as titles as a formula.
+        return "'" + value
+    return value
+
+
+def encode_csv(columns, rows):
+    writer = csv.writer(LineBuffer())
+    yield writer.writerow(columns)
+    batch = []
+    for row in rows:
+        batch.append(writer.writerow([csv_cell(value) for value in row]))
+        if len(batch) >= CHUNK_SIZE:
+            yield ''.join(batch)
+            batch = []
+    if batch:
+        yield ''.join(batch)
+
+
+def encode_ndjson(columns, rows):
+    encoder = DjangoJSONEncoder()
+    batch = []
+    for row in rows:
+        batch.append(encoder.encode(dict(zip(columns, row))) + '\n')
+        if len(batch) >= CHUNK_SIZE:
+            yield ''.join(batch)
+            batch = []
+    if batch:
+        yield ''.join(batch)
+
+
+def stream_export(request, resource, fmt):
+    """Return the chunk generator for ``resource`` in ``fmt``."""
+    export = EXPORTS[resource]
+    rows = export.rows(request).iterator(chunk_size=CHUNK_SIZE)
+    encode = encode_csv if fmt == 'csv' else encode_ndjson
+    return encode(export.columns, rows)
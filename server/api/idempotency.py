@@ -0,0 +1,103 @@
+"""
+``Idempotency-Key`` support for POST endpoints that must not run twice.
+
+The key row is inserted in the same transaction as the view's writes and
+its response, so a retry can only ever see a finished request:
+
+* a retry after the first request committed hits the unique
+  ``(user, key)`` constraint and gets the stored response back;
+* a concurrent duplicate blocks on that unique index until the first
+  request finishes, then replays its response (or, if the first request
+  rolled back, runs normally) without writing anything twice.
+
+Responses with a 5xx status roll back with the key, so the client may retry.
+Stored keys are removed by ``purge_idempotency_keys`` once older than
+``IDEMPOTENCY_KEY_TTL_HOURS``.
+"""
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = IdempotencyKey._meta.get_field('key').max_length
+
+
+class ServerError(Exception):
+    """Carries a 5xx response out of the transaction so the key is rolled back."""
+
+    def __init__(self, response):
+        self.response = response
+
+
+def request_fingerprint(request):
+    payload = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(f'{request.method} {request.path}\n{payload}'.encode()).hexdigest()
+
+
+def replay(record, fingerprint):
+    if record.fingerprint != fingerprint:
+        return Response(
+            {'error': f'{HEADER} was already used for a different request.'},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    return Response(record.response, status=record.status_code, headers={'Idempotent-Replayed': 'true'})
+
+
+def idempotent(view):
+    """Decorate a view (or, via ``method_decorator``, a view method) taking ``request`` first."""
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key = request.headers.get(HEADER, '').strip()
+        if request.method != 'POST' or not key:
+            return view(request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {'error': f'{HEADER} must be at most {MAX_KEY_LENGTH} characters.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        fingerprint = request_fingerprint(request)
+        try:
+            with transaction.atomic():
+                try:
+                    with transaction.atomic():
+                        record = IdempotencyKey.objects.create(user=request.user, key=key, fingerprint=fingerprint)
+                except IntegrityError:
+                    record = None
+                if record is not None:
+                    response = view(request, *args, **kwargs)
+                    if response.status_code >= 500:
+                        raise ServerError(response)
+                    record.status_code = response.status_code
+                    record.response = response.data
+                    record.save(update_fields=['status_code', 'response'])
+                    return response
+        except ServerError as exc:
+            return exc.response
+
+        # The duplicate insert waited for the original request to commit.
+        return replay(IdempotencyKey.objects.get(user=request.user, key=key), fingerprint)
+
+    return wrapper
+
+
+def purge_expired(batch_size=5000, now=None):
+    """Delete keys older than the TTL in primary-key batches; returns rows deleted."""
+    cutoff = (now or timezone.now()) - timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+    expired = IdempotencyKey.objects.filter(created_at__lt=cutoff)
+    deleted = 0
+    while True:
+        ids = list(expired.order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += IdempotencyKey.objects.filter(pk__in=ids).delete()[0]
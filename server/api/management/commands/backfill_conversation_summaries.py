@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api.conversations import backfill_summaries
+
+
+class Command(BaseCommand):
+    help = 'Fill the last-message columns on every conversation from its messages. Safe to re-run.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Conversations updated per statement.')
+
+    def handle(self, *args, **options):
+        updated = backfill_summaries(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Updated {updated} conversations.'))
@@ -0,0 +1,80 @@
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import DurationField, ExpressionWrapper, F, Max, Value
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.models import Notification
+from api.retention import compact
+from api.unread import unread_key
+from api.views import notifications_list
+from listings.benchmarking import format_stats, time_call
+
+USERNAME = 'benchmark-notifications@campus.edu'
+
+
+class Command(BaseCommand):
+    help = (
+        'Time GET /api/notifications for one user with --size notifications, '
+        'then again after compact_notifications. Runs inside a rolled-back transaction.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=100_000)
+        parser.add_argument('--read-ratio', type=float, default=0.9, help='Share of seeded notifications already read.')
+        parser.add_argument('--days', type=int, default=90)
+        parser.add_argument('--max-per-user', type=int, default=500)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+        size = options['size']
+
+        with transaction.atomic():
+            user, _ = User.objects.get_or_create(username=USERNAME, defaults={'email': USERNAME})
+            read_every = max(round(1 / (1 - options['read_ratio'])), 1) if options['read_ratio'] < 1 else None
+            self.stdout.write(f'Seeding {size} notifications...')
+            Notification.objects.bulk_create(
+                [
+                    Notification(
+                        recipient=user, title='New order placed', body=f'Order {index} for "Desk Lamp".',
+                        is_read=read_every is None or index % read_every != 0,
+                    )
+                    for index in range(size)
+                ],
+                batch_size=5000,
+            )
+            # Spread them over a year, newest last, as a long-lived account would have them.
+            newest = Notification.objects.filter(recipient=user).aggregate(newest=Max('id'))['newest']
+            step = timedelta(days=365) / size
+            Notification.objects.filter(recipient=user).update(created_at=ExpressionWrapper(
+                Value(timezone.now()) - (newest - F('id')) * Value(step), output_field=DurationField(),
+            ))
+
+            def fetch():
+                request = factory.get('/api/notifications')
+                force_authenticate(request, user=user)
+                return notifications_list(request).render()
+
+            before = time_call(fetch, options['repeat'])
+            self.stdout.write(format_stats(f'list, {size} rows ({len(fetch().content) // 1024} KiB)', before))
+
+            started = time.perf_counter()
+            expired, over_cap = compact(retention_days=options['days'], max_per_user=options['max_per_user'])
+            elapsed = time.perf_counter() - started
+            remaining = Notification.objects.filter(recipient=user).count()
+            self.stdout.write(
+                f'compact: deleted {expired} expired + {over_cap} over cap in {elapsed * 1000:.0f} ms, {remaining} left'
+            )
+
+            after = time_call(fetch, options['repeat'])
+            self.stdout.write(format_stats(f'list, {remaining} rows ({len(fetch().content) // 1024} KiB)', after))
+            self.stdout.write(f"{'':<40} {before['median'] / after['median']:.0f}x faster (median)")
+
+            transaction.set_rollback(True)
+        cache.delete(unread_key(user.pk))
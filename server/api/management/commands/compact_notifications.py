@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.retention import DEFAULT_BATCH_SIZE, compact
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete read notifications older than NOTIFICATION_RETENTION_DAYS and '
+        'trim each user to NOTIFICATION_MAX_PER_USER, in small transactions. Run it from cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None, help='Retention for read notifications (default NOTIFICATION_RETENTION_DAYS).')
+        parser.add_argument('--max-per-user', type=int, default=None, help='Notifications kept per user (default NOTIFICATION_MAX_PER_USER).')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Rows deleted per transaction.')
+        parser.add_argument('--pause', type=float, default=0, help='Seconds to sleep between chunks.')
+        parser.add_argument('--archive', help='Append deleted rows to this file as JSON lines first.')
+
+    def handle(self, *args, **options):
+        days = settings.NOTIFICATION_RETENTION_DAYS if options['days'] is None else options['days']
+        max_per_user = settings.NOTIFICATION_MAX_PER_USER if options['max_per_user'] is None else options['max_per_user']
+        archive = open(options['archive'], 'a', encoding='utf-8') if options['archive'] else None
+        try:
+            expired, over_cap = compact(
+                retention_days=days, max_per_user=max_per_user, batch_size=options['batch_size'],
+                archive=archive, pause=options['pause'],
+            )
+        finally:
+            if archive is not None:
+                archive.close()
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {expired} read notifications older than {days} days '
+            f'and {over_cap} beyond the {max_per_user} per-user cap.'
+        ))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from api.outbox import DEFAULT_BATCH_SIZE, Drainer, backlog
+
+
+class Command(BaseCommand):
+    help = (
+        'Deliver queued notifications from the outbox. Without --loop, drain '
+        'once and exit; with --loop, keep draining every --interval seconds.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep draining until interrupted.')
+        parser.add_argument('--interval', type=float, default=None, help='Seconds between drains (default NOTIFICATION_OUTBOX_INTERVAL).')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Notifications delivered per transaction.')
+
+    def handle(self, *args, **options):
+        drainer = Drainer(interval=options['interval'], batch_size=options['batch_size'])
+
+        def report(stats):
+            if stats.delivered or stats.deferred or not options['loop']:
+                pending, oldest = backlog()
+                self.stdout.write(f'{stats} Backlog {pending}, oldest {oldest:.0f}s.')
+
+        drainer.run(iterations=None if options['loop'] else 1, on_result=report)
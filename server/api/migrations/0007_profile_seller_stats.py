@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:23
+
+from django.db import migrations, models
+from django.db.models import Avg, Count, FloatField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_seller_stats(apps, schema_editor):
+    Profile = apps.get_model('api', 'Profile')
+    Review = apps.get_model('listings', 'Review')
+    Order = apps.get_model('listings', 'Order')
+    reviews = Review.objects.filter(listing__seller=OuterRef('user_id')).order_by().values('listing__seller')
+    sales = Order.objects.filter(seller=OuterRef('user_id')).order_by().values('seller')
+    Profile.objects.update(
+        rating_avg=Coalesce(Subquery(reviews.annotate(value=Avg('rating')).values('value')), 0.0,
+                            output_field=FloatField()),
+        rating_count=Coalesce(Subquery(reviews.annotate(value=Count('id')).values('value')), 0),
+        completed_sales=Coalesce(Subquery(sales.annotate(value=Count('id')).values('value')), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_conversation_conversationparticipant_and_more'),
+        ('listings', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='completed_sales',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='rating_avg',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_seller_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_conversation_last_message'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='replaces',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
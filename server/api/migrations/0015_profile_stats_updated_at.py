@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_notification_replaces'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='stats_updated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
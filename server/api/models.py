@@ -3,6 +3,7 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from django.utils import timezone
 
 class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
@@ -11,6 +12,26 @@ class Profile(models.Model):
     campus = models.CharField(max_length=100, blank=True)
     profile_picture = models.ImageField(upload_to='profiles/', blank=True)
     contact = models.CharField(max_length=10, blank=True)
+    # Seller reputation, kept current by F() updates from Review/Order
+    # signals (listings.reputation) and rebuilt by reconcile_seller_stats.
+    rating_avg = models.FloatField(default=0.0)
+    rating_count = models.PositiveIntegerField(default=0)
+    completed_sales = models.PositiveIntegerField(default=0)
+    # Moved with the counters; listing ETags include it since payloads nest them.
+    stats_updated_at = models.DateTimeField(null=True, blank=True)
+
+    STATS_FIELDS = ('rating_avg', 'rating_count', 'completed_sales', 'stats_updated_at')
+
+    def save(self, *args, **kwargs):
+        # A full save from a stale instance (e.g. save_profile on login) must
+        # not write back counters that were bumped in the database since.
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.STATS_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
     def is_complete(self):
         return bool(self.full_name and self.profile_picture and self.contact)
 
@@ -36,12 +57,77 @@ class Notification(models.Model):
     body = models.TextField()
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Coalescing (see api.coalescing): unread notifications with the same kind
+    # and group_key in one window are folded into a single row with a count.
+    kind = models.CharField(max_length=30, blank=True)
+    group_key = models.CharField(max_length=100, blank=True)
+    subject = models.CharField(max_length=80, blank=True)
+    window_start = models.DateTimeField(null=True, blank=True)
+    count = models.PositiveIntegerField(default=1)
+    # A fold re-inserts the row under a new id so id cursors see it; this is
+    # the id of the first row in that chain, which clients drop on arrival.
+    replaces = models.BigIntegerField(null=True, blank=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Unread counts and "unread first" reads stay inside one recipient's range.
+            models.Index(fields=['recipient', 'is_read', '-created_at'], name='notification_recipient_unread'),
+            # A user's feed in display order, without sorting their whole history.
+            models.Index(fields=['recipient', '-created_at'], name='notification_recipient_recent'),
+        ]
+        constraints = [
+            # The upsert's conflict target. Rows without a window (NULL) never collide.
+            models.UniqueConstraint(
+                fields=['recipient', 'kind', 'group_key', 'window_start'],
+                condition=models.Q(is_read=False),
+                name='notification_open_group',
+            ),
+        ]
+
+    # Title of a folded row, by kind.
+    COALESCED_TITLES = {
+        'order': '{count} new orders on "{subject}"',
+    }
+
+    @property
+    def display_title(self):
+        template = self.COALESCED_TITLES.get(self.kind)
+        if self.count > 1 and template:
+            return template.format(count=self.count, subject=self.subject)
+        return self.title
+
+    def __str__(self):
+        return f"{self.recipient.email}: {self.display_title}"
+
+
+class NotificationOutbox(models.Model):
+    """A notification written with the change that caused it, awaiting delivery (see api.outbox)."""
+    recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    title = models.CharField(max_length=120)
+    body = models.TextField()
+    kind = models.CharField(max_length=30, blank=True)
+    group_key = models.CharField(max_length=100, blank=True)
+    subject = models.CharField(max_length=80, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Retry bookkeeping: a failed delivery is pushed back to available_at.
+    attempts = models.PositiveSmallIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['available_at'], name='notification_outbox_due'),
+        ]
+
+    def as_notification(self):
+        return Notification(
+            recipient_id=self.recipient_id, title=self.title, body=self.body,
+            kind=self.kind, group_key=self.group_key, subject=self.subject,
+        )
 
     def __str__(self):
-        return f"{self.recipient.email}: {self.title}"
+        return f"Pending for {self.recipient_id}: {self.title}"
 
 
 class Conversation(models.Model):
@@ -49,6 +135,10 @@ class Conversation(models.Model):
     participants = models.ManyToManyField(User, through='ConversationParticipant', related_name='conversations')
     updated_at = models.DateTimeField(auto_now=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Latest message, copied here by api.conversations so the inbox never loads message history.
+    last_message_body = models.TextField(blank=True)
+    last_message_at = models.DateTimeField(null=True, blank=True)
+    last_sender = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
 
     class Meta:
         ordering = ['-updated_at']
@@ -81,6 +171,25 @@ class Message(models.Model):
     def __str__(self):
         return f"Message {self.pk} in {self.conversation_id}"
 
+
+class IdempotencyKey(models.Model):
+    """Response stored for a client-supplied ``Idempotency-Key`` (see api.idempotency)."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='idempotency_keys')
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True)
+    response = models.JSONField(null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('user', 'key')
+        indexes = [
+            models.Index(fields=['created_at'], name='idempotency_key_created'),
+        ]
+
+    def __str__(self):
+        return f"{self.key} for {self.user_id}"
+
 # Automatically create a Profile when a User is created
 @receiver(post_save, sender=User)
 def create_profile(sender, instance, created, **kwargs):
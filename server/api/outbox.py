@@ -0,0 +1,156 @@
+"""
+Transactional outbox for notifications.
+
+Code that notifies someone as part of a larger change (an order, a future
+wishlist fan-out) calls ``enqueue``. That is one small INSERT into
+``NotificationOutbox`` inside the caller's transaction, so it commits or rolls
+back with the change, and a locked transaction doesn't wait on notification
+writes, unread counters or stream wake-ups.
+
+``drain`` moves due rows into ``Notification`` a batch per transaction: one
+``bulk_create`` (plus one upsert for rows that coalesce, see
+``api.coalescing``), one DELETE, then ``publish_notifications`` once the
+batch commits. Rows are claimed with ``SKIP LOCKED``, so several workers can
+drain side by side. It runs from the ``drain_notification_outbox`` command loop,
+and, while ``NOTIFICATION_OUTBOX_SYNC`` is on (the default, for deployments
+without that worker), right after the enqueuing transaction commits.
+
+If a batch fails, its rows are retried one by one so a bad row can't hold
+back the rest. A row that still fails is pushed back with exponential backoff.
+After ``MAX_ATTEMPTS`` it stays in the table, with its ``last_error``, for
+someone to look at.
+"""
+import logging
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from core.workers import PeriodicWorker
+
+from . import coalescing
+from .events import publish_notifications
+from .models import NotificationOutbox
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 500
+MAX_ATTEMPTS = 8
+BACKOFF_BASE_SECONDS = 5
+BACKOFF_MAX_SECONDS = 3600
+
+
+@dataclass
+class DrainStats:
+    delivered: int = 0
+    deferred: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rate(self):
+        """Notifications delivered per second."""
+        return self.delivered / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        return (
+            f'Delivered {self.delivered} notifications in {self.batches} batches, '
+            f'{self.seconds * 1000:.0f} ms ({self.rate:.0f}/s); {self.deferred} deferred.'
+        )
+
+
+def enqueue(entries):
+    """Write unsaved ``NotificationOutbox`` rows in the current transaction; returns them."""
+    now = timezone.now()
+    for entry in entries:
+        if coalescing.is_digested(entry):
+            entry.available_at = coalescing.digest_time(now)
+    created = NotificationOutbox.objects.bulk_create(entries)
+    if settings.NOTIFICATION_OUTBOX_SYNC:
+        ids = [entry.pk for entry in created]
+        transaction.on_commit(lambda: drain(ids=ids))
+    return created
+
+
+def backoff(attempts):
+    return timedelta(seconds=min(BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), BACKOFF_MAX_SECONDS))
+
+
+def deliver(entries):
+    with transaction.atomic():
+        publish_notifications(*coalescing.deliver(entries))
+
+
+def defer(entry, error, now):
+    entry.attempts += 1
+    entry.available_at = now + backoff(entry.attempts)
+    entry.last_error = str(error)
+    entry.save(update_fields=['attempts', 'available_at', 'last_error'])
+    if entry.attempts >= MAX_ATTEMPTS:
+        logger.error('Giving up on notification outbox row %s after %s attempts: %s', entry.pk, entry.attempts, error)
+
+
+def drain_batch(entries, now):
+    """Deliver locked ``entries``; returns how many were delivered."""
+    try:
+        deliver(entries)
+        delivered = entries
+    except DatabaseError:
+        delivered = []
+        for entry in entries:
+            try:
+                deliver([entry])
+            except DatabaseError as exc:
+                defer(entry, exc, now)
+            else:
+                delivered.append(entry)
+    NotificationOutbox.objects.filter(pk__in=[entry.pk for entry in delivered]).delete()
+    return len(delivered)
+
+
+def drain(batch_size=DEFAULT_BATCH_SIZE, now=None, ids=None):
+    """Deliver due outbox rows (only ``ids``, if given), a batch per transaction; returns DrainStats."""
+    now = now or timezone.now()
+    due = NotificationOutbox.objects.filter(available_at__lte=now, attempts__lt=MAX_ATTEMPTS).order_by('pk')
+    if ids is not None:
+        due = due.filter(pk__in=ids)
+    stats = DrainStats()
+    started = time.perf_counter()
+    while True:
+        with transaction.atomic():
+            entries = list(due.select_for_update(skip_locked=True)[:batch_size])
+            if entries:
+                delivered = drain_batch(entries, now)
+                stats.delivered += delivered
+                stats.deferred += len(entries) - delivered
+                stats.batches += 1
+        if len(entries) < batch_size:
+            stats.seconds = time.perf_counter() - started
+            return stats
+
+
+def backlog(now=None):
+    """``(rows waiting, seconds the oldest has waited)`` for monitoring."""
+    now = now or timezone.now()
+    pending = NotificationOutbox.objects.filter(attempts__lt=MAX_ATTEMPTS)
+    oldest = pending.aggregate(oldest=Min('created_at'))['oldest']
+    return pending.count(), (now - oldest).total_seconds() if oldest else 0.0
+
+
+class Drainer(PeriodicWorker):
+    """Runs ``drain`` every ``interval`` seconds (see ``core.workers``)."""
+    name = 'notification-outbox-drainer'
+
+    def __init__(self, interval=None, batch_size=DEFAULT_BATCH_SIZE, **kwargs):
+        super().__init__(settings.NOTIFICATION_OUTBOX_INTERVAL if interval is None else interval, **kwargs)
+        self.batch_size = batch_size
+
+    def run_once(self):
+        return drain(batch_size=self.batch_size, now=self.clock())
+
+    def count(self, stats):
+        return stats.delivered
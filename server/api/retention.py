@@ -0,0 +1,103 @@
+"""
+Notification retention, run by ``manage.py compact_notifications``.
+
+Two rules, both configurable:
+
+* read notifications older than ``NOTIFICATION_RETENTION_DAYS`` are removed;
+* each user keeps at most ``NOTIFICATION_MAX_PER_USER`` notifications, newest
+  first. Older ones go even when unread, and come off the recipient's cached
+  unread counter.
+
+A setting of 0 turns its rule off. Rows are removed in primary-key chunks of
+``batch_size``, each in its own short transaction, so a run never holds locks
+on more than one chunk and can be interrupted at any point. Pass ``archive``
+(a text file) to write each row out as a JSON line before it is deleted. A
+chunk that fails after writing is archived again on the next run.
+"""
+import json
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import Notification
+from .unread import adjust_unread
+
+DEFAULT_BATCH_SIZE = 2000
+ARCHIVE_FIELDS = ('id', 'recipient_id', 'title', 'body', 'is_read', 'created_at')
+
+
+def forget_unread(rows):
+    unread = Counter(row['recipient_id'] for row in rows if not row['is_read'])
+
+    def adjust():
+        for user_id, count in unread.items():
+            adjust_unread(user_id, -count)
+
+    transaction.on_commit(adjust)
+
+
+def delete_in_chunks(queryset, batch_size=DEFAULT_BATCH_SIZE, archive=None, pause=0):
+    """Delete every row of ``queryset``, a chunk per transaction; returns rows deleted."""
+    fields = ARCHIVE_FIELDS if archive is not None else ('id', 'recipient_id', 'is_read')
+    deleted = 0
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            # Keyset over the primary key: rows the filter skipped are never re-scanned.
+            rows = list(
+                queryset.filter(pk__gt=last_id).order_by('pk').select_for_update().values(*fields)[:batch_size]
+            )
+            if rows:
+                if archive is not None:
+                    archive.writelines(json.dumps(row, cls=DjangoJSONEncoder) + '\n' for row in rows)
+                Notification.objects.filter(pk__in=[row['id'] for row in rows]).delete()
+                forget_unread(rows)
+                last_id = rows[-1]['id']
+        deleted += len(rows)
+        if len(rows) < batch_size:
+            return deleted
+        if pause:
+            time.sleep(pause)
+
+
+def expired(retention_days, now=None):
+    cutoff = (now or timezone.now()) - timedelta(days=retention_days)
+    return Notification.objects.filter(is_read=True, created_at__lt=cutoff)
+
+
+def over_cap(user_id, max_per_user):
+    """The user's notifications older than their newest ``max_per_user``."""
+    mine = Notification.objects.filter(recipient_id=user_id)
+    boundary = list(mine.order_by('-created_at', '-id').values_list('created_at', 'id')[max_per_user - 1:max_per_user])
+    if not boundary:
+        return mine.none()
+    created_at, pk = boundary[0]
+    return mine.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+
+
+def users_over_cap(max_per_user):
+    return list(
+        Notification.objects.order_by().values('recipient_id')
+        .annotate(total=Count('id')).filter(total__gt=max_per_user)
+        .values_list('recipient_id', flat=True)
+    )
+
+
+def compact(retention_days=None, max_per_user=None, batch_size=DEFAULT_BATCH_SIZE, archive=None, pause=0, now=None):
+    """Apply both retention rules; returns ``(expired rows deleted, over-cap rows deleted)``."""
+    retention_days = settings.NOTIFICATION_RETENTION_DAYS if retention_days is None else retention_days
+    max_per_user = settings.NOTIFICATION_MAX_PER_USER if max_per_user is None else max_per_user
+    options = {'batch_size': batch_size, 'archive': archive, 'pause': pause}
+
+    removed_expired = delete_in_chunks(expired(retention_days, now), **options) if retention_days else 0
+    removed_over_cap = 0
+    if max_per_user:
+        for user_id in users_over_cap(max_per_user):
+            removed_over_cap += delete_in_chunks(over_cap(user_id, max_per_user), **options)
+    return removed_expired, removed_over_cap
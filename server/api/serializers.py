@@ -127,10 +127,11 @@ class PasswordResetConfirmSerializer(serializers.Serializer):
 class NotificationSerializer(serializers.ModelSerializer):
     createdAt = serializers.DateTimeField(source="created_at", read_only=True)
     isRead = serializers.BooleanField(source="is_read", read_only=True)
+    title = serializers.CharField(source="display_title", read_only=True)
 
     class Meta:
         model = Notification
-        fields = ["id", "title", "body", "isRead", "createdAt"]
+        fields = ["id", "title", "body", "count", "replaces", "isRead", "createdAt"]
 
 
 class ConversationSerializer(serializers.ModelSerializer):
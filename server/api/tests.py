@@ -1,13 +1,39 @@
+import asyncio
+import csv
+import io
+import json
+import random
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from unittest import mock, skipUnless
+
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from rest_framework import status
-from rest_framework.test import APITestCase
-
-from api.models import Conversation, ConversationParticipant, Message, Notification, UniversityEmail
-from listings.models import Listing
+from rest_framework.test import APIRequestFactory, APITestCase, force_authenticate
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.events import get_broker
+from api.models import (
+    Conversation, ConversationParticipant, IdempotencyKey, Message, Notification, NotificationOutbox, UniversityEmail,
+)
+from api.outbox import drain, enqueue
+from api.retention import compact
+from api.unread import unread_count
+from listings.checkout import order_notification
+from listings.models import Listing, Offer, Order, Report
+from listings.tests import create_listing
+from listings.views import CreateOrderView
 
 
 class NotificationFlowTests(APITestCase):
     def setUp(self):
+        cache.clear()
         self.seller = User.objects.create_user(
             username="seller@campus.edu",
             email="seller@campus.edu",
@@ -41,6 +67,10 @@ class NotificationFlowTests(APITestCase):
         response = self.client.post(f"/api/listings/{self.listing.id}/order/")
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(Notification.objects.exists())
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(drain().delivered, 1)
+        self.assertFalse(NotificationOutbox.objects.exists())
         notification = Notification.objects.get(recipient=self.seller)
         self.assertEqual(notification.title, "New order placed")
         self.assertIn("Buyer Student", notification.body)
@@ -68,6 +98,88 @@ class NotificationFlowTests(APITestCase):
         notification.refresh_from_db()
         self.assertTrue(notification.is_read)
 
+    def test_since_returns_only_newer_notifications(self):
+        older, newer = (
+            Notification.objects.create(recipient=self.seller, title=title, body="...") for title in ("Older", "Newer")
+        )
+        self.client.force_authenticate(user=self.seller)
+
+        response = self.client.get("/api/notifications", {"since": older.id})
+
+        self.assertEqual([item["id"] for item in response.data["items"]], [newer.id])
+        self.assertEqual(response.data["unreadCount"], 2)
+        self.assertEqual(self.client.get("/api/notifications", {"since": "x"}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(UNREAD_COUNT_CACHED=True)
+    def test_unread_counter_is_cached_and_kept_current(self):
+        first = Notification.objects.create(recipient=self.seller, title="First", body="...")
+        self.client.force_authenticate(user=self.seller)
+
+        def unread():
+            return self.client.get("/api/notifications/unread-count").data["unreadCount"]
+
+        self.assertEqual(unread(), 1)
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(unread(), 1)
+        self.assertEqual(len(context.captured_queries), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Notification.objects.create(recipient=self.seller, title="Second", body="...")
+            Notification.objects.create(recipient=self.seller, title="Third", body="...")
+        self.assertEqual(unread(), 3)
+
+        self.client.patch(f"/api/notifications/{first.id}/read")
+        self.client.patch(f"/api/notifications/{first.id}/read")
+        self.assertEqual(unread(), 2)
+
+        response = self.client.patch("/api/notifications/read-all")
+        self.assertEqual(response.data["unreadCount"], 0)
+        self.assertEqual(unread(), 0)
+
+    def test_unread_count_reads_the_table_without_a_shared_cache(self):
+        Notification.objects.create(recipient=self.seller, title="First", body="...")
+        self.client.force_authenticate(user=self.seller)
+
+        self.assertEqual(self.client.get("/api/notifications/unread-count").data["unreadCount"], 1)
+        # Another process marking it read can't reach this process's counter, so none is kept.
+        Notification.objects.update(is_read=True)
+        self.assertEqual(self.client.get("/api/notifications/unread-count").data["unreadCount"], 0)
+
+    @override_settings(NOTIFICATION_OUTBOX_SYNC=True)
+    def test_sync_outbox_delivers_after_the_order_commits(self):
+        self.client.force_authenticate(user=self.buyer)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f"/api/listings/{self.listing.id}/order/")
+
+        self.assertEqual(Notification.objects.filter(recipient=self.seller).count(), 1)
+        self.assertFalse(NotificationOutbox.objects.exists())
+        self.client.force_authenticate(user=self.seller)
+        self.assertEqual(self.client.get("/api/notifications/unread-count").data["unreadCount"], 1)
+
+    def test_drain_delivers_in_batches_and_backs_off_failures(self):
+        enqueue([NotificationOutbox(recipient=self.seller, title=f"Order {index}", body="...") for index in range(5)])
+        bulk_create = Notification.objects.bulk_create
+
+        def flaky_bulk_create(objs, *args, **kwargs):
+            if any(obj.title == "Order 3" for obj in objs):
+                raise DatabaseError("simulated failure")
+            return bulk_create(objs, *args, **kwargs)
+
+        now = timezone.now()
+        with mock.patch.object(Notification.objects, "bulk_create", side_effect=flaky_bulk_create):
+            stats = drain(batch_size=2, now=now)
+
+        self.assertEqual((stats.delivered, stats.deferred, stats.batches), (4, 1, 3))
+        self.assertEqual(Notification.objects.count(), 4)
+        failed = NotificationOutbox.objects.get()
+        self.assertEqual((failed.title, failed.attempts, failed.last_error), ("Order 3", 1, "simulated failure"))
+        self.assertGreater(failed.available_at, now)
+        self.assertEqual(drain(now=now).delivered, 0)
+
+        self.assertEqual(drain(now=failed.available_at).delivered, 1)
+        self.assertFalse(NotificationOutbox.objects.exists())
+
 
 class RegistrationFlowTests(APITestCase):
     def test_registration_works_for_university_email_without_preseeding(self):
@@ -257,3 +369,558 @@ class MessagingFlowTests(APITestCase):
             ConversationParticipant.objects.filter(conversation_id=conversation_id, user=self.seller).exists()
         )
         self.assertTrue(Conversation.objects.filter(pk=conversation_id).exists())
+
+    def start_conversation(self, participant):
+        conversation = Conversation.objects.create(listing=self.listing)
+        ConversationParticipant.objects.create(conversation=conversation, user=self.buyer)
+        ConversationParticipant.objects.create(conversation=conversation, user=participant)
+        return conversation
+
+    def send(self, conversation, message):
+        return self.client.post(f"/api/messaging/conversations/{conversation.id}", {"message": message}, format="json")
+
+    def test_sending_updates_the_conversation_summary(self):
+        conversation = self.start_conversation(self.seller)
+        created_at = Conversation.objects.get(pk=conversation.pk).updated_at
+        self.client.force_authenticate(user=self.buyer)
+
+        self.send(conversation, "First")
+        self.send(conversation, "Is it still available?")
+
+        conversation.refresh_from_db()
+        latest = Message.objects.filter(conversation=conversation).last()
+        self.assertEqual(conversation.last_message_body, "Is it still available?")
+        self.assertEqual((conversation.last_message_at, conversation.last_sender_id), (latest.created_at, self.buyer.id))
+        self.assertEqual(conversation.updated_at, latest.created_at)
+        self.assertGreater(conversation.updated_at, created_at)
+
+    def test_inbox_query_count_does_not_grow_with_history(self):
+        self.client.force_authenticate(user=self.buyer)
+        self.send(self.start_conversation(self.seller), "Hello")
+
+        def inbox_queries():
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get("/api/messaging/conversations")
+            sql = [query["sql"] for query in context.captured_queries]
+            # The inbox reads the summary columns, never the message table.
+            self.assertFalse(any('"api_message"' in statement for statement in sql))
+            return len(sql), response.data["items"]
+
+        baseline, _ = inbox_queries()
+        for index in range(5):
+            other = User.objects.create_user(username=f"other{index}@campus.edu", email=f"other{index}@campus.edu")
+            conversation = self.start_conversation(other)
+            for number in range(20):
+                self.send(conversation, f"Message {number}")
+
+        queries, items = inbox_queries()
+        self.assertEqual(queries, baseline)
+        self.assertEqual(len(items), 6)
+        self.assertEqual(items[0]["lastMessage"], "Message 19")
+
+    def test_backfill_fills_summaries_from_existing_messages(self):
+        conversation = self.start_conversation(self.seller)
+        Message.objects.create(conversation=conversation, sender=self.buyer, body="Old question")
+        reply = Message.objects.create(conversation=conversation, sender=self.seller, body="Old answer")
+        empty = self.start_conversation(User.objects.create_user(username="quiet@campus.edu", email="quiet@campus.edu"))
+
+        call_command("backfill_conversation_summaries", batch_size=1, stdout=io.StringIO())
+
+        conversation.refresh_from_db()
+        self.assertEqual(
+            (conversation.last_message_body, conversation.last_message_at, conversation.last_sender_id),
+            ("Old answer", reply.created_at, self.seller.id),
+        )
+        self.assertGreaterEqual(conversation.updated_at, reply.created_at)
+        empty.refresh_from_db()
+        self.assertEqual((empty.last_message_body, empty.last_message_at, empty.last_sender_id), ("", None, None))
+
+
+class AdminExportTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username="admin@campus.edu",
+            email="admin@campus.edu",
+            password="pass12345",
+            is_staff=True,
+        )
+        self.seller = User.objects.create_user(
+            username="seller@campus.edu",
+            email="seller@campus.edu",
+            password="pass12345",
+        )
+        self.buyer = User.objects.create_user(
+            username="buyer@campus.edu",
+            email="buyer@campus.edu",
+            password="pass12345",
+        )
+        self.lamp = create_listing(
+            self.seller, "Desk Lamp", description="Line one\nline two", price="25.00", category="Furniture",
+        )
+        self.kettle = create_listing(self.seller, "Kettle, 1.7L", category="Kitchen", is_active=False)
+        Order.objects.create(listing=self.lamp, buyer=self.buyer, seller=self.seller, amount="25.00")
+        Report.objects.create(listing=self.lamp, reporter=self.buyer, reason="Spam", status="Open")
+        Report.objects.create(listing=self.kettle, reporter=self.buyer, reason="Duplicate", status="Resolved")
+        self.client.force_authenticate(user=self.admin)
+
+    def export(self, path):
+        response = self.client.get(f"/api/admin/export/{path}")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode("utf-8")
+
+    def test_listings_csv_streams_header_and_rows(self):
+        rows = list(csv.DictReader(io.StringIO(self.export("listings.csv?includeInactive=1"))))
+
+        self.assertEqual([row["title"] for row in rows], ["Desk Lamp", "Kettle, 1.7L"])
+        self.assertEqual(rows[0]["sellerEmail"], "seller@campus.edu")
+        self.assertEqual(rows[0]["description"], "Line one\nline two")
+        self.assertEqual(rows[1]["isActive"], "False")
+
+    def test_listing_export_uses_browse_filters(self):
+        rows = list(csv.DictReader(io.StringIO(self.export("listings.csv?category=Kitchen&includeInactive=1"))))
+        active_only = list(csv.DictReader(io.StringIO(self.export("listings.csv"))))
+
+        self.assertEqual([row["id"] for row in rows], [str(self.kettle.id)])
+        self.assertEqual([row["id"] for row in active_only], [str(self.lamp.id)])
+
+    def test_csv_cells_that_look_like_formulas_are_escaped(self):
+        create_listing(self.seller, '=HYPERLINK("http://evil.example")', description="@SUM(A1)", category="Kitchen")
+        create_listing(self.seller, "+1 chair", description="-cheap", category="Kitchen")
+
+        rows = list(csv.DictReader(io.StringIO(self.export("listings.csv?category=Kitchen"))))
+        ndjson = [json.loads(line) for line in self.export("listings.ndjson?category=Kitchen").splitlines()]
+
+        self.assertEqual(
+            [(row["title"], row["description"]) for row in rows],
+            [("'=HYPERLINK(\"http://evil.example\")", "'@SUM(A1)"), ("'+1 chair", "'-cheap")],
+        )
+        self.assertEqual(ndjson[0]["title"], '=HYPERLINK("http://evil.example")')
+
+    def test_orders_and_reports_ndjson(self):
+        orders = [json.loads(line) for line in self.export("orders.ndjson").splitlines()]
+        reports = [json.loads(line) for line in self.export("reports.ndjson?status=Resolved").splitlines()]
+
+        self.assertEqual(orders[0]["listingTitle"], "Desk Lamp")
+        self.assertEqual(orders[0]["buyerEmail"], "buyer@campus.edu")
+        self.assertEqual(orders[0]["amount"], "25.00")
+        self.assertEqual([report["reason"] for report in reports], ["Duplicate"])
+
+    def test_order_export_filters_by_date_range(self):
+        self.assertEqual(self.export("orders.ndjson?to=2000-01-01"), "")
+        self.assertEqual(len(self.export("orders.ndjson?from=2000-01-01").splitlines()), 1)
+
+    def test_export_requires_admin_and_known_resource(self):
+        self.assertEqual(self.client.get("/api/admin/export/users.csv").status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get("/api/admin/export/orders.xml").status_code, status.HTTP_404_NOT_FOUND)
+
+        self.client.force_authenticate(user=self.buyer)
+        response = self.client.get("/api/admin/export/orders.csv")
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class NotificationCoalescingTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.seller = User.objects.create_user(username="popular@campus.edu", email="popular@campus.edu")
+        self.buyer = User.objects.create_user(username="fan@campus.edu", email="fan@campus.edu")
+        self.lamp, self.chair = (
+            Listing.objects.create(
+                seller=self.seller, title=title, description="...", price="25.00", category="Furniture",
+                campus="Main Campus", condition="Good", type="SECOND_HAND", quantity=20,
+            )
+            for title in ("Desk Lamp", "Chair")
+        )
+
+    def order(self, listing, times=1):
+        enqueue([order_notification(self.buyer, listing) for _ in range(times)])
+
+    def test_orders_on_one_listing_fold_into_a_counted_row(self):
+        self.order(self.lamp)
+        with self.captureOnCommitCallbacks(execute=True):
+            drain()
+        self.assertEqual(unread_count(self.seller.id), 1)
+
+        self.order(self.lamp, times=4)
+        with CaptureQueriesContext(connection) as context, self.captureOnCommitCallbacks(execute=True):
+            drain()
+
+        self.assertEqual(sum("ON CONFLICT" in query["sql"] for query in context.captured_queries), 1)
+        notification = Notification.objects.get(recipient=self.seller)
+        self.assertEqual(notification.count, 5)
+        self.client.force_authenticate(user=self.seller)
+        item = self.client.get("/api/notifications").data["items"][0]
+        self.assertEqual((item["title"], item["count"]), ('5 new orders on "Desk Lamp"', 5))
+        self.assertEqual(unread_count(self.seller.id), 1)
+
+        # A row the seller has read is left alone; the next order starts a new one.
+        self.client.patch(f"/api/notifications/{notification.id}/read")
+        self.order(self.lamp)
+        drain()
+        self.assertEqual(sorted(Notification.objects.values_list("count", flat=True)), [1, 5])
+
+    def test_a_fold_reaches_an_open_since_cursor(self):
+        self.order(self.lamp)
+        drain()
+        first = Notification.objects.get(recipient=self.seller)
+        self.client.force_authenticate(user=self.seller)
+
+        self.order(self.lamp, times=2)
+        with mock.patch.object(get_broker(), "publish") as publish, self.captureOnCommitCallbacks(execute=True):
+            drain()
+
+        publish.assert_called_once_with(self.seller.id)
+        items = self.client.get(f"/api/notifications?since={first.id}").data["items"]
+        self.assertEqual([(item["count"], item["replaces"]) for item in items], [(3, first.id)])
+        self.assertGreater(items[0]["id"], first.id)
+        self.assertFalse(Notification.objects.filter(pk=first.id).exists())
+        self.assertEqual(unread_count(self.seller.id), 1)
+
+        # Later folds keep pointing at the first id, so a client that missed one still swaps it out.
+        self.order(self.lamp)
+        drain()
+        items = self.client.get(f"/api/notifications?since={items[0]['id']}").data["items"]
+        self.assertEqual([(item["count"], item["replaces"]) for item in items], [(4, first.id)])
+
+    @override_settings(NOTIFICATION_DIGEST_KINDS=["order"], NOTIFICATION_DIGEST_MINUTES=60)
+    def test_digest_kinds_wait_for_one_summary_per_recipient(self):
+        self.order(self.lamp, times=3)
+        self.order(self.chair)
+
+        self.assertEqual(drain().delivered, 0)
+        drain(now=timezone.now() + timedelta(hours=1))
+
+        digest = Notification.objects.get(recipient=self.seller)
+        self.assertEqual((digest.kind, digest.title, digest.count), ("digest", "4 updates since your last digest", 4))
+        self.assertEqual(digest.body.splitlines()[0], '3 new orders on "Desk Lamp"')
+        self.assertIn('"Chair"', digest.body.splitlines()[1])
+
+
+class NotificationRetentionTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="keeper@campus.edu", email="keeper@campus.edu")
+        self.now = timezone.now()
+
+    def notify(self, days_ago, is_read=False, title="Ping"):
+        notification = Notification.objects.create(recipient=self.user, title=title, body="...", is_read=is_read)
+        Notification.objects.filter(pk=notification.pk).update(created_at=self.now - timedelta(days=days_ago))
+        return notification
+
+    def test_old_read_notifications_are_deleted_in_chunks(self):
+        old_read = [self.notify(100, is_read=True) for _ in range(5)]
+        old_unread = self.notify(100)
+        recent_read = self.notify(1, is_read=True)
+
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(compact(retention_days=90, max_per_user=0, batch_size=2, now=self.now), (5, 0))
+
+        self.assertEqual(sum(query["sql"].startswith("DELETE") for query in context.captured_queries), 3)
+        remaining = set(Notification.objects.values_list("id", flat=True))
+        self.assertEqual(remaining, {old_unread.id, recent_read.id})
+        self.assertFalse(remaining & {notification.id for notification in old_read})
+
+    def test_per_user_cap_keeps_the_newest_and_archives_the_rest(self):
+        for days_ago in range(5, 0, -1):
+            self.notify(days_ago, title=f"{days_ago} days ago")
+        self.assertEqual(unread_count(self.user.id), 5)
+        archive = io.StringIO()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(compact(retention_days=0, max_per_user=2, archive=archive, now=self.now), (0, 3))
+
+        titles = Notification.objects.values_list("title", flat=True)
+        self.assertEqual(list(titles), ["1 days ago", "2 days ago"])
+        archived = [json.loads(line) for line in archive.getvalue().splitlines()]
+        self.assertEqual(sorted(row["title"] for row in archived), ["3 days ago", "4 days ago", "5 days ago"])
+        self.assertEqual(unread_count(self.user.id), 2)
+
+
+class IdempotencyKeyTests(APITestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user(
+            username="seller@campus.edu",
+            email="seller@campus.edu",
+            password="pass12345",
+        )
+        self.buyer = User.objects.create_user(
+            username="buyer@campus.edu",
+            email="buyer@campus.edu",
+            password="pass12345",
+        )
+        self.listing = Listing.objects.create(
+            seller=self.seller,
+            title="Desk Lamp",
+            description="Warm light desk lamp",
+            price="25.00",
+            category="Furniture",
+            campus="Main Campus",
+            condition="Good",
+            type="SECOND_HAND",
+            quantity=3,
+        )
+        self.client.force_authenticate(user=self.buyer)
+
+    def post(self, path, key, data=None):
+        return self.client.post(path, data or {}, format="json", HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retried_order_is_replayed_without_a_second_order(self):
+        first = self.post(f"/api/listings/{self.listing.id}/order/", "order-1")
+        retry = self.post(f"/api/listings/{self.listing.id}/order/", "order-1")
+
+        self.assertEqual(retry.status_code, status.HTTP_200_OK)
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(Order.objects.count(), 1)
+        self.listing.refresh_from_db()
+        self.assertEqual(self.listing.quantity, 2)
+
+    def test_retried_checkout_is_replayed_without_new_orders(self):
+        cart = {"items": [{"listingId": self.listing.id, "quantity": 2}]}
+        first = self.post("/api/orders/checkout/", "cart-1", cart)
+        retry = self.post("/api/orders/checkout/", "cart-1", cart)
+
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_requests_without_a_key_are_not_deduplicated(self):
+        self.client.post(f"/api/listings/{self.listing.id}/order/")
+        self.client.post(f"/api/listings/{self.listing.id}/order/")
+
+        self.assertEqual(Order.objects.count(), 2)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_offers_and_messages_are_replayed(self):
+        self.post(f"/api/listings/{self.listing.id}/offer/", "offer-1", {"amount": "20.00"})
+        self.post(f"/api/listings/{self.listing.id}/offer/", "offer-1", {"amount": "20.00"})
+        conversation = self.client.post(
+            "/api/messaging/conversations", {"participantId": self.seller.id}, format="json"
+        ).data["item"]
+        path = f"/api/messaging/conversations/{conversation['id']}"
+        sent = self.post(path, "message-1", {"message": "Still available?"})
+        resent = self.post(path, "message-1", {"message": "Still available?"})
+
+        self.assertEqual(Offer.objects.count(), 1)
+        self.assertEqual(Message.objects.count(), 1)
+        self.assertEqual(resent.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(resent.data["item"]["id"], sent.data["item"]["id"])
+        self.assertEqual(ConversationParticipant.objects.get(user=self.seller).unread_count, 1)
+
+    def test_key_reused_for_a_different_request_is_rejected(self):
+        self.post(f"/api/listings/{self.listing.id}/offer/", "offer-1", {"amount": "20.00"})
+
+        response = self.post(f"/api/listings/{self.listing.id}/offer/", "offer-1", {"amount": "18.00"})
+
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Offer.objects.count(), 1)
+
+    def test_keys_are_scoped_to_the_user(self):
+        other = User.objects.create_user(username="other@campus.edu", email="other@campus.edu", password="pass12345")
+
+        self.post(f"/api/listings/{self.listing.id}/order/", "shared")
+        self.client.force_authenticate(user=other)
+        self.post(f"/api/listings/{self.listing.id}/order/", "shared")
+
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_server_errors_release_the_key(self):
+        with mock.patch("listings.views.place_order", return_value=None):
+            with self.assertRaises(TypeError):
+                self.post(f"/api/listings/{self.listing.id}/order/", "order-1")
+
+        self.assertFalse(IdempotencyKey.objects.exists())
+        self.assertEqual(self.post(f"/api/listings/{self.listing.id}/order/", "order-1").status_code, status.HTTP_200_OK)
+
+    def test_purge_removes_only_expired_keys(self):
+        self.post(f"/api/listings/{self.listing.id}/order/", "old")
+        self.post(f"/api/listings/{self.listing.id}/order/", "new")
+        IdempotencyKey.objects.filter(key="old").update(created_at=timezone.now() - timedelta(hours=25))
+
+        call_command("purge_idempotency_keys", stdout=io.StringIO())
+
+        self.assertEqual(list(IdempotencyKey.objects.values_list("key", flat=True)), ["new"])
+
+
+@skipUnless(connection.vendor == "postgresql", "concurrent duplicates need Postgres row locking")
+class IdempotencyKeyConcurrencyTests(TransactionTestCase):
+    def test_concurrent_duplicates_write_once(self):
+        seller = User.objects.create_user(username="seller@campus.edu", email="seller@campus.edu")
+        buyer = User.objects.create_user(username="buyer@campus.edu", email="buyer@campus.edu")
+        listing = Listing.objects.create(
+            seller=seller,
+            title="Desk Lamp",
+            description="Warm light desk lamp",
+            price="25.00",
+            category="Furniture",
+            campus="Main Campus",
+            condition="Good",
+            type="SECOND_HAND",
+            quantity=5,
+        )
+        factory = APIRequestFactory()
+        view = CreateOrderView.as_view()
+
+        def attempt(_):
+            try:
+                request = factory.post(f"/api/listings/{listing.id}/order/", HTTP_IDEMPOTENCY_KEY="tap-tap-tap")
+                force_authenticate(request, user=buyer)
+                return view(request, pk=listing.id).data["order_id"]
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            order_ids = set(pool.map(attempt, range(8)))
+
+        self.assertEqual(len(order_ids), 1)
+        self.assertEqual(Order.objects.count(), 1)
+        listing.refresh_from_db()
+        self.assertEqual(listing.quantity, 4)
+
+
+class TransactionHistoryTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="trader@campus.edu",
+            email="trader@campus.edu",
+            password="pass12345",
+        )
+        self.other = User.objects.create_user(
+            username="peer@campus.edu",
+            email="peer@campus.edu",
+            password="pass12345",
+        )
+        self.mine = create_listing(self.user, "Desk Lamp", quantity=100)
+        self.theirs = create_listing(self.other, "Bike Helmet", quantity=100)
+        self.client.force_authenticate(user=self.user)
+
+    def create_orders(self, sales, purchases):
+        """Create interleaved sales and purchases a day apart; returns their ids newest first."""
+        roles = [True] * sales + [False] * purchases
+        random.Random(0).shuffle(roles)
+        start = timezone.now() - timedelta(days=len(roles))
+        orders = []
+        for index, sold in enumerate(roles):
+            listing, buyer, seller = (self.mine, self.other, self.user) if sold else (self.theirs, self.user, self.other)
+            order = Order.objects.create(listing=listing, buyer=buyer, seller=seller, amount="25.00")
+            Order.objects.filter(pk=order.pk).update(created_at=start + timedelta(days=index))
+            orders.append(order.pk)
+        return orders[::-1]
+
+    def walk(self, params=None):
+        ids = []
+        response = self.client.get("/api/me/transactions/", {"page_size": 4, **(params or {})})
+        while True:
+            ids.extend(item["id"] for item in response.data["items"])
+            if not response.data["next"]:
+                return ids
+            response = self.client.get(response.data["next"])
+
+    def test_pages_merge_both_roles_newest_first(self):
+        expected = self.create_orders(sales=5, purchases=6)
+        Order.objects.create(listing=self.theirs, buyer=self.other, seller=self.other, amount="1.00")
+
+        first = self.client.get("/api/me/transactions/", {"page_size": 4})
+
+        self.assertEqual(self.walk(), expected)
+        item = first.data["items"][0]
+        self.assertEqual(set(item), {"id", "listingId", "buyerId", "sellerId", "item", "amount", "status", "date"})
+        self.assertEqual(item["item"], "Bike Helmet")
+
+    def test_role_and_date_filters(self):
+        expected = self.create_orders(sales=3, purchases=3)
+        sales = list(Order.objects.filter(seller=self.user).order_by("-created_at").values_list("id", flat=True))
+        oldest = Order.objects.get(pk=expected[-1]).created_at
+
+        self.assertEqual(self.walk({"role": "seller"}), sales)
+        self.assertEqual(self.walk({"to": oldest.isoformat()}), expected[-1:])
+        self.assertEqual(len(self.walk({"from": (oldest + timedelta(hours=1)).isoformat()})), 5)
+        self.assertEqual(self.client.get("/api/me/transactions/", {"role": "admin"}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_query_count_does_not_grow_with_history(self):
+        self.create_orders(sales=3, purchases=3)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get("/api/me/transactions/", {"page_size": 4})
+
+        self.create_orders(sales=40, purchases=40)
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get("/api/me/transactions/", {"page_size": 4})
+
+        self.assertEqual(len(response.data["items"]), 4)
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+        self.assertFalse(any(" OR " in query["sql"] for query in large.captured_queries))
+
+
+class NotificationStreamTests(APITestCase):
+    def setUp(self):
+        get_broker.cache_clear()
+        self.user = User.objects.create_user(
+            username="listener@campus.edu",
+            email="listener@campus.edu",
+            password="pass12345",
+        )
+        self.token = str(RefreshToken.for_user(self.user).access_token)
+        self.older = Notification.objects.create(recipient=self.user, title="Older", body="Seen already")
+        self.newer = Notification.objects.create(recipient=self.user, title="Newer", body="Missed while offline")
+
+    async def open_stream(self, **headers):
+        response = await self.async_client.get(
+            "/api/notifications/stream", headers={"Authorization": f"Bearer {self.token}", **headers}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await anext(stream), b"retry: 3000\n\n")
+        return stream
+
+    async def next_event(self, stream):
+        return (await asyncio.wait_for(anext(stream), timeout=2)).decode()
+
+    async def test_last_event_id_resumes_after_that_notification(self):
+        stream = await self.open_stream(**{"Last-Event-ID": str(self.older.id)})
+
+        event = await self.next_event(stream)
+
+        self.assertTrue(event.startswith(f"id: {self.newer.id}\nevent: notification\ndata: "))
+        self.assertEqual(json.loads(event.split("data: ", 1)[1])["title"], "Newer")
+        self.assertNotIn(f"id: {self.older.id}\n", event)
+
+    async def test_published_notifications_are_pushed(self):
+        stream = await self.open_stream()
+        pending = asyncio.ensure_future(self.next_event(stream))
+
+        created = await Notification.objects.acreate(recipient=self.user, title="New order placed", body="...")
+        get_broker().publish(self.user.id)
+
+        self.assertTrue((await pending).startswith(f"id: {created.id}\n"))
+
+    @override_settings(NOTIFICATION_STREAM_HEARTBEAT=0.01)
+    async def test_idle_stream_sends_heartbeats(self):
+        stream = await self.open_stream()
+
+        self.assertEqual(await self.next_event(stream), ": heartbeat\n\n")
+
+    async def test_stream_requires_a_token(self):
+        response = await self.async_client.get("/api/notifications/stream")
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_created_and_outbox_delivered_rows_are_published_on_commit(self):
+        seller = User.objects.create_user(username="vendor@campus.edu", email="vendor@campus.edu", password="pass12345")
+        listing = Listing.objects.create(
+            seller=seller, title="Desk Lamp", description="Warm light", price="25.00", category="Furniture",
+            campus="Main Campus", condition="Good", type="SECOND_HAND", quantity=2,
+        )
+        self.client.force_authenticate(user=self.user)
+
+        with mock.patch.object(get_broker(), "publish") as publish:
+            with self.captureOnCommitCallbacks() as callbacks:
+                Notification.objects.create(recipient=self.user, title="Ping", body="...")
+                self.client.post("/api/orders/checkout/", {"items": [{"listingId": listing.id}]}, format="json")
+                drain()
+            publish.assert_not_called()
+            for callback in callbacks:
+                callback()
+
+        self.assertEqual(sorted(call.args[0] for call in publish.call_args_list), sorted([self.user.id, seller.id]))
@@ -0,0 +1,48 @@
+"""
+Per-user unread notification counters, kept in the Django cache.
+
+A counter is filled from the ``(recipient, is_read, created_at)`` index the
+first time it is read. After that it moves with incr/decr as notifications
+are created and read, so ``GET /api/notifications/unread-count`` normally
+doesn't touch the database. Counters expire after ``UNREAD_COUNT_TIMEOUT``,
+which bounds any drift from a write that raced the initial fill.
+
+The counters are only right in a cache every process shares (Redis). With
+the default per-process LocMemCache, one worker's incr/decr would never
+reach the others, so ``UNREAD_COUNT_CACHED`` is off and every read counts
+from the index instead.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Notification
+
+UNREAD_COUNT_TIMEOUT = 300
+
+
+def unread_key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def count_unread(user_id):
+    return Notification.objects.filter(recipient_id=user_id, is_read=False).count()
+
+
+def unread_count(user_id):
+    if not settings.UNREAD_COUNT_CACHED:
+        return count_unread(user_id)
+    value = cache.get(unread_key(user_id))
+    if value is None:
+        value = count_unread(user_id)
+        # add(), not set(): an increment that landed meanwhile wins.
+        cache.add(unread_key(user_id), value, UNREAD_COUNT_TIMEOUT)
+    return max(value, 0)
+
+
+def adjust_unread(user_id, delta):
+    if not delta or not settings.UNREAD_COUNT_CACHED:
+        return
+    try:
+        cache.incr(unread_key(user_id), delta)
+    except ValueError:
+        pass  # not cached; the next read counts from the table
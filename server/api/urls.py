@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import events, views
 
 urlpatterns = [
     path('register/', views.register, name='register'),
@@ -9,11 +9,14 @@ urlpatterns = [
     path('messaging/conversations', views.messaging_conversations, name='messaging-conversations'),
     path('messaging/conversations/<int:conversation_id>', views.messaging_conversation_detail, name='messaging-conversation-detail'),
     path('notifications', views.notifications_list, name='notifications-list'),
+    path('notifications/stream', events.notification_stream, name='notifications-stream'),
+    path('notifications/unread-count', views.notifications_unread_count, name='notifications-unread-count'),
     path('notifications/read-all', views.notifications_mark_all_read, name='notifications-read-all'),
     path('notifications/<int:notification_id>/read', views.notification_mark_read, name='notification-read'),
     path('admin/stats/', views.admin_stats, name='admin-stats'),
     path('admin/reports/', views.admin_reports, name='admin-reports'),
     path('admin/reports/<int:report_id>/', views.admin_update_report, name='admin-report-update'),
+    path('admin/export/<str:resource>.<str:fmt>', views.admin_export, name='admin-export'),
     path('admin/users/', views.admin_users, name='admin-users'),
     path('admin/users/<int:user_id>/detail/', views.admin_user_detail, name='admin-user-detail'),
     path('admin/users/<int:user_id>/suspend/', views.admin_suspend_user, name='admin-user-suspend'),
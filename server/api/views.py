@@ -6,6 +6,7 @@ from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_str
 from django.utils import timezone
 from django.shortcuts import get_object_or_404
+from django.http import StreamingHttpResponse
 from django.db import transaction
 from django.db.models import Count, F, Prefetch, Q
 from rest_framework.response import Response
@@ -13,6 +14,10 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework import status
 
+from .conversations import record_message
+from .exports import EXPORTS, FORMATS, filter_created, stream_export
+from .idempotency import idempotent
+from .unread import adjust_unread, unread_count
 from .models import Conversation, ConversationParticipant, Message, Notification, Profile
 from .serializers import (
     ConversationSerializer,
@@ -23,7 +28,9 @@ from .serializers import (
     RegisterSerializer,
 )
 from rest_framework_simplejwt.views import TokenObtainPairView
+from listings.cache import get_cache_stats
 from listings.models import Order, Listing, Report
+from listings.pagination import TransactionCursorPagination
 from listings.serializers import OrderSerializer
 
 
@@ -40,6 +47,9 @@ def build_user_payload(user, profile):
         "campus": profile.campus,
         "contact": profile.contact,
         "avatar": avatar_url,
+        "rating": round(profile.rating_avg, 1),
+        "ratingCount": profile.rating_count,
+        "completedSales": profile.completed_sales,
     }
 
 
@@ -137,35 +147,63 @@ def profile_setup(request):
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def profile_transactions(request):
-    items = Order.objects.filter(buyer=request.user) | Order.objects.filter(seller=request.user)
-    items = items.order_by("-created_at")
-    serializer = OrderSerializer(items, many=True)
-    return Response({"items": serializer.data})
+    role = request.query_params.get("role") or None
+    if role not in (None, "buyer", "seller"):
+        return Response({"error": "role must be buyer or seller"}, status=status.HTTP_400_BAD_REQUEST)
+
+    orders = filter_created(
+        Order.objects.select_related("listing").only(
+            "id", "buyer_id", "seller_id", "amount", "created_at", "listing__id", "listing__title"
+        ),
+        request.query_params,
+    )
+    parts = [
+        orders.filter(**{role_name: request.user})
+        for role_name in ("buyer", "seller")
+        if role in (None, role_name)
+    ]
+    paginator = TransactionCursorPagination()
+    page = paginator.paginate_queryset(parts, request)
+    return paginator.get_paginated_response(OrderSerializer(page, many=True).data)
 
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def notifications_list(request):
     items = Notification.objects.filter(recipient=request.user)
+    since = request.query_params.get("since")
+    if since:
+        try:
+            items = items.filter(id__gt=int(since))
+        except ValueError:
+            return Response({"error": "since must be a notification id"}, status=status.HTTP_400_BAD_REQUEST)
     serializer = NotificationSerializer(items, many=True)
-    return Response({"items": serializer.data})
+    return Response({"items": serializer.data, "unreadCount": unread_count(request.user.id)})
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def notifications_unread_count(request):
+    return Response({"unreadCount": unread_count(request.user.id)})
 
 
 @api_view(["PATCH"])
 @permission_classes([IsAuthenticated])
 def notification_mark_read(request, notification_id):
     notification = get_object_or_404(Notification, pk=notification_id, recipient=request.user)
-    if not notification.is_read:
-        notification.is_read = True
-        notification.save(update_fields=["is_read"])
-    return Response({"success": True, "id": notification.id, "isRead": notification.is_read})
+    # Conditional so two concurrent clicks only decrement the counter once.
+    if Notification.objects.filter(pk=notification.pk, is_read=False).update(is_read=True):
+        adjust_unread(request.user.id, -1)
+    return Response({"success": True, "id": notification.id, "isRead": True})
 
 
 @api_view(["PATCH"])
 @permission_classes([IsAuthenticated])
 def notifications_mark_all_read(request):
-    Notification.objects.filter(recipient=request.user, is_read=False).update(is_read=True)
-    return Response({"success": True})
+    updated = Notification.objects.filter(recipient=request.user, is_read=False).update(is_read=True)
+    # Subtract rather than zero: rows created after the UPDATE must still count.
+    adjust_unread(request.user.id, -updated)
+    return Response({"success": True, "unreadCount": unread_count(request.user.id)})
 
 
 def build_conversation_payload(conversation, current_user):
@@ -177,7 +215,6 @@ def build_conversation_payload(conversation, current_user):
         (link for link in conversation.participant_links.all() if link.user_id == current_user.id),
         None,
     )
-    last_message = conversation.messages.last()
     payload = ConversationSerializer(conversation).data
     payload.update(
         {
@@ -189,7 +226,7 @@ def build_conversation_payload(conversation, current_user):
                 else current_user.profile.full_name or current_user.email
             ),
             "unread": current_link.unread_count if current_link else 0,
-            "lastMessage": last_message.body if last_message else "",
+            "lastMessage": conversation.last_message_body,
         }
     )
     return payload
@@ -206,7 +243,6 @@ def messaging_conversations(request):
                     "participant_links",
                     queryset=ConversationParticipant.objects.select_related("user__profile"),
                 ),
-                "messages",
             )
             .distinct()
         )
@@ -238,7 +274,6 @@ def messaging_conversations(request):
                 "participant_links",
                 queryset=ConversationParticipant.objects.select_related("user__profile"),
             ),
-            "messages",
         )
         .first()
     )
@@ -255,7 +290,6 @@ def messaging_conversations(request):
                     "participant_links",
                     queryset=ConversationParticipant.objects.select_related("user__profile"),
                 ),
-                "messages",
             )
             .get()
         )
@@ -265,18 +299,9 @@ def messaging_conversations(request):
 
 @api_view(["GET", "POST", "DELETE"])
 @permission_classes([IsAuthenticated])
+@idempotent
 def messaging_conversation_detail(request, conversation_id):
-    conversation = get_object_or_404(
-        Conversation.objects.prefetch_related(
-            Prefetch(
-                "participant_links",
-                queryset=ConversationParticipant.objects.select_related("user__profile"),
-            ),
-            "messages__sender",
-        ),
-        pk=conversation_id,
-        participants=request.user,
-    )
+    conversation = get_object_or_404(Conversation, pk=conversation_id, participants=request.user)
 
     if request.method == "GET":
         ConversationParticipant.objects.filter(conversation=conversation, user=request.user).update(unread_count=0)
@@ -301,6 +326,7 @@ def messaging_conversation_detail(request, conversation_id):
 
     with transaction.atomic():
         message = Message.objects.create(conversation=conversation, sender=request.user, body=body)
+        record_message(message)
         ConversationParticipant.objects.filter(conversation=conversation).exclude(user=request.user).update(
             unread_count=F("unread_count") + 1
         )
@@ -332,6 +358,7 @@ def admin_stats(request):
         "totalInventoryUnits": sum(Listing.objects.filter(is_active=True).values_list('quantity', flat=True)),
         "soldOutListings": Listing.objects.filter(is_active=True, quantity=0).count(),
         "lowStockListings": Listing.objects.filter(is_active=True, quantity__gt=0, quantity__lte=3).count(),
+        "listingCache": get_cache_stats(),
     })
 
 
@@ -439,6 +466,22 @@ def admin_delete_user(request, user_id):
     user.delete()
     return Response({"success": True})
 
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def admin_export(request, resource, fmt):
+    if not ensure_admin(request.user):
+        return Response({"detail": "Admin access required"}, status=status.HTTP_403_FORBIDDEN)
+    if resource not in EXPORTS or fmt not in FORMATS:
+        return Response(
+            {"error": f"Export one of {sorted(EXPORTS)} as one of {sorted(FORMATS)}."},
+            status=status.HTTP_404_NOT_FOUND,
+        )
+
+    response = StreamingHttpResponse(stream_export(request, resource, fmt), content_type=FORMATS[fmt])
+    filename = f"{resource}-{timezone.now():%Y%m%d-%H%M%S}.{fmt}"
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
 # --- EMAIL VERIFY ---
 @api_view(["GET"])
 @permission_classes([AllowAny])
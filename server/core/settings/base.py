@@ -3,6 +3,7 @@ from datetime import timedelta
 from importlib.util import find_spec
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 
@@ -47,6 +48,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "corsheaders",
     "api",
@@ -122,6 +124,60 @@ if WHITENOISE_INSTALLED:
         },
     }
 
+REDIS_URL = os.getenv("REDIS_URL", "")
+if REDIS_URL:
+    if find_spec("redis") is None:
+        raise ImproperlyConfigured("REDIS_URL is set but the redis package is not installed (pip install redis).")
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "campustrade",
+        }
+    }
+
+# Unread-notification counters (api.unread) need a cache shared by every process;
+# on the per-process LocMemCache they are counted from the index on each read instead.
+UNREAD_COUNT_CACHED = env_bool("UNREAD_COUNT_CACHED", "LocMemCache" not in CACHES["default"]["BACKEND"])
+
+LISTING_CACHE_TIMEOUT = int(os.getenv("LISTING_CACHE_TIMEOUT", "60"))
+# Seconds before the in-process title suggestion index (listings.suggestions, used
+# without pg_trgm) reloads, so listings written by other processes show up.
+LISTING_SUGGEST_INDEX_MAX_AGE = float(os.getenv("LISTING_SUGGEST_INDEX_MAX_AGE", "300"))
+# "conditional" (guarded UPDATE ... RETURNING) or "locking" (SELECT ... FOR UPDATE).
+LISTING_ORDER_STRATEGY = os.getenv("LISTING_ORDER_STRATEGY", "conditional")
+# How long a stored Idempotency-Key response is kept before purge_idempotency_keys removes it.
+IDEMPOTENCY_KEY_TTL_HOURS = int(os.getenv("IDEMPOTENCY_KEY_TTL_HOURS", "24"))
+# Reservation holds: lifetime, sweep period (seconds), and whether web
+# processes run the sweeper themselves instead of `manage.py sweep_reservations --loop`.
+RESERVATION_HOLD_MINUTES = int(os.getenv("RESERVATION_HOLD_MINUTES", "15"))
+RESERVATION_SWEEP_INTERVAL = float(os.getenv("RESERVATION_SWEEP_INTERVAL", "30"))
+RESERVATION_SWEEPER_IN_PROCESS = env_bool("RESERVATION_SWEEPER_IN_PROCESS", False)
+# Notification SSE stream (api.events); served by core.asgi.
+NOTIFICATION_BROKER = os.getenv("NOTIFICATION_BROKER", "api.events.LocalBroker")
+NOTIFICATION_STREAM_HEARTBEAT = float(os.getenv("NOTIFICATION_STREAM_HEARTBEAT", "15"))
+NOTIFICATION_STREAM_MAX_SECONDS = float(os.getenv("NOTIFICATION_STREAM_MAX_SECONDS", "300"))
+# Notification outbox (api.outbox): drained after each commit while NOTIFICATION_OUTBOX_SYNC
+# is on, so nothing is stranded when no worker runs. Deployments running
+# `manage.py drain_notification_outbox --loop` (every NOTIFICATION_OUTBOX_INTERVAL seconds) turn it off.
+NOTIFICATION_OUTBOX_INTERVAL = float(os.getenv("NOTIFICATION_OUTBOX_INTERVAL", "1"))
+NOTIFICATION_OUTBOX_SYNC = env_bool("NOTIFICATION_OUTBOX_SYNC", True)
+# Notification retention (api.retention, `manage.py compact_notifications`); 0 disables a rule.
+NOTIFICATION_RETENTION_DAYS = int(os.getenv("NOTIFICATION_RETENTION_DAYS", "90"))
+NOTIFICATION_MAX_PER_USER = int(os.getenv("NOTIFICATION_MAX_PER_USER", "500"))
+# Coalescing and digests (api.coalescing): unread notifications about the same subject within
+# NOTIFICATION_COALESCE_MINUTES fold into one row; NOTIFICATION_DIGEST_KINDS (e.g. "order")
+# are held for a per-recipient digest every NOTIFICATION_DIGEST_MINUTES. 0 disables either.
+NOTIFICATION_COALESCE_MINUTES = int(os.getenv("NOTIFICATION_COALESCE_MINUTES", "60"))
+NOTIFICATION_DIGEST_MINUTES = int(os.getenv("NOTIFICATION_DIGEST_MINUTES", "60"))
+NOTIFICATION_DIGEST_KINDS = env_list("NOTIFICATION_DIGEST_KINDS", "")
+
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
@@ -140,6 +196,8 @@ CORS_ALLOW_HEADERS = [
     "x-csrftoken",
     "x-requested-with",
     "x-campus",
+    "idempotency-key",
+    "last-event-id",
 ]
 
 SIMPLE_JWT = {
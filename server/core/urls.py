@@ -3,6 +3,7 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from api.views import EmailTokenObtainPairView
+from listings.views import CheckoutView
 from rest_framework_simplejwt.views import (
     TokenRefreshView,
     TokenVerifyView,
@@ -19,6 +20,7 @@ urlpatterns = [
     # ── Apps ─────────────────────────────────────────────────────
     path('api/',              include('api.urls')),
     path('api/listings/',     include('listings.urls')),  # ← prefix set here
+    path('api/orders/checkout/', CheckoutView.as_view(),  name='order-checkout'),
 ]
 
 # Serve media files in development only
@@ -0,0 +1,63 @@
+"""
+Loop shared by the long-running worker commands: ``drain_notification_outbox``,
+``sweep_reservations`` and ``build_related_listings`` with ``--loop``. See the
+README's "Background workers" section for how to run them in production.
+"""
+import logging
+import threading
+
+from django.db import DatabaseError, close_old_connections, connection
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicWorker:
+    """
+    Calls ``run_once()`` every ``interval`` seconds until ``stop()`` is called.
+
+    Subclasses implement ``run_once``; ``count`` turns its result into the
+    number ``run`` adds up (rows released, notifications delivered...).
+    """
+    name = 'worker'
+
+    def __init__(self, interval, clock=timezone.now, sleep=None):
+        self.interval = interval
+        self.clock = clock
+        self.stopped = threading.Event()
+        self.sleep = sleep or self.stopped.wait
+
+    def run_once(self):
+        raise NotImplementedError
+
+    def count(self, result):
+        return result
+
+    def run(self, iterations=None, on_result=None):
+        """Work until stopped (or ``iterations`` times); returns the total ``count``."""
+        total = 0
+        done = 0
+        while not self.stopped.is_set() and (iterations is None or done < iterations):
+            if not connection.in_atomic_block:
+                # Long-lived loop: drop broken connections and honour CONN_MAX_AGE.
+                close_old_connections()
+            try:
+                result = self.run_once()
+            except DatabaseError:
+                logger.exception('%s failed; retrying in %ss', self.name, self.interval)
+            else:
+                total += self.count(result)
+                if on_result is not None:
+                    on_result(result)
+            done += 1
+            if iterations is None or done < iterations:
+                self.sleep(self.interval)
+        return total
+
+    def start(self):
+        thread = threading.Thread(target=self.run, name=self.name, daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        self.stopped.set()
@@ -14,3 +14,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_wsgi_application()
+
+from listings.reservations import start_in_process_sweeper  # noqa: E402  (needs apps loaded)
+
+start_in_process_sweeper()
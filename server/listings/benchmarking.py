@@ -0,0 +1,84 @@
+"""Helpers shared by the listing benchmark management commands."""
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+
+from .models import Listing
+
+CAMPUSES = ['Main Campus', 'North Campus', 'City Campus', 'Medical Campus']
+CATEGORIES = ['Books', 'Electronics', 'Furniture', 'Clothing', 'Sports', 'Kitchen']
+CONDITIONS = ['New', 'Like New', 'Good', 'Fair']
+TYPES = ['NEW', 'SECOND_HAND']
+WORDS = [
+    'calculus', 'textbook', 'laptop', 'charger', 'desk', 'lamp', 'chair', 'monitor',
+    'hoodie', 'jacket', 'bicycle', 'helmet', 'kettle', 'blender', 'physics', 'chemistry',
+    'notes', 'headphones', 'keyboard', 'mouse', 'backpack', 'router', 'tablet', 'camera',
+]
+
+
+def get_benchmark_seller():
+    seller, _ = User.objects.get_or_create(
+        username='benchmark-seller@campus.edu',
+        defaults={'email': 'benchmark-seller@campus.edu'},
+    )
+    return seller
+
+
+def build_listing(seller, rng):
+    title_words = rng.sample(WORDS, 3)
+    return Listing(
+        seller=seller,
+        title=' '.join(title_words).title(),
+        description=' '.join(rng.choices(WORDS, k=24)),
+        price=Decimal(rng.randint(100, 50000)) / 100,
+        category=rng.choice(CATEGORIES),
+        campus=rng.choice(CAMPUSES),
+        condition=rng.choice(CONDITIONS),
+        type=rng.choice(TYPES),
+        is_active=rng.random() > 0.1,
+        quantity=rng.randint(0, 5),
+        image_urls=[f'https://i.ibb.co/{rng.getrandbits(32):08x}/listing.jpg' for _ in range(rng.randint(1, 4))],
+    )
+
+
+def seed_listings(count, seller=None, batch_size=5000, seed=42, stdout=None):
+    """Bulk insert ``count`` synthetic listings; returns the seller used."""
+    seller = seller or get_benchmark_seller()
+    rng = random.Random(seed)
+    created = 0
+    while created < count:
+        size = min(batch_size, count - created)
+        Listing.objects.bulk_create(
+            [build_listing(seller, rng) for _ in range(size)],
+            batch_size=batch_size,
+        )
+        created += size
+        if stdout is not None and created % (batch_size * 20) == 0:
+            stdout.write(f'  seeded {created}/{count} listings')
+    return seller
+
+
+def time_call(func, repeat=20):
+    """Run ``func`` ``repeat`` times and return latency stats in milliseconds."""
+    func()  # warm caches and the plan cache before measuring
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        'median': statistics.median(samples),
+        'p95': samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        'max': samples[-1],
+    }
+
+
+def format_stats(label, stats):
+    return (
+        f"{label:<40} median {stats['median']:8.2f} ms"
+        f"   p95 {stats['p95']:8.2f} ms   max {stats['max']:8.2f} ms"
+    )
@@ -0,0 +1,118 @@
+import hashlib
+import time
+from urllib.parse import quote, urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+ALL_CAMPUSES = '*'
+STATS_KEYS = {
+    'hits': 'listings:browse:hits',
+    'misses': 'listings:browse:misses',
+}
+
+
+def get_timeout():
+    return getattr(settings, 'LISTING_CACHE_TIMEOUT', 60)
+
+
+def campus_token(campus):
+    # Quoted so campus names with spaces stay valid memcached/Redis keys.
+    return quote(campus or ALL_CAMPUSES, safe=ALL_CAMPUSES)
+
+
+def generation_key(campus):
+    return f'listings:gen:{campus_token(campus)}'
+
+
+def get_generation(campus):
+    key = generation_key(campus)
+    value = cache.get(key)
+    if value is None:
+        # Seed from the clock so an evicted counter never resumes at a value
+        # that older entries were cached under.
+        cache.add(key, time.time_ns(), timeout=None)
+        value = cache.get(key)
+    return value
+
+
+def bump_generation(campus):
+    key = generation_key(campus)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+def invalidate_campuses(*campuses):
+    """
+    Retire cached browse pages for ``campuses`` and the all-campus view.
+
+    Bumps now, so later reads in this transaction miss, and again after
+    commit, so a concurrent reader can't cache pre-commit rows under the
+    new generation.
+    """
+    keys = {ALL_CAMPUSES, *(campus for campus in campuses if campus)}
+
+    def bump():
+        for campus in keys:
+            bump_generation(campus)
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def is_cacheable(request):
+    # Authenticated payloads carry per-user state such as isWishlisted.
+    return request.method == 'GET' and not request.user.is_authenticated
+
+
+def browse_cache_key(request, namespace='browse'):
+    campus = request.headers.get('X-Campus') or ''
+    params = sorted(
+        (key, value)
+        for key, values in request.query_params.lists()
+        for value in values
+        if value != ''
+    )
+    # Bodies carry absolute URLs (images, pagination links), so the origin
+    # they were built for is part of the key.
+    origin = f'{request.scheme}://{request.get_host()}'
+    digest = hashlib.sha256(f'{origin}?{urlencode(params)}'.encode('utf-8')).hexdigest()
+    return f'listings:{namespace}:{campus_token(campus)}:{get_generation(campus)}:{digest}'
+
+
+def record(outcome):
+    key = STATS_KEYS[outcome]
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+
+def get_cached_response_data(key):
+    """Return the page cached under ``key``, or None on a miss."""
+    data = cache.get(key)
+    record('misses' if data is None else 'hits')
+    return data
+
+
+def store_response_data(key, data):
+    cache.set(key, data, timeout=get_timeout())
+
+
+def get_or_compute(request, namespace, compute):
+    """Cache ``compute()`` under the same campus generations as browse pages."""
+    key = browse_cache_key(request, namespace=namespace)
+    data = cache.get(key)
+    if data is None:
+        data = compute()
+        cache.set(key, data, timeout=get_timeout())
+    return data
+
+
+def get_cache_stats():
+    values = cache.get_many(STATS_KEYS.values())
+    return {name: values.get(key, 0) for name, key in STATS_KEYS.items()}
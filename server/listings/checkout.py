@@ -0,0 +1,316 @@
+"""
+Order placement for ``POST /api/listings/<id>/order/`` (one unit) and
+``POST /api/orders/checkout/`` (a cart).
+
+Single orders have two stock paths, chosen by ``LISTING_ORDER_STRATEGY``:
+
+* ``locking`` reads the listing ``FOR UPDATE``, checks it in Python, then
+  writes, so every buyer of a hot listing queues behind that row lock.
+* ``conditional`` (default) decrements with one guarded
+  ``UPDATE ... WHERE quantity > 0 AND status = 'AVAILABLE' RETURNING``. The
+  database checks stock and writes in one step, so no lock is held while
+  Python runs; the row lock lasts only from that UPDATE to commit.
+  ``benchmark_order_contention`` compares the two.
+
+A buyer holding a reservation (see ``reservations``) orders out of that
+hold instead of the listing's remaining stock.
+
+A cart runs in one transaction. Its listings are locked with
+``select_for_update`` in primary-key order, so two carts that share listings
+always take their locks in the same order and can't deadlock. Each line
+succeeds or fails on its own. Stock changes, used-up holds, orders and
+seller notifications are then written with one bulk statement each.
+
+Seller notifications go to the outbox (``api.outbox``) in the order's
+transaction and are delivered after it commits.
+"""
+from collections import Counter
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, F, Value, When
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+
+from api.models import NotificationOutbox
+from api.outbox import enqueue
+
+from .models import Listing, Order, Reservation
+from .signals import orders_bulk_created
+
+MAX_CART_LINES = 50
+
+
+class CartError(ValueError):
+    pass
+
+
+class OrderError(ValueError):
+    pass
+
+
+def order_notification(buyer, listing, quantity=1):
+    buyer_name = buyer.profile.full_name or buyer.email
+    units = f'{quantity} units of ' if quantity > 1 else ''
+    return NotificationOutbox(
+        recipient_id=listing.seller_id,
+        title='New order placed',
+        body=f'{buyer_name} placed an order for {units}"{listing.title}".',
+        kind='order',
+        group_key=f'listing:{listing.pk}',
+        subject=listing.title[:NotificationOutbox._meta.get_field('subject').max_length],
+    )
+
+
+def order_error(listing, buyer):
+    """Why ``buyer`` can't order a unit of ``listing``, or None if they can."""
+    if listing.seller_id == buyer.id:
+        return 'You cannot place an order on your own listing.'
+    if listing.status != 'AVAILABLE':
+        return 'This listing is not available for ordering.'
+    if listing.quantity <= 0:
+        return 'This item is out of stock.'
+    return None
+
+
+def mark_sold_out(listing_id):
+    Listing.objects.filter(pk=listing_id, status='AVAILABLE', quantity__lte=0).update(
+        status='SOLD', updated_at=timezone.now(),
+    )
+
+
+def place_order_locking(buyer, listing_id):
+    """Order one unit under a row lock; returns ``(order, listing)``."""
+    with transaction.atomic():
+        listing = get_object_or_404(Listing.objects.select_for_update(), pk=listing_id, is_active=True)
+        error = order_error(listing, buyer)
+        if error is None:
+            order = Order.objects.create(
+                listing=listing,
+                buyer=buyer,
+                seller=listing.seller,
+                amount=listing.price,
+            )
+            listing.quantity = max(0, listing.quantity - 1)
+            listing.status = 'SOLD' if listing.quantity == 0 else 'AVAILABLE'
+            listing.save(update_fields=['quantity', 'status', 'updated_at'])
+            enqueue([order_notification(buyer, listing)])
+            return order, listing
+        mark_sold_out(listing_id)
+    raise OrderError(error)
+
+
+DECREMENT_SQL = """
+    UPDATE {table}
+       SET quantity = quantity - 1,
+           status = CASE WHEN quantity = 1 THEN 'SOLD' ELSE status END,
+           updated_at = %s
+     WHERE id = %s AND is_active = %s AND status = 'AVAILABLE' AND quantity > 0 AND seller_id <> %s
+ RETURNING seller_id, title, campus, price, quantity, status
+"""
+
+
+def place_order_conditional(buyer, listing_id):
+    """Order one unit with a guarded decrement; returns ``(order, listing)``."""
+    now = timezone.now()
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(DECREMENT_SQL.format(table=Listing._meta.db_table), [now, listing_id, True, buyer.id])
+            row = cursor.fetchone()
+        if row is not None:
+            seller_id, title, campus, price, quantity, status = row
+            places = Listing._meta.get_field('price').decimal_places
+            listing = Listing(
+                pk=listing_id, seller_id=seller_id, title=title, campus=campus,
+                price=Decimal(str(price)).quantize(Decimal(1).scaleb(-places)),
+                quantity=quantity, status=status, updated_at=now,
+            )
+            listing._state.adding = False
+            order = Order.objects.create(listing=listing, buyer=buyer, seller_id=seller_id, amount=listing.price)
+            enqueue([order_notification(buyer, listing)])
+            return order, listing
+
+    # Nothing matched: work out why, with the same answers as the locking path.
+    listing = get_object_or_404(Listing, pk=listing_id, is_active=True)
+    mark_sold_out(listing_id)
+    raise OrderError(order_error(listing, buyer) or 'This item is out of stock.')
+
+
+def place_held_order(buyer, listing_id, now=None):
+    """Order one unit out of ``buyer``'s own live hold; None when they have none."""
+    now = now or timezone.now()
+    live = Reservation.objects.filter(listing_id=listing_id, buyer=buyer, status='HELD', expires_at__gt=now)
+    hold_id = live.filter(listing__is_active=True).order_by('expires_at').values_list('pk', flat=True).first()
+    if hold_id is None:
+        return None
+    with transaction.atomic():
+        # Guarded like the stock decrement: a hold the sweeper just expired won't match.
+        claimed = live.filter(pk=hold_id).update(
+            quantity=F('quantity') - 1,
+            status=Case(When(quantity=1, then=Value('CONVERTED')), default=F('status')),
+        )
+        if not claimed:
+            return None
+        listing = Listing.objects.select_for_update().get(pk=listing_id)
+        order = Order.objects.create(listing=listing, buyer=buyer, seller_id=listing.seller_id, amount=listing.price)
+        if (
+            listing.quantity == 0 and listing.status == 'RESERVED'
+            and not Reservation.objects.filter(listing_id=listing_id, status='HELD').exists()
+        ):
+            listing.status = 'SOLD'
+        listing.save(update_fields=['status', 'updated_at'])
+        enqueue([order_notification(buyer, listing)])
+    return order, listing
+
+
+ORDER_STRATEGIES = {
+    'conditional': place_order_conditional,
+    'locking': place_order_locking,
+}
+
+
+def place_order(buyer, listing_id, strategy=None):
+    held = place_held_order(buyer, listing_id)
+    if held is not None:
+        return held
+    strategy = strategy or getattr(settings, 'LISTING_ORDER_STRATEGY', 'conditional')
+    return ORDER_STRATEGIES[strategy](buyer, listing_id)
+
+
+def parse_cart(payload):
+    """Return ``{listing_id: quantity}`` from ``{"items": [{"listingId", "quantity"}]}``."""
+    items = payload.get('items') if isinstance(payload, dict) else None
+    if not isinstance(items, list) or not items:
+        raise CartError('Cart must contain at least one item.')
+    if len(items) > MAX_CART_LINES:
+        raise CartError(f'Cart cannot contain more than {MAX_CART_LINES} items.')
+
+    cart = Counter()
+    for item in items:
+        try:
+            listing_id = int(item['listingId'])
+            quantity = int(item.get('quantity', 1))
+        except (KeyError, TypeError, ValueError):
+            raise CartError('Each item needs an integer listingId and quantity.') from None
+        if quantity <= 0:
+            raise CartError('Quantities must be positive.')
+        cart[listing_id] += quantity
+    return dict(cart)
+
+
+def line_error(listing_id, message):
+    return {'listingId': listing_id, 'success': False, 'error': message}
+
+
+def buyer_holds(buyer, listing_ids, now):
+    """
+    ``buyer``'s live holds on ``listing_ids``, soonest to expire first, locked.
+
+    Holds a sweeper has already claimed are skipped: it is expiring them, and
+    waiting for it would take the locks in the opposite order to ours.
+    """
+    holds = {}
+    live = (
+        Reservation.objects.select_for_update(skip_locked=True)
+        .filter(listing_id__in=listing_ids, buyer=buyer, status='HELD', expires_at__gt=now)
+        .order_by('expires_at', 'pk')
+    )
+    for hold in live:
+        holds.setdefault(hold.listing_id, []).append(hold)
+    return holds
+
+
+def consume_holds(holds, quantity):
+    """Take up to ``quantity`` units out of ``holds``; returns ``(units, changed holds)``."""
+    taken = 0
+    used = []
+    for hold in holds:
+        if taken == quantity:
+            break
+        units = min(hold.quantity, quantity - taken)
+        hold.quantity -= units
+        if hold.quantity == 0:
+            hold.status = 'CONVERTED'
+        taken += units
+        used.append(hold)
+    return taken, used
+
+
+def checkout(buyer, cart):
+    """
+    Place orders for ``cart``; returns one result per listing, in cart order.
+
+    Units the buyer holds are ordered out of those holds first, as in
+    ``place_held_order``, so a hold on the last unit still checks out.
+    """
+    results = {}
+    orders = []
+    notifications = []
+    changed = []
+    converted = []
+
+    with transaction.atomic():
+        locked = {
+            listing.pk: listing
+            for listing in Listing.objects.select_for_update().filter(pk__in=cart, is_active=True).order_by('pk')
+        }
+        now = timezone.now()
+        holds = buyer_holds(buyer, locked, now)
+        # Any other HELD row keeps a RESERVED listing reserved once this
+        # buyer's holds are used up.
+        held_by_others = set(
+            Reservation.objects.filter(listing_id__in=locked, status='HELD')
+            .exclude(pk__in=[hold.pk for listing_holds in holds.values() for hold in listing_holds])
+            .values_list('listing_id', flat=True)
+        )
+        for listing_id, quantity in cart.items():
+            listing = locked.get(listing_id)
+            held = sum(hold.quantity for hold in holds.get(listing_id, []))
+            if listing is None or (listing.status != 'AVAILABLE' and not held):
+                results[listing_id] = line_error(listing_id, 'This listing is not available for ordering.')
+                continue
+            if listing.seller_id == buyer.id:
+                results[listing_id] = line_error(listing_id, 'You cannot place an order on your own listing.')
+                continue
+            if listing.quantity + held < quantity:
+                results[listing_id] = line_error(listing_id, f'Only {listing.quantity + held} left in stock.')
+                continue
+
+            from_holds, used = consume_holds(holds.get(listing_id, []), quantity)
+            converted.extend(used)
+            # Order rows are per unit, matching CreateOrderView.
+            orders.extend(
+                Order(listing=listing, buyer=buyer, seller_id=listing.seller_id, amount=listing.price)
+                for _ in range(quantity)
+            )
+            listing.quantity -= quantity - from_holds
+            still_held = listing_id in held_by_others or any(
+                hold.status == 'HELD' for hold in holds.get(listing_id, [])
+            )
+            if listing.quantity == 0 and not (listing.status == 'RESERVED' and still_held):
+                listing.status = 'SOLD'
+            listing.updated_at = now
+            changed.append(listing)
+            notifications.append(order_notification(buyer, listing, quantity))
+            results[listing_id] = {
+                'listingId': listing_id,
+                'success': True,
+                'quantity': listing.quantity,
+                'status': listing.status,
+            }
+
+        if converted:
+            Reservation.objects.bulk_update(converted, ['quantity', 'status'])
+        if changed:
+            Listing.objects.bulk_update(changed, ['quantity', 'status', 'updated_at'])
+            created = Order.objects.bulk_create(orders)
+            enqueue(notifications)
+            orders_bulk_created.send(sender=Order, orders=created)
+
+    order_ids = {}
+    for order in orders:
+        order_ids.setdefault(order.listing_id, []).append(order.pk)
+    for listing_id, ids in order_ids.items():
+        results[listing_id]['orderIds'] = ids
+    return [results[listing_id] for listing_id in cart]
@@ -0,0 +1,64 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+from .models import Wishlist
+
+
+def build_etag(*parts):
+    digest = hashlib.sha256('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+    return f'"{digest[:40]}"'
+
+
+def wishlist_marker(request):
+    """Per-viewer component of the version, since payloads carry isWishlisted."""
+    user = request.user
+    if not user.is_authenticated:
+        return 'anonymous'
+    marker = Wishlist.objects.filter(user=user).aggregate(total=Count('id'), latest=Max('added_at'))
+    return f"{user.pk}:{marker['total']}:{marker['latest']}"
+
+
+def latest(*moments):
+    return max((moment for moment in moments if moment is not None), default=None)
+
+
+def listing_set_version(queryset):
+    """
+    One aggregate over the filtered listings: newest change and row count.
+
+    Payloads nest the seller's rating and sales, which move without touching
+    the listing, so the newest ``Profile.stats_updated_at`` counts as a change.
+    """
+    version = queryset.order_by().aggregate(
+        listings_modified=Max('updated_at'),
+        sellers_modified=Max('seller__profile__stats_updated_at'),
+        total=Count('pk'),
+    )
+    version['last_modified'] = latest(version['listings_modified'], version['sellers_modified'])
+    return version
+
+
+def not_modified(request, etag, last_modified=None):
+    """
+    Return a 304 response when the request's validators still match.
+
+    Pass ``last_modified`` only when it fully describes the resource; for
+    lists a row leaving the set doesn't advance the newest timestamp, so
+    list views rely on the ETag alone.
+    """
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is not None:
+        response['ETag'] = etag
+    return response
+
+
+def apply_validators(response, etag, last_modified=None):
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    patch_vary_headers(response, ['Authorization', 'X-Campus'])
+    return response
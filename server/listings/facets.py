@@ -0,0 +1,71 @@
+from collections import Counter
+from decimal import Decimal
+
+from django.db.models import Case, Count, IntegerField, Value, When
+
+# Upper bounds (exclusive) of each price bucket; the last bucket is open-ended.
+PRICE_BUCKET_EDGES = [Decimal('10'), Decimal('25'), Decimal('50'), Decimal('100'), Decimal('250')]
+FACET_FIELDS = ('category', 'condition', 'type')
+
+
+def price_bucket_expression():
+    whens = [
+        When(price__lt=edge, then=Value(index))
+        for index, edge in enumerate(PRICE_BUCKET_EDGES)
+    ]
+    return Case(*whens, default=Value(len(PRICE_BUCKET_EDGES)), output_field=IntegerField())
+
+
+def price_bucket_bounds(index):
+    lower = PRICE_BUCKET_EDGES[index - 1] if index > 0 else Decimal('0')
+    upper = PRICE_BUCKET_EDGES[index] if index < len(PRICE_BUCKET_EDGES) else None
+    return lower, upper
+
+
+def compute_facets(queryset, selected):
+    """
+    Count listings per category, condition, type and price bucket.
+
+    ``queryset`` must carry every filter except the facet fields themselves;
+    ``selected`` maps facet field -> chosen value. One GROUP BY over all four
+    dimensions fetches the (small) combination table, which is then folded
+    so each facet honours the *other* selections but not its own, letting the
+    UI offer alternatives to the current choice.
+    """
+    rows = (
+        queryset.order_by()
+        .annotate(price_bucket=price_bucket_expression())
+        .values(*FACET_FIELDS, 'price_bucket')
+        .annotate(total=Count('id'))
+    )
+
+    counts = {field: Counter() for field in FACET_FIELDS}
+    price_buckets = Counter()
+    total = 0
+    for row in rows:
+        matches = {field: not selected.get(field) or row[field] == selected[field] for field in FACET_FIELDS}
+        for field in FACET_FIELDS:
+            if all(matched for other, matched in matches.items() if other != field):
+                counts[field][row[field]] += row['total']
+        if all(matches.values()):
+            price_buckets[row['price_bucket']] += row['total']
+            total += row['total']
+
+    def as_items(counter):
+        return [
+            {'value': value, 'count': count}
+            for value, count in sorted(counter.items(), key=lambda item: (-item[1], str(item[0])))
+        ]
+
+    buckets = []
+    for index in range(len(PRICE_BUCKET_EDGES) + 1):
+        lower, upper = price_bucket_bounds(index)
+        buckets.append({'min': lower, 'max': upper, 'count': price_buckets.get(index, 0)})
+
+    return {
+        'total': total,
+        'categories': as_items(counts['category']),
+        'conditions': as_items(counts['condition']),
+        'types': as_items(counts['type']),
+        'priceBuckets': buckets,
+    }
@@ -0,0 +1,64 @@
+from rest_framework.exceptions import ValidationError
+
+from .serializers import ListingCardSerializer, ListingSerializer
+
+VIEWS = {
+    'full': ListingSerializer,
+    'card': ListingCardSerializer,
+}
+
+# Listing columns each serialized field reads. Relations are handled by
+# with_listing_relations; isWishlisted is an annotation.
+FIELD_COLUMNS = {
+    'id':           ['id'],
+    'title':        ['title'],
+    'description':  ['description'],
+    'price':        ['price'],
+    'campus':       ['campus'],
+    'category':     ['category'],
+    'condition':    ['condition'],
+    'type':         ['type'],
+    'status':       ['status'],
+    'quantity':     ['quantity'],
+    'sellerId':     ['seller'],
+    'seller':       ['seller'],
+    'images':       ['image_urls'],
+    'image':        ['image_urls'],
+    'postedAt':     ['created_at'],
+    'isWishlisted': [],
+    'rating':       ['review_avg'],
+    'reviewCount':  ['review_count'],
+}
+# Keyset pagination reads the ordering values off every row.
+ALWAYS_LOADED = ['id', 'created_at']
+
+
+def parse_fieldset(request):
+    """
+    Resolve ``?view=`` and ``?fields=`` into ``(serializer_class, fields)``.
+
+    ``fields`` is None when the caller wants every field of the chosen view.
+    """
+    view = request.query_params.get('view') or 'full'
+    if view not in VIEWS:
+        raise ValidationError({'view': f"Unknown view '{view}'. Use one of: {', '.join(VIEWS)}."})
+    serializer_class = VIEWS[view]
+
+    raw_fields = request.query_params.get('fields')
+    if not raw_fields:
+        if view == 'full':
+            return serializer_class, None
+        return serializer_class, frozenset(serializer_class.Meta.fields)
+
+    fields = frozenset(name.strip() for name in raw_fields.split(',') if name.strip())
+    unknown = sorted(fields - set(serializer_class.Meta.fields))
+    if unknown or not fields:
+        raise ValidationError({'fields': f"Unknown field(s): {', '.join(unknown) or raw_fields}."})
+    return serializer_class, fields
+
+
+def columns_for(fields):
+    columns = set(ALWAYS_LOADED)
+    for name in fields:
+        columns.update(FIELD_COLUMNS[name])
+    return sorted(columns)
@@ -0,0 +1,132 @@
+"""
+Bulk listing import shared by ``POST /api/listings/bulk/`` and the
+``import_listings`` management command.
+
+Rows arrive as CSV (header row, ``images`` separated by ``|``) or NDJSON (one
+JSON object per line). Each row is validated by a single reused
+``ListingSerializer``. Valid rows are inserted with ``bulk_create``, one
+transaction per chunk, and each failed row is reported with its
+serializer errors. Rows are treated the way ``POST /api/listings/`` treats
+them: the seller is the importing user, a missing campus falls back to the
+default, and status follows quantity.
+"""
+import csv
+import io
+import json
+
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import BaseParser
+
+from .models import Listing
+from .serializers import ListingSerializer
+from .signals import listings_bulk_created
+
+FORMATS = ('csv', 'ndjson')
+DEFAULT_CHUNK_SIZE = 1000
+# Keeps responses bounded when a whole file is malformed.
+MAX_REPORTED_ERRORS = 1000
+
+
+class RawRowsParser(BaseParser):
+    """Hand the request body to ``read_rows`` untouched."""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return stream.read() if stream is not None else b''
+
+
+class CSVRowsParser(RawRowsParser):
+    media_type = 'text/csv'
+
+
+class NDJSONRowsParser(RawRowsParser):
+    media_type = 'application/x-ndjson'
+
+
+def detect_format(name='', content_type=''):
+    if 'ndjson' in content_type or 'jsonl' in content_type or name.endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    if 'csv' in content_type or name.endswith('.csv'):
+        return 'csv'
+    return None
+
+
+def read_rows(stream, fmt):
+    """Yield ``(row_number, data)``; unparseable NDJSON lines yield a string error."""
+    if isinstance(stream, (bytes, bytearray)):
+        stream = io.BytesIO(stream)
+    if not isinstance(stream, io.TextIOBase):
+        stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+
+    if fmt == 'csv':
+        for number, row in enumerate(csv.DictReader(stream), start=1):
+            data = {key.strip(): value for key, value in row.items() if key and value not in (None, '')}
+            if 'images' in data:
+                data['images'] = [url.strip() for url in data['images'].split('|') if url.strip()]
+            yield number, data
+        return
+
+    number = 0
+    for line in stream:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            data = json.loads(line)
+        except ValueError:
+            yield number, 'Invalid JSON.'
+            continue
+        yield number, data if isinstance(data, dict) else 'Each line must be a JSON object.'
+
+
+def build_listing(serializer, data, seller, default_campus):
+    """Validate one row and return an unsaved Listing; raises ValidationError."""
+    if isinstance(data, str):
+        raise ValidationError({'error': data})
+    validated = serializer.run_validation(data)
+    validated.pop('status', None)
+    quantity = validated.pop('quantity', 1)
+    campus = validated.pop('campus', None) or default_campus
+    return Listing(
+        **validated,
+        seller=seller,
+        campus=campus,
+        quantity=quantity,
+        status='SOLD' if quantity == 0 else 'AVAILABLE',
+    )
+
+
+def import_listings(rows, seller, default_campus='', chunk_size=DEFAULT_CHUNK_SIZE, dry_run=False):
+    """
+    Validate and insert ``rows`` (from ``read_rows``) for ``seller``.
+
+    Returns ``{'valid', 'created', 'failed', 'errors'}`` where ``errors``
+    lists ``{'row', 'errors'}`` for up to ``MAX_REPORTED_ERRORS`` rejected
+    rows. With ``dry_run`` nothing is written and ``created`` stays 0.
+    """
+    serializer = ListingSerializer()
+    result = {'valid': 0, 'created': 0, 'failed': 0, 'errors': []}
+    chunk = []
+
+    def flush():
+        result['valid'] += len(chunk)
+        if not dry_run:
+            with transaction.atomic():
+                created = Listing.objects.bulk_create(chunk)
+                listings_bulk_created.send(sender=Listing, listings=created)
+            result['created'] += len(created)
+        chunk.clear()
+
+    for number, data in rows:
+        try:
+            chunk.append(build_listing(serializer, data, seller, default_campus))
+        except ValidationError as exc:
+            result['failed'] += 1
+            if len(result['errors']) < MAX_REPORTED_ERRORS:
+                result['errors'].append({'row': number, 'errors': exc.detail})
+            continue
+        if len(chunk) >= chunk_size:
+            flush()
+    if chunk:
+        flush()
+    return result
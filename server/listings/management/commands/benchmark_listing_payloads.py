@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from listings.benchmarking import format_stats, seed_listings, time_call
+from listings.views import ListingListCreateView
+
+SHAPES = {
+    'full': {},
+    'card': {'view': 'card'},
+    'fields': {'fields': 'id,title,price,campus,status'},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare payload size and latency of the full listing shape with '
+        '?view=card and ?fields= on a seeded table. Runs inside a rolled-back '
+        'transaction.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=10_000)
+        parser.add_argument('--page-size', type=int, default=24)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+        view = ListingListCreateView.as_view()
+
+        with transaction.atomic():
+            self.stdout.write(f"Seeding {options['size']} listings...")
+            seller = seed_listings(options['size'], stdout=self.stdout)
+
+            def fetch(params):
+                request = factory.get('/api/listings/', params, HTTP_HOST='localhost')
+                # Authenticated requests skip the anonymous browse cache.
+                force_authenticate(request, user=seller)
+                return view(request).render()
+
+            def walk(params):
+                """Page through the whole set; returns (pages, bytes)."""
+                pages, size, cursor = 0, 0, None
+                while True:
+                    response = fetch({**params, 'page_size': 100, **({'cursor': cursor} if cursor else {})})
+                    pages += 1
+                    size += len(response.content)
+                    if not response.data['next']:
+                        return pages, size
+                    cursor = response.data['next'].split('cursor=')[1].split('&')[0]
+
+            baseline = None
+            for label, params in SHAPES.items():
+                page_params = {**params, 'page_size': options['page_size']}
+                page_bytes = len(fetch(page_params).content)
+                stats = time_call(lambda: fetch(page_params), options['repeat'])
+                pages, total_bytes = walk(params)
+                baseline = baseline or total_bytes
+                self.stdout.write(format_stats(f'{label} page ({page_bytes} bytes)', stats))
+                self.stdout.write(
+                    f'{"":<40} full walk: {pages} pages, {total_bytes / 1024:,.0f} KiB '
+                    f'({total_bytes / baseline:.0%} of full)'
+                )
+
+            transaction.set_rollback(True)
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from listings.benchmarking import format_stats, seed_listings, time_call
+from listings.models import Listing
+from listings.search import search_listings
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare title__icontains search with the ranked full-text search on '
+        'seeded listing tables. Runs inside a rolled-back transaction.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000])
+        parser.add_argument('--terms', nargs='+', default=['calculus textbook', 'lamp', 'gaming laptop'])
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--limit', type=int, default=24, help='Rows fetched per query (one browse page).')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('The search benchmark needs the Postgres database.')
+
+        seeded = 0
+        with transaction.atomic():
+            for size in sorted(options['sizes']):
+                self.stdout.write(f'Seeding up to {size} listings...')
+                seed_listings(size - seeded, seed=size, stdout=self.stdout)
+                seeded = size
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE listings_listing')
+
+                self.stdout.write(self.style.MIGRATE_HEADING(f'{size} listings'))
+                base = Listing.objects.filter(is_active=True)
+                for term in options['terms']:
+                    limit = options['limit']
+                    legacy = time_call(
+                        lambda: list(base.filter(title__icontains=term).values_list('id', flat=True)[:limit]),
+                        options['repeat'],
+                    )
+                    ranked = time_call(
+                        lambda: list(search_listings(base, term).values_list('id', flat=True)[:limit]),
+                        options['repeat'],
+                    )
+                    self.stdout.write(format_stats(f'icontains  "{term}"', legacy))
+                    self.stdout.write(format_stats(f'full-text  "{term}"', ranked))
+
+            transaction.set_rollback(True)
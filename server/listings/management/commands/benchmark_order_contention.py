@@ -0,0 +1,86 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from api.models import Notification, NotificationOutbox
+from listings.benchmarking import get_benchmark_seller
+from listings.checkout import ORDER_STRATEGIES, OrderError, place_order
+from listings.models import Listing, Order
+
+BUYER_PREFIX = 'benchmark-buyer-'
+
+
+class Command(BaseCommand):
+    help = (
+        'Race --buyers concurrent orders against one listing with --quantity '
+        'units, once per order strategy, and check nothing was oversold. '
+        'Needs PostgreSQL: rows are committed so the threads can see them, '
+        'and removed afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--buyers', type=int, default=200)
+        parser.add_argument('--quantity', type=int, default=50)
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--strategy', choices=sorted(ORDER_STRATEGIES), action='append')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Order contention needs PostgreSQL row locking.')
+
+        seller = get_benchmark_seller()
+        emails = [f'{BUYER_PREFIX}{i}@campus.edu' for i in range(options['buyers'])]
+        buyers = [User.objects.get_or_create(username=email, defaults={'email': email})[0] for email in emails]
+        try:
+            for strategy in options['strategy'] or sorted(ORDER_STRATEGIES):
+                self.race(strategy, seller, buyers, options)
+        finally:
+            Listing.objects.filter(seller=seller, title='Contended listing').delete()
+            Notification.objects.filter(recipient=seller).delete()
+            NotificationOutbox.objects.filter(recipient=seller).delete()
+            User.objects.filter(username__startswith=BUYER_PREFIX).delete()
+
+    def race(self, strategy, seller, buyers, options):
+        quantity = options['quantity']
+        listing = Listing.objects.create(
+            seller=seller, title='Contended listing', description='Benchmark', price='10.00',
+            category='Books', campus='Main Campus', condition='Good', type='SECOND_HAND',
+            quantity=quantity,
+        )
+
+        def run(share):
+            # One connection per thread, so the timing is order placement, not connecting.
+            accepted = 0
+            try:
+                for buyer in share:
+                    try:
+                        place_order(buyer, listing.pk, strategy)
+                        accepted += 1
+                    except OrderError:
+                        pass
+            finally:
+                connection.close()
+            return accepted
+
+        threads = options['threads']
+        shares = [buyers[i::threads] for i in range(threads)]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            accepted = sum(pool.map(run, shares))
+        elapsed = time.perf_counter() - started
+
+        listing.refresh_from_db()
+        orders = Order.objects.filter(listing=listing).count()
+        expected = min(quantity, len(buyers))
+        consistent = orders == accepted == expected and listing.quantity == quantity - expected
+        self.stdout.write(
+            f'{strategy:<12} {len(buyers)} buyers / {quantity} units: '
+            f'{accepted} ordered, {len(buyers) - accepted} rejected, '
+            f'{len(buyers) / elapsed:.0f} attempts/s ({elapsed * 1000:.0f} ms), '
+            f'final quantity {listing.quantity} {listing.status}'
+        )
+        if not consistent:
+            raise CommandError(f'{strategy}: {orders} orders for {quantity} units (oversold or lost orders).')
@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from listings.similarity import DEFAULT_TOP_K, Refresher, rebuild_all
+
+
+class Command(BaseCommand):
+    help = (
+        'Build the related-listings similarity index. Without flags every '
+        'category is rebuilt; --incremental drains the queue of changed listings.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--incremental', action='store_true', help='Only process queued listing changes.')
+        parser.add_argument('--loop', action='store_true', help='Keep draining the queue (implies --incremental).')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds to sleep when the queue is empty.')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--top-k', type=int, default=DEFAULT_TOP_K)
+        parser.add_argument(
+            '--memory-mb', type=int, default=256,
+            help='Budget for each block of similarity scores; bounds peak memory on large categories.',
+        )
+
+    def handle(self, *args, **options):
+        memory_bytes = options['memory_mb'] * 1024 * 1024
+        top_k = options['top_k']
+
+        if not (options['incremental'] or options['loop']):
+            started = time.monotonic()
+            written = rebuild_all(top_k=top_k, memory_bytes=memory_bytes, stdout=self.stdout)
+            self.stdout.write(self.style.SUCCESS(
+                f'Wrote {written} neighbour rows in {time.monotonic() - started:.1f}s.'
+            ))
+            return
+
+        refresher = Refresher(
+            interval=options['interval'], batch_size=options['batch_size'], top_k=top_k, memory_bytes=memory_bytes,
+        )
+
+        def report(processed):
+            if processed or not options['loop']:
+                self.stdout.write(f'Refreshed {processed} listings.')
+
+        refresher.run(iterations=None if options['loop'] else 1, on_result=report)
@@ -0,0 +1,46 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from listings.importing import DEFAULT_CHUNK_SIZE, FORMATS, detect_format, import_listings, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Bulk import listings for one seller from a CSV or NDJSON file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--seller', required=True, help='Username of the seller the listings belong to.')
+        parser.add_argument('--format', choices=FORMATS, help='Defaults to the file extension.')
+        parser.add_argument('--campus', default='', help='Campus for rows that leave it blank.')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help='Validate only; write nothing.')
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or detect_format(options['path'])
+        if fmt is None:
+            raise CommandError('Could not tell the file format; pass --format csv or --format ndjson.')
+        try:
+            seller = User.objects.get(username=options['seller'])
+        except User.DoesNotExist as exc:
+            raise CommandError(f"No user named {options['seller']!r}.") from exc
+
+        started = time.monotonic()
+        with open(options['path'], 'rb') as stream:
+            result = import_listings(
+                read_rows(stream, fmt),
+                seller,
+                default_campus=options['campus'],
+                chunk_size=options['chunk_size'],
+                dry_run=options['dry_run'],
+            )
+        elapsed = time.monotonic() - started
+
+        for error in result['errors']:
+            self.stderr.write(f"row {error['row']}: {error['errors']}")
+        verb = 'Validated' if options['dry_run'] else 'Imported'
+        count = result['valid'] if options['dry_run'] else result['created']
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {count} listings in {elapsed:.1f}s; {result['failed']} rows rejected."
+        ))
@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from listings.reputation import reconcile
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute Profile rating_avg, rating_count and completed_sales and Listing '
+        'review_avg and review_count from reviews and orders.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows updated per statement.')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        profiles, listings = reconcile(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Reconciled {profiles} profiles and {listings} listings in {time.monotonic() - started:.1f}s.'
+        ))
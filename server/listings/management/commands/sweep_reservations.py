@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from listings.reservations import DEFAULT_BATCH_SIZE, Sweeper
+
+
+class Command(BaseCommand):
+    help = 'Return expired reservation holds to stock. With --loop, keep sweeping every --interval seconds.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep sweeping until interrupted.')
+        parser.add_argument('--interval', type=float, default=None, help='Seconds between sweeps (default RESERVATION_SWEEP_INTERVAL).')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Holds released per statement.')
+
+    def handle(self, *args, **options):
+        sweeper = Sweeper(interval=options['interval'], batch_size=options['batch_size'])
+
+        def report(released):
+            if released or not options['loop']:
+                self.stdout.write(f'Released {released} expired holds.')
+
+        sweeper.run(iterations=None if options['loop'] else 1, on_result=report)
@@ -0,0 +1,60 @@
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+SEARCH_VECTOR_SQL = """
+    setweight(to_tsvector('english', coalesce({row}title, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce({row}description, '')), 'B') ||
+    setweight(to_tsvector('english', coalesce({row}category, '')), 'C')
+"""
+
+
+def create_search_vector_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute(f"""
+        CREATE OR REPLACE FUNCTION listings_listing_search_vector_update() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := {SEARCH_VECTOR_SQL.format(row='NEW.')};
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql;
+    """)
+    schema_editor.execute("""
+        CREATE TRIGGER listings_listing_search_vector_trigger
+        BEFORE INSERT OR UPDATE OF title, description, category, search_vector
+        ON listings_listing
+        FOR EACH ROW EXECUTE FUNCTION listings_listing_search_vector_update();
+    """)
+    schema_editor.execute(
+        f"UPDATE listings_listing SET search_vector = {SEARCH_VECTOR_SQL.format(row='')};"
+    )
+    schema_editor.execute(
+        "CREATE INDEX listing_search_vector_gin ON listings_listing USING gin (search_vector);"
+    )
+
+
+def drop_search_vector_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute("DROP INDEX IF EXISTS listing_search_vector_gin;")
+    schema_editor.execute("DROP TRIGGER IF EXISTS listings_listing_search_vector_trigger ON listings_listing;")
+    schema_editor.execute("DROP FUNCTION IF EXISTS listings_listing_search_vector_update();")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0006_normalize_listing_inventory_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listing',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_vector_trigger, drop_search_vector_trigger),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.contrib.postgres.search import SearchVectorField
 
 class Listing(models.Model):
     STATUS_CHOICES = [
@@ -26,6 +27,36 @@ class Listing(models.Model):
     quantity = models.PositiveIntegerField(default=1)
     image_urls = models.JSONField(default=list, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Version marker for ETag/Last-Modified. auto_now only fires on save()
+    # calls that include it, so list it in update_fields.
+    updated_at = models.DateTimeField(auto_now=True)
+    # Weighted title/description/category tsvector, kept current by a
+    # Postgres trigger (see migration 0007). Always NULL on other backends.
+    search_vector = SearchVectorField(null=True, editable=False)
+    # Review aggregates, kept current by listings.reputation.
+    review_avg = models.FloatField(default=0.0)
+    review_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        # Browse always filters is_active=True, so the hot indexes are partial
+        # on it and end in the (created_at, id) keyset used for pagination.
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], condition=models.Q(is_active=True), name='listing_active_recent'),
+            models.Index(fields=['campus', '-created_at', '-id'], condition=models.Q(is_active=True), name='listing_active_campus_recent'),
+            models.Index(fields=['category', '-created_at', '-id'], condition=models.Q(is_active=True), name='listing_active_cat_recent'),
+            models.Index(fields=['campus', 'category', '-created_at', '-id'], condition=models.Q(is_active=True), name='listing_active_campus_cat'),
+            models.Index(fields=['campus', 'price'], condition=models.Q(is_active=True), name='listing_active_campus_price'),
+            models.Index(fields=['category', 'price'], condition=models.Q(is_active=True), name='listing_active_cat_price'),
+            models.Index(fields=['seller', '-created_at'], name='listing_seller_recent'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored campus so cache invalidation can retire the old
+        # campus when a listing moves.
+        instance._loaded_campus = instance.__dict__.get('campus')
+        return instance
 
     def __str__(self):
         return self.title
@@ -45,6 +76,11 @@ class Review(models.Model):
     rating = models.PositiveIntegerField(default=5)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['listing', '-created_at', '-id'], name='review_listing_recent'),
+        ]
+
 class Report(models.Model):
     STATUS_CHOICES = [
         ('Open', 'Open'),
@@ -65,12 +101,61 @@ class Order(models.Model):
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        # Transaction history pages each role with its own keyset range.
+        indexes = [
+            models.Index(fields=['buyer', '-created_at', '-id'], name='order_buyer_recent'),
+            models.Index(fields=['seller', '-created_at', '-id'], name='order_seller_recent'),
+        ]
+
 class Offer(models.Model):
     listing = models.ForeignKey(Listing, on_delete=models.CASCADE, related_name='offers')
     buyer = models.ForeignKey(User, on_delete=models.CASCADE)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     created_at = models.DateTimeField(auto_now_add=True)
 
+class Reservation(models.Model):
+    """A time-boxed hold that takes ``quantity`` units out of stock (see listings.reservations)."""
+    STATUS_CHOICES = [
+        ('HELD', 'Held'),
+        ('CONVERTED', 'Converted'),
+        ('RELEASED', 'Released'),
+        ('EXPIRED', 'Expired'),
+    ]
+
+    listing = models.ForeignKey(Listing, on_delete=models.CASCADE, related_name='reservations')
+    buyer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='reservations')
+    quantity = models.PositiveIntegerField(default=1)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='HELD')
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # The sweeper only ever scans live holds, oldest expiry first.
+            models.Index(fields=['expires_at'], condition=models.Q(status='HELD'), name='reservation_held_expiry'),
+            models.Index(fields=['listing', 'buyer'], condition=models.Q(status='HELD'), name='reservation_held_buyer'),
+        ]
+
+class ListingNeighbor(models.Model):
+    """Precomputed top-K content neighbour of a listing (see listings.similarity)."""
+    listing = models.ForeignKey(Listing, on_delete=models.CASCADE, related_name='neighbors')
+    related = models.ForeignKey(Listing, on_delete=models.CASCADE, related_name='neighbor_of')
+    score = models.FloatField()
+
+    class Meta:
+        unique_together = ('listing', 'related')
+        indexes = [
+            models.Index(fields=['listing', '-score'], name='listing_neighbor_score'),
+        ]
+
+
+class PendingSimilarityUpdate(models.Model):
+    """Listings whose neighbour lists must be refreshed by the similarity worker."""
+    listing = models.OneToOneField(Listing, on_delete=models.CASCADE, primary_key=True, related_name='+')
+    queued_at = models.DateTimeField(auto_now=True)
+
+
 class ListingImage(models.Model):
     listing = models.ForeignKey(Listing, on_delete=models.CASCADE, related_name='images')
     image = models.ImageField(upload_to='listing_images/')
@@ -0,0 +1,200 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import FloatField, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    Opt-in keyset pagination over a compound descending ordering.
+
+    Pagination only kicks in when the request carries ``cursor`` or
+    ``page_size``; otherwise the view keeps returning its plain list so
+    existing clients are unaffected. Cursors are opaque base64 tokens that
+    carry the ordering values of the boundary row, so every page is a single
+    indexed range scan no matter how deep the client pages. Endpoints with no
+    legacy clients set ``opt_in = False`` to always paginate.
+    """
+    opt_in = True
+    ordering = ('-created_at', '-id')
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = 24
+    max_page_size = 100
+    invalid_cursor_message = 'Invalid cursor'
+    # Ordering names that are annotations rather than model fields, with the
+    # field used to parse them back out of a cursor.
+    annotation_fields = {}
+
+    def is_requested(self, request):
+        params = request.query_params
+        if not self.opt_in:
+            return True
+        return self.cursor_query_param in params or self.page_size_query_param in params
+
+    def get_page_size(self, request):
+        raw_value = request.query_params.get(self.page_size_query_param)
+        if raw_value is None:
+            return self.page_size
+        try:
+            value = int(raw_value)
+        except (TypeError, ValueError):
+            return self.page_size
+        if value <= 0:
+            return self.page_size
+        return min(value, self.max_page_size)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_requested(request):
+            return None
+
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.fields = [name.lstrip('-') for name in self.ordering]
+        self.model = queryset.model
+
+        direction, position = self.decode_cursor(request)
+        backwards = direction == 'p'
+
+        results = self.fetch(queryset, position, backwards, self.page_size + 1)
+        has_more = len(results) > self.page_size
+        page = results[:self.page_size]
+        if backwards:
+            page.reverse()
+
+        if backwards:
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        self.first_position = self.get_position(page[0]) if page else position
+        self.last_position = self.get_position(page[-1]) if page else position
+        return page
+
+    def fetch(self, queryset, position, backwards, limit):
+        """The ``limit`` rows after (or, going backwards, before) ``position``."""
+        if position is not None:
+            queryset = queryset.filter(self.build_keyset_filter(position, backwards))
+        if backwards:
+            queryset = queryset.order_by(*self.fields)
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        return list(queryset[:limit])
+
+    def build_keyset_filter(self, position, backwards):
+        # Row-value comparison "(a, b) < (x, y)" expanded into ORed prefixes
+        # so every database backend can use the composite index.
+        lookup = 'gt' if backwards else 'lt'
+        condition = Q()
+        for index, name in enumerate(self.fields):
+            branch = Q(**{f'{name}__{lookup}': position[index]})
+            for prior_index in range(index):
+                branch &= Q(**{self.fields[prior_index]: position[prior_index]})
+            condition |= branch
+        return condition
+
+    def get_position(self, instance):
+        if isinstance(instance, dict):
+            return [instance[name] for name in self.fields]
+        return [getattr(instance, name) for name in self.fields]
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return 'n', None
+
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            decoded = urlsafe_b64decode(padded.encode('ascii')).decode('utf-8')
+            direction, *raw_values = decoded.split('|')
+            if direction not in {'n', 'p'} or len(raw_values) != len(self.fields):
+                raise ValueError
+            position = [
+                (self.annotation_fields.get(name) or self.model._meta.get_field(name)).to_python(raw_value)
+                for name, raw_value in zip(self.fields, raw_values)
+            ]
+        except (ValueError, DjangoValidationError) as exc:
+            raise NotFound(self.invalid_cursor_message) from exc
+
+        if any(value is None for value in position):
+            raise NotFound(self.invalid_cursor_message)
+        return direction, position
+
+    def encode_cursor(self, direction, position):
+        raw_values = [
+            value.isoformat() if hasattr(value, 'isoformat') else str(value)
+            for value in position
+        ]
+        token = '|'.join([direction, *raw_values])
+        encoded = urlsafe_b64encode(token.encode('utf-8')).decode('ascii').rstrip('=')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or self.last_position is None:
+            return None
+        return self.encode_cursor('n', self.last_position)
+
+    def get_previous_link(self):
+        if not self.has_previous or self.first_position is None:
+            return None
+        return self.encode_cursor('p', self.first_position)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'items': data,
+            'next': self.get_next_link(),
+            'prev': self.get_previous_link(),
+        })
+
+
+class ListingCursorPagination(KeysetCursorPagination):
+    ordering = ('-created_at', '-id')
+    # Ranked search results (see listings.search) page by relevance first.
+    search_ordering = ('-search_rank', '-created_at', '-id')
+    annotation_fields = {'search_rank': FloatField()}
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if 'search_rank' in queryset.query.annotations:
+            self.ordering = self.search_ordering
+        return super().paginate_queryset(queryset, request, view)
+
+
+class ReviewCursorPagination(KeysetCursorPagination):
+    opt_in = False
+    page_size = 10
+    max_page_size = 50
+
+
+class MergedCursorPagination(KeysetCursorPagination):
+    """
+    Keyset pages over several querysets of one model, e.g. a user's orders
+    as buyer and as seller.
+
+    Each part is read as its own index range and the pages are merged in
+    Python. An OR across the parts would make the database collect and sort
+    every match before applying the limit. Here a page costs the same
+    however long either history is.
+    """
+
+    def paginate_queryset(self, querysets, request, view=None):
+        self.parts = querysets
+        return super().paginate_queryset(querysets[0], request, view)
+
+    def fetch(self, queryset, position, backwards, limit):
+        rows = {}
+        for part in self.parts:
+            for row in super().fetch(part, position, backwards, limit):
+                rows[row.pk] = row
+        return sorted(rows.values(), key=self.get_position, reverse=not backwards)[:limit]
+
+
+class TransactionCursorPagination(MergedCursorPagination):
+    opt_in = False
+    page_size = 20
@@ -0,0 +1,114 @@
+"""
+Review and sales counters denormalized onto ``api.Profile`` (per seller) and
+``Listing`` (per listing).
+
+Each Review/Order write moves the counters with one ``UPDATE`` built from
+``F()`` expressions, so concurrent writes never lose an increment.
+``reconcile`` recomputes everything from the source tables.
+"""
+from django.db.models import Avg, Case, Count, F, FloatField, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from api.models import Profile
+
+from .cache import invalidate_campuses
+from .models import Listing, Order, Review
+
+
+def added_rating(avg, count, rating):
+    """Update kwargs folding ``rating`` into a running average."""
+    return {
+        avg: (F(avg) * F(count) + rating) / (F(count) + 1.0),
+        count: F(count) + 1,
+    }
+
+
+def removed_rating(avg, count, rating):
+    return {
+        avg: Case(
+            When(**{f'{count}__gt': 1}, then=(F(avg) * F(count) - rating) / (F(count) - 1.0)),
+            default=Value(0.0),
+            output_field=FloatField(),
+        ),
+        count: Greatest(F(count) - 1, 0),
+    }
+
+
+def invalidate_seller(seller_id):
+    """Retire cached pages in every campus the seller lists in; each nests their stats."""
+    invalidate_campuses(*Listing.objects.filter(seller_id=seller_id).values_list('campus', flat=True).distinct())
+
+
+def apply_rating(listing, changes):
+    Profile.objects.filter(user_id=listing.seller_id).update(
+        **changes('rating_avg', 'rating_count'), stats_updated_at=timezone.now(),
+    )
+    # The listing payload carries its rating, so move its ETag and cached pages too.
+    Listing.objects.filter(pk=listing.pk).update(
+        **changes('review_avg', 'review_count'), updated_at=timezone.now(),
+    )
+    invalidate_seller(listing.seller_id)
+
+
+def add_rating(listing, rating):
+    apply_rating(listing, lambda avg, count: added_rating(avg, count, rating))
+
+
+def remove_rating(listing, rating):
+    apply_rating(listing, lambda avg, count: removed_rating(avg, count, rating))
+
+
+def add_sales(seller_id, count=1):
+    Profile.objects.filter(user_id=seller_id).update(
+        completed_sales=F('completed_sales') + count, stats_updated_at=timezone.now(),
+    )
+    invalidate_seller(seller_id)
+
+
+def remove_sale(seller_id):
+    Profile.objects.filter(user_id=seller_id).update(
+        completed_sales=Greatest(F('completed_sales') - 1, 0), stats_updated_at=timezone.now(),
+    )
+    invalidate_seller(seller_id)
+
+
+def batched_update(queryset, batch_size, **changes):
+    """Apply ``changes`` to ``queryset`` in primary-key ranges; returns rows updated."""
+    updated = 0
+    last_id = 0
+    while True:
+        ids = list(queryset.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return updated
+        updated += queryset.filter(pk__gte=ids[0], pk__lte=ids[-1]).update(**changes)
+        last_id = ids[-1]
+
+
+def average_and_count(reviews):
+    return (
+        Coalesce(Subquery(reviews.annotate(value=Avg('rating')).values('value')), 0.0, output_field=FloatField()),
+        Coalesce(Subquery(reviews.annotate(value=Count('id')).values('value')), 0),
+    )
+
+
+def reconcile(batch_size=5000):
+    """Recompute every profile and listing counter; returns ``(profiles, listings)`` updated."""
+    seller_reviews = Review.objects.filter(listing__seller=OuterRef('user_id')).order_by().values('listing__seller')
+    sales = Order.objects.filter(seller=OuterRef('user_id')).order_by().values('seller')
+    rating_avg, rating_count = average_and_count(seller_reviews)
+    profiles = batched_update(
+        Profile.objects.all(),
+        batch_size,
+        rating_avg=rating_avg,
+        rating_count=rating_count,
+        completed_sales=Coalesce(Subquery(sales.annotate(value=Count('id')).values('value')), 0),
+        stats_updated_at=timezone.now(),
+    )
+
+    listing_reviews = Review.objects.filter(listing=OuterRef('pk')).order_by().values('listing')
+    review_avg, review_count = average_and_count(listing_reviews)
+    listings = batched_update(
+        Listing.objects.all(), batch_size, review_avg=review_avg, review_count=review_count,
+    )
+    return profiles, listings
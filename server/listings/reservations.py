@@ -0,0 +1,161 @@
+"""
+Time-boxed reservation holds.
+
+A hold takes units out of ``Listing.quantity`` for
+``RESERVATION_HOLD_MINUTES``. If it takes the last unit, the listing shows as
+RESERVED and nobody else can order it. The holder's next order uses up the
+hold (see ``checkout.place_held_order``).
+
+Expired holds are put back in stock by ``sweep_expired``. It runs from the
+``sweep_reservations`` command loop, or from a ``Sweeper`` thread in the web
+process when ``RESERVATION_SWEEPER_IN_PROCESS`` is set. Each batch costs one
+UPDATE on reservations and one on listings. Rows are claimed with
+``SKIP LOCKED``, so several sweepers can run side by side, and the listings
+are locked in primary-key order first, so a sweep can't deadlock with a
+cart checkout.
+"""
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, PositiveIntegerField, Sum, Value, When
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+
+from core.workers import PeriodicWorker
+
+from .cache import invalidate_campuses
+from .checkout import order_error
+from .models import Listing, Reservation
+
+DEFAULT_BATCH_SIZE = 500
+MAX_HOLD_QUANTITY = 10
+
+
+class ReservationError(ValueError):
+    pass
+
+
+def hold_duration():
+    return timedelta(minutes=settings.RESERVATION_HOLD_MINUTES)
+
+
+def touch_campuses(listing_ids):
+    invalidate_campuses(*Listing.objects.filter(pk__in=listing_ids).values_list('campus', flat=True).distinct())
+
+
+def create_hold(buyer, listing_id, quantity=1, now=None):
+    """Take ``quantity`` units of a listing out of stock for ``buyer``; returns the Reservation."""
+    if not 1 <= quantity <= MAX_HOLD_QUANTITY:
+        raise ReservationError(f'You can hold between 1 and {MAX_HOLD_QUANTITY} units.')
+    now = now or timezone.now()
+    with transaction.atomic():
+        taken = (
+            Listing.objects.filter(pk=listing_id, is_active=True, status='AVAILABLE', quantity__gte=quantity)
+            .exclude(seller=buyer)
+            .update(
+                quantity=F('quantity') - quantity,
+                status=Case(When(quantity=quantity, then=Value('RESERVED')), default=F('status')),
+                updated_at=now,
+            )
+        )
+        if taken:
+            touch_campuses([listing_id])
+            return Reservation.objects.create(
+                listing_id=listing_id, buyer=buyer, quantity=quantity, expires_at=now + hold_duration(),
+            )
+
+    listing = get_object_or_404(Listing, pk=listing_id, is_active=True)
+    raise ReservationError(order_error(listing, buyer) or f'Only {listing.quantity} left in stock.')
+
+
+def release(rows, status, now):
+    """
+    Return held units to stock. ``rows`` are ``(id, listing_id, quantity)``
+    of HELD reservations the caller has locked.
+    """
+    Reservation.objects.filter(pk__in=[pk for pk, _, _ in rows]).update(status=status)
+    restock = Counter()
+    for _, listing_id, quantity in rows:
+        restock[listing_id] += quantity
+    # Lock the listings in primary-key order, as checkout does, before the
+    # restock UPDATE takes its row locks in whatever order the plan visits them.
+    campuses = set(
+        Listing.objects.select_for_update().filter(pk__in=restock).order_by('pk').values_list('campus', flat=True)
+    )
+    Listing.objects.filter(pk__in=restock).update(
+        quantity=F('quantity') + Case(
+            *[When(pk=listing_id, then=Value(units)) for listing_id, units in restock.items()],
+            output_field=PositiveIntegerField(),
+        ),
+        # Evaluated against the pre-update row: a listing the holds emptied
+        # goes back on sale, whether it showed RESERVED (a hold took the last
+        # unit) or SOLD (an order took the last free one). Sellers marking a
+        # listing SOLD cancel its holds first, so those never come back here.
+        status=Case(
+            When(status__in=['RESERVED', 'SOLD'], quantity=0, then=Value('AVAILABLE')), default=F('status'),
+        ),
+        updated_at=now,
+    )
+    invalidate_campuses(*campuses)
+
+
+def held_units(listing_id):
+    """Units out on HELD reservations; still the listing's stock until ordered or released."""
+    return Reservation.objects.filter(listing_id=listing_id, status='HELD').aggregate(units=Sum('quantity'))['units'] or 0
+
+
+def cancel_holds(listing_id):
+    """Drop every live hold without restocking, for a seller taking the listing off sale."""
+    return Reservation.objects.filter(listing_id=listing_id, status='HELD').update(status='RELEASED')
+
+
+def release_holds(buyer, listing_id, now=None):
+    """Cancel ``buyer``'s live holds on a listing; returns how many were released."""
+    now = now or timezone.now()
+    with transaction.atomic():
+        rows = list(
+            Reservation.objects.select_for_update()
+            .filter(listing_id=listing_id, buyer=buyer, status='HELD')
+            .values_list('pk', 'listing_id', 'quantity')
+        )
+        if rows:
+            release(rows, 'RELEASED', now)
+    return len(rows)
+
+
+def sweep_expired(now=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Release every hold that expired by ``now``, a batch per transaction; returns holds released."""
+    now = now or timezone.now()
+    expired = Reservation.objects.filter(status='HELD', expires_at__lte=now).order_by('expires_at')
+    released = 0
+    while True:
+        with transaction.atomic():
+            rows = list(expired.select_for_update(skip_locked=True).values_list('pk', 'listing_id', 'quantity')[:batch_size])
+            if rows:
+                release(rows, 'EXPIRED', now)
+        released += len(rows)
+        if len(rows) < batch_size:
+            return released
+
+
+class Sweeper(PeriodicWorker):
+    """Runs ``sweep_expired`` every ``interval`` seconds (see ``core.workers``)."""
+    name = 'reservation-sweeper'
+
+    def __init__(self, interval=None, batch_size=DEFAULT_BATCH_SIZE, **kwargs):
+        super().__init__(settings.RESERVATION_SWEEP_INTERVAL if interval is None else interval, **kwargs)
+        self.batch_size = batch_size
+
+    def run_once(self):
+        return sweep_expired(now=self.clock(), batch_size=self.batch_size)
+
+
+def start_in_process_sweeper():
+    """Start a background Sweeper when ``RESERVATION_SWEEPER_IN_PROCESS`` is on (see core/wsgi.py)."""
+    if not settings.RESERVATION_SWEEPER_IN_PROCESS:
+        return None
+    sweeper = Sweeper()
+    sweeper.start()
+    return sweeper
@@ -0,0 +1,39 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import F, FloatField, Q
+from django.db.models.functions import Cast
+
+SEARCH_CONFIG = 'english'
+
+
+def is_postgres(queryset):
+    return connections[queryset.db].vendor == 'postgresql'
+
+
+def search_listings(queryset, term):
+    """
+    Filter listings by a free-text term, most relevant first.
+
+    On Postgres this matches the trigger-maintained ``search_vector`` (GIN
+    indexed, title > description > category) and orders by ``ts_rank``.
+    Other backends, e.g. the SQLite test database, fall back to
+    ``icontains`` over the same three columns.
+    """
+    term = (term or '').strip()
+    if not term:
+        return queryset
+
+    if not is_postgres(queryset):
+        return queryset.filter(
+            Q(title__icontains=term)
+            | Q(description__icontains=term)
+            | Q(category__icontains=term)
+        )
+
+    query = SearchQuery(term, search_type='websearch', config=SEARCH_CONFIG)
+    return (
+        queryset.filter(search_vector=query)
+        # As double precision, so a rank read back from a cursor compares equal.
+        .annotate(search_rank=Cast(SearchRank(F('search_vector'), query), FloatField()))
+        .order_by('-search_rank', '-created_at', '-id')
+    )
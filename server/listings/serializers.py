@@ -14,14 +14,24 @@ class SellerSerializer(serializers.Serializer):
         return obj.profile.full_name or obj.username
 
     def get_rating(self, obj):
-        return getattr(obj.profile, 'rating', 0.0)
+        return round(obj.profile.rating_avg, 1)
 
     def get_transactions(self, obj):
-        return getattr(obj.profile, 'transactions', 0)
+        return obj.profile.completed_sales
 
 
-class ListingSerializer(serializers.ModelSerializer):
-    sellerId     = serializers.IntegerField(source='seller.id',   read_only=True)
+class SparseFieldsetMixin:
+    """Accept ``fields=[...]`` and drop every other declared field."""
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class ListingSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    sellerId     = serializers.IntegerField(source='seller_id',   read_only=True)
     seller       = SellerSerializer(read_only=True)
     images       = serializers.ListField(
         child=serializers.URLField(),
@@ -30,6 +40,8 @@ class ListingSerializer(serializers.ModelSerializer):
     )
     postedAt     = serializers.DateTimeField(source='created_at', read_only=True)
     isWishlisted = serializers.SerializerMethodField()
+    rating       = serializers.SerializerMethodField()
+    reviewCount  = serializers.IntegerField(source='review_count', read_only=True)
 
     class Meta:
         model  = Listing
@@ -37,11 +49,14 @@ class ListingSerializer(serializers.ModelSerializer):
             'id', 'title', 'description', 'price',
             'campus', 'category', 'condition', 'type', 'status', 'quantity',
             'sellerId', 'seller', 'images', 'postedAt', 'isWishlisted',
+            'rating', 'reviewCount',
         ]
-        read_only_fields = ['sellerId', 'seller', 'postedAt', 'isWishlisted']
+        read_only_fields = ['sellerId', 'seller', 'postedAt', 'isWishlisted', 'rating', 'reviewCount']
 
     def to_representation(self, instance):
         data = super().to_representation(instance)
+        if 'images' not in self.fields:
+            return data
         request = self.context.get('request')
         uploaded_images = [
             request.build_absolute_uri(img.image.url)
@@ -51,13 +66,47 @@ class ListingSerializer(serializers.ModelSerializer):
         data['images'] = [*data.get('images', []), *uploaded_images]
         return data
 
+    def get_rating(self, obj):
+        return round(obj.review_avg, 1)
+
     def get_isWishlisted(self, obj):
+        # Views annotate this in the main query; fall back for bare instances.
+        if hasattr(obj, 'is_wishlisted'):
+            return obj.is_wishlisted
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return Wishlist.objects.filter(listing=obj, user=request.user).exists()
         return False
 
 
+class ListingCardSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """Compact browse-card shape served for ``?view=card``."""
+    image       = serializers.SerializerMethodField()
+    rating      = serializers.SerializerMethodField()
+    reviewCount = serializers.IntegerField(source='review_count', read_only=True)
+
+    class Meta:
+        model  = Listing
+        fields = ['id', 'title', 'price', 'campus', 'status', 'image', 'rating', 'reviewCount']
+
+    def get_rating(self, obj):
+        return round(obj.review_avg, 1)
+
+    def get_image(self, obj):
+        # Same precedence as ListingSerializer.images: stored URLs, then uploads.
+        if obj.image_urls:
+            return obj.image_urls[0]
+        if hasattr(obj, 'first_image'):
+            path = obj.first_image
+        else:
+            upload = obj.images.exclude(image='').order_by('id').first()
+            path = upload.image.name if upload else None
+        request = self.context.get('request')
+        if not (request and path):
+            return None
+        return request.build_absolute_uri(ListingImage._meta.get_field('image').storage.url(path))
+
+
 class ReviewSerializer(serializers.ModelSerializer):
     reviewer_name = serializers.CharField(
         source='reviewer.profile.full_name', read_only=True
@@ -75,9 +124,9 @@ class ReportSerializer(serializers.ModelSerializer):
 
 
 class OrderSerializer(serializers.ModelSerializer):
-    listingId = serializers.IntegerField(source='listing.id',    read_only=True)
-    buyerId   = serializers.IntegerField(source='buyer.id',      read_only=True)
-    sellerId  = serializers.IntegerField(source='seller.id',     read_only=True)
+    listingId = serializers.IntegerField(source='listing_id',    read_only=True)
+    buyerId   = serializers.IntegerField(source='buyer_id',      read_only=True)
+    sellerId  = serializers.IntegerField(source='seller_id',     read_only=True)
     item      = serializers.CharField(source='listing.title',    read_only=True)
     status    = serializers.SerializerMethodField()
     date      = serializers.DateTimeField(source='created_at', read_only=True)
@@ -0,0 +1,109 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from . import reputation
+from .cache import invalidate_campuses
+from .models import Listing, ListingImage, Order, PendingSimilarityUpdate, Review
+from .similarity import queue_refresh
+from .suggestions import title_index
+
+# Sent by bulk imports, which skip post_save; ``listings`` carry their pks.
+listings_bulk_created = Signal()
+# Sent by checkout, which bulk-creates orders; ``orders`` have listings attached.
+orders_bulk_created = Signal()
+
+
+@receiver(post_save, sender=Listing)
+def update_title_suggestions(sender, instance, **kwargs):
+    # Soft deletes arrive here too: update() drops rows with is_active=False.
+    transaction.on_commit(lambda: title_index.update(instance))
+
+
+@receiver(post_delete, sender=Listing)
+def remove_title_suggestion(sender, instance, **kwargs):
+    listing_id = instance.pk
+    transaction.on_commit(lambda: title_index.remove(listing_id))
+
+
+@receiver(post_save, sender=Listing)
+@receiver(post_delete, sender=Listing)
+def invalidate_listing_browse_cache(sender, instance, **kwargs):
+    invalidate_campuses(instance.campus, getattr(instance, '_loaded_campus', None))
+
+
+@receiver(post_save, sender=ListingImage)
+@receiver(post_delete, sender=ListingImage)
+@receiver(post_save, sender=Order)
+def invalidate_related_browse_cache(sender, instance, **kwargs):
+    try:
+        campus = instance.listing.campus
+    except Listing.DoesNotExist:
+        campus = None
+    invalidate_campuses(campus)
+
+
+@receiver(post_save, sender=ListingImage)
+@receiver(post_delete, sender=ListingImage)
+def touch_listing_for_image(sender, instance, **kwargs):
+    # Uploaded images are part of the listing payload, so they move its ETag.
+    Listing.objects.filter(pk=instance.listing_id).update(updated_at=timezone.now())
+
+
+SIMILARITY_FIELDS = {'title', 'description', 'category', 'is_active'}
+
+
+@receiver(post_save, sender=Listing)
+def queue_similarity_refresh(sender, instance, update_fields=None, **kwargs):
+    # Stock/status-only saves (orders, status toggles) can't change content.
+    if update_fields is not None and not SIMILARITY_FIELDS.intersection(update_fields):
+        return
+    queue_refresh(instance.pk)
+
+
+@receiver(listings_bulk_created)
+def handle_bulk_created_listings(sender, listings, **kwargs):
+    invalidate_campuses(*{listing.campus for listing in listings})
+    PendingSimilarityUpdate.objects.bulk_create(
+        [PendingSimilarityUpdate(listing_id=listing.pk) for listing in listings],
+        ignore_conflicts=True,
+    )
+    # Cheaper to reload the suggestion index once than to patch it per row.
+    transaction.on_commit(title_index.reset)
+
+
+@receiver(post_save, sender=Review)
+def count_review(sender, instance, created, **kwargs):
+    # Reviews are never edited in place; reconcile_seller_stats covers admin edits.
+    if created:
+        reputation.add_rating(instance.listing, instance.rating)
+
+
+@receiver(post_delete, sender=Review)
+def uncount_review(sender, instance, **kwargs):
+    try:
+        listing = instance.listing
+    except Listing.DoesNotExist:
+        return
+    reputation.remove_rating(listing, instance.rating)
+
+
+@receiver(post_save, sender=Order)
+def count_sale_for_seller(sender, instance, created, **kwargs):
+    if created:
+        reputation.add_sales(instance.seller_id)
+
+
+@receiver(orders_bulk_created)
+def handle_bulk_created_orders(sender, orders, **kwargs):
+    invalidate_campuses(*{order.listing.campus for order in orders})
+    for seller_id, count in Counter(order.seller_id for order in orders).items():
+        reputation.add_sales(seller_id, count)
+
+
+@receiver(post_delete, sender=Order)
+def uncount_sale_for_seller(sender, instance, **kwargs):
+    reputation.remove_sale(instance.seller_id)
@@ -0,0 +1,280 @@
+"""
+Content-similarity index behind ``/api/listings/<id>/related/``.
+
+Listings are compared only within their category. Each category is turned into
+a TF-IDF matrix (sublinear tf, smoothed idf, L2-normalised rows) over title
+and description tokens, and the cosine top-K per listing is stored as
+``ListingNeighbor`` rows. Dot products are computed a chunk of rows at a time,
+with the chunk sized so the dense score block fits the caller's memory budget.
+
+NumPy and SciPy are only needed by the builders, which run from the
+``build_related_listings`` management command; the web process just reads
+``ListingNeighbor`` rows.
+"""
+import re
+from array import array
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core.workers import PeriodicWorker
+
+from .models import Listing, ListingNeighbor, PendingSimilarityUpdate
+
+TOKEN = re.compile(r'[a-z0-9]{2,}')
+STOP_WORDS = frozenset(
+    'and are but for from has have its not the this that with was were will you your '
+    'our all any can get one new used good very just only also'.split()
+)
+TITLE_WEIGHT = 2
+DEFAULT_TOP_K = 8
+MIN_SCORE = 0.05
+MAX_DOCUMENT_FREQUENCY = 0.5
+# Below this size dropping common terms saves nothing and loses signal.
+MIN_DOCUMENTS_FOR_PRUNING = 1000
+# Candidates considered when a changed listing is offered to other lists.
+REVERSE_CANDIDATE_FACTOR = 4
+# Dense float32 block plus the sparse product it is built from.
+BYTES_PER_SCORE = 16
+
+
+def require_numeric_stack():
+    try:
+        import numpy
+        from scipy import sparse
+    except ImportError as exc:  # pragma: no cover - depends on the environment
+        raise RuntimeError('NumPy and SciPy are required to build the related-listings index.') from exc
+    return numpy, sparse
+
+
+def tokenize(title, description):
+    counts = defaultdict(int)
+    for weight, text in ((TITLE_WEIGHT, title), (1, description)):
+        for token in TOKEN.findall((text or '').lower()):
+            if token not in STOP_WORDS:
+                counts[token] += weight
+    return counts
+
+
+def candidate_rows(category):
+    return (
+        Listing.objects.filter(is_active=True, category=category)
+        .order_by('id')
+        .values_list('id', 'title', 'description')
+        .iterator(chunk_size=2000)
+    )
+
+
+def vectorize(rows):
+    """Return ``(ids, matrix)``: listing ids and their normalised TF-IDF rows."""
+    np, sparse = require_numeric_stack()
+    ids = array('q')
+    indptr = array('q', [0])
+    indices = array('i')
+    counts = array('f')
+    vocabulary = {}
+    for listing_id, title, description in rows:
+        ids.append(listing_id)
+        for term, count in tokenize(title, description).items():
+            indices.append(vocabulary.setdefault(term, len(vocabulary)))
+            counts.append(count)
+        indptr.append(len(indices))
+
+    listing_ids = np.frombuffer(ids, dtype=np.int64) if ids else np.zeros(0, dtype=np.int64)
+    total = len(listing_ids)
+    if total == 0 or not vocabulary:
+        return listing_ids, sparse.csr_matrix((total, 0), dtype=np.float32)
+
+    matrix = sparse.csr_matrix(
+        (
+            np.frombuffer(counts, dtype=np.float32),
+            np.frombuffer(indices, dtype=np.int32),
+            np.frombuffer(indptr, dtype=np.int64),
+        ),
+        shape=(total, len(vocabulary)),
+    )
+    # Terms seen once can't link two listings; near-ubiquitous ones just add
+    # density to every dot product.
+    document_frequency = np.bincount(matrix.indices, minlength=matrix.shape[1])
+    keep = document_frequency >= 2
+    if total >= MIN_DOCUMENTS_FOR_PRUNING:
+        keep &= document_frequency <= MAX_DOCUMENT_FREQUENCY * total
+    matrix = matrix[:, np.flatnonzero(keep)].tocsr()
+    document_frequency = document_frequency[keep]
+
+    matrix.data = 1 + np.log(matrix.data)
+    idf = (np.log((1 + total) / (1 + document_frequency)) + 1).astype(np.float32)
+    matrix = sparse.csr_matrix(matrix.multiply(idf[np.newaxis, :]), dtype=np.float32)
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return listing_ids, sparse.diags(1 / norms).dot(matrix).tocsr().astype(np.float32)
+
+
+def top_matches(matrix, rows, k, memory_bytes):
+    """
+    Yield ``(row, columns, scores)`` with each row's best ``k`` matches.
+
+    Matches exclude the row itself and anything under ``MIN_SCORE``; scores
+    are sorted descending.
+    """
+    np, _ = require_numeric_stack()
+    total = matrix.shape[0]
+    k = min(k, total - 1)
+    if k <= 0 or matrix.shape[1] == 0:
+        return
+    transposed = matrix.T.tocsr()
+    chunk_size = max(1, memory_bytes // (total * BYTES_PER_SCORE))
+    rows = np.asarray(rows, dtype=np.int64)
+
+    for start in range(0, len(rows), chunk_size):
+        block_rows = rows[start:start + chunk_size]
+        scores = (matrix[block_rows] @ transposed).toarray()
+        scores[np.arange(len(block_rows)), block_rows] = 0
+        best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        best_scores = np.take_along_axis(scores, best, axis=1)
+        order = np.argsort(-best_scores, axis=1)
+        best = np.take_along_axis(best, order, axis=1)
+        best_scores = np.take_along_axis(best_scores, order, axis=1)
+        for offset, row in enumerate(block_rows):
+            keep = best_scores[offset] >= MIN_SCORE
+            yield int(row), best[offset][keep], best_scores[offset][keep]
+
+
+def rebuild_category(category, top_k=DEFAULT_TOP_K, memory_bytes=256 * 1024 * 1024, batch_size=5000):
+    """Recompute every neighbour list in ``category``; returns rows written."""
+    listing_ids, matrix = vectorize(candidate_rows(category))
+    written = 0
+    with transaction.atomic():
+        ListingNeighbor.objects.filter(listing__category=category).delete()
+        batch = []
+        for row, columns, scores in top_matches(matrix, range(len(listing_ids)), top_k, memory_bytes):
+            batch.extend(
+                ListingNeighbor(listing_id=listing_ids[row], related_id=listing_ids[column], score=float(score))
+                for column, score in zip(columns, scores)
+            )
+            if len(batch) >= batch_size:
+                ListingNeighbor.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        ListingNeighbor.objects.bulk_create(batch)
+        written += len(batch)
+    return written
+
+
+def rebuild_all(top_k=DEFAULT_TOP_K, memory_bytes=256 * 1024 * 1024, stdout=None):
+    started_at = timezone.now()
+    categories = (
+        Listing.objects.filter(is_active=True)
+        .order_by('category')
+        .values_list('category', flat=True)
+        .distinct()
+    )
+    written = 0
+    for category in categories:
+        rows = rebuild_category(category, top_k=top_k, memory_bytes=memory_bytes)
+        written += rows
+        if stdout is not None:
+            stdout.write(f'  {category}: {rows} neighbour rows')
+    ListingNeighbor.objects.filter(Q(listing__is_active=False) | Q(related__is_active=False)).delete()
+    PendingSimilarityUpdate.objects.filter(queued_at__lte=started_at).delete()
+    return written
+
+
+def merge_neighbors(current, proposals, top_k):
+    """Merge ``{related: score}`` proposals into a list; return (insert, delete) ids."""
+    merged = dict(current)
+    merged.update(proposals)
+    kept = set(sorted(merged, key=lambda related: merged[related], reverse=True)[:top_k])
+    inserts = {related: merged[related] for related in proposals if related in kept and related not in current}
+    deletes = [related for related in current if related not in kept]
+    return inserts, deletes
+
+
+def refresh_pending(batch_size=500, top_k=DEFAULT_TOP_K, memory_bytes=256 * 1024 * 1024):
+    """
+    Apply queued listing changes to the index; returns listings processed.
+
+    Every edge touching a changed listing is dropped. Active listings then
+    get a fresh top-K, and are offered to their best matches' lists, which
+    keep only their own top-K.
+    """
+    pending = list(
+        PendingSimilarityUpdate.objects.order_by('queued_at').values_list('listing_id', 'queued_at')[:batch_size]
+    )
+    if not pending:
+        return 0
+
+    changed_ids = {listing_id for listing_id, _ in pending}
+    by_category = defaultdict(set)
+    for listing_id, category in Listing.objects.filter(pk__in=changed_ids, is_active=True).values_list('id', 'category'):
+        by_category[category].add(listing_id)
+
+    with transaction.atomic():
+        ListingNeighbor.objects.filter(Q(listing_id__in=changed_ids) | Q(related_id__in=changed_ids)).delete()
+        for category, category_changed in by_category.items():
+            refresh_category(category, category_changed, changed_ids, top_k, memory_bytes)
+
+        processed = Q()
+        for listing_id, queued_at in pending:
+            processed |= Q(listing_id=listing_id, queued_at=queued_at)
+        PendingSimilarityUpdate.objects.filter(processed).delete()
+    return len(pending)
+
+
+class Refresher(PeriodicWorker):
+    """Empties the queue of changed listings every ``interval`` seconds (see ``core.workers``)."""
+    name = 'related-listings-refresher'
+
+    def __init__(self, interval=5.0, batch_size=500, top_k=DEFAULT_TOP_K, memory_bytes=256 * 1024 * 1024, **kwargs):
+        super().__init__(interval, **kwargs)
+        self.options = {'batch_size': batch_size, 'top_k': top_k, 'memory_bytes': memory_bytes}
+
+    def run_once(self):
+        total = 0
+        while processed := refresh_pending(**self.options):
+            total += processed
+        return total
+
+
+def refresh_category(category, category_changed, changed_ids, top_k, memory_bytes):
+    listing_ids, matrix = vectorize(candidate_rows(category))
+    position = {int(listing_id): index for index, listing_id in enumerate(listing_ids)}
+    rows = [position[listing_id] for listing_id in category_changed if listing_id in position]
+
+    forward = []
+    proposals = defaultdict(dict)
+    for row, columns, scores in top_matches(matrix, rows, top_k * REVERSE_CANDIDATE_FACTOR, memory_bytes):
+        listing_id = int(listing_ids[row])
+        for rank, (column, score) in enumerate(zip(columns, scores)):
+            related_id = int(listing_ids[column])
+            if rank < top_k:
+                forward.append(ListingNeighbor(listing_id=listing_id, related_id=related_id, score=float(score)))
+            if related_id not in changed_ids:
+                proposals[related_id][listing_id] = float(score)
+
+    current = defaultdict(dict)
+    for listing_id, related_id, score in ListingNeighbor.objects.filter(
+        listing_id__in=proposals
+    ).values_list('listing_id', 'related_id', 'score'):
+        current[listing_id][related_id] = score
+
+    inserts = []
+    stale = Q()
+    for listing_id, offered in proposals.items():
+        added, dropped = merge_neighbors(current[listing_id], offered, top_k)
+        inserts.extend(
+            ListingNeighbor(listing_id=listing_id, related_id=related_id, score=score)
+            for related_id, score in added.items()
+        )
+        if dropped:
+            stale |= Q(listing_id=listing_id, related_id__in=dropped)
+
+    if stale:
+        ListingNeighbor.objects.filter(stale).delete()
+    ListingNeighbor.objects.bulk_create([*forward, *inserts])
+
+
+def queue_refresh(listing_id):
+    PendingSimilarityUpdate.objects.update_or_create(listing_id=listing_id)
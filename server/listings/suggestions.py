@@ -0,0 +1,248 @@
+import heapq
+import math
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import connections
+
+from .models import Listing
+
+# Mirrors pg_trgm.word_similarity_threshold so both backends agree.
+WORD_SIMILARITY_THRESHOLD = 0.6
+NON_WORD = re.compile(r'[^0-9a-z]+')
+
+
+def normalize(text):
+    return NON_WORD.sub(' ', (text or '').lower()).split()
+
+
+def trigrams(text):
+    """Trigram set using pg_trgm's rules: lowercased words padded '  w '."""
+    grams = set()
+    for word in normalize(text):
+        padded = f'  {word} '
+        grams.update(padded[index:index + 3] for index in range(len(padded) - 2))
+    return grams
+
+
+class TitleSnapshot:
+    """Trigram postings and sorted title words for a set of listings."""
+
+    def __init__(self):
+        self.entries = {}
+        self.postings = defaultdict(set)
+        self.words = []
+
+    @classmethod
+    def load(cls):
+        snapshot = cls()
+        rows = Listing.objects.filter(is_active=True).values_list('id', 'title', 'campus')
+        for listing_id, title, campus in rows.iterator(chunk_size=5000):
+            snapshot.add(listing_id, title, campus, presorted=False)
+        snapshot.words.sort()
+        return snapshot
+
+    def add(self, listing_id, title, campus, presorted=True):
+        grams = trigrams(title)
+        self.entries[listing_id] = (title, campus, grams)
+        for gram in grams:
+            self.postings[gram].add(listing_id)
+        for word in set(normalize(title)):
+            if presorted:
+                insort(self.words, (word, listing_id))
+            else:
+                self.words.append((word, listing_id))
+
+    def remove(self, listing_id):
+        entry = self.entries.pop(listing_id, None)
+        if entry is None:
+            return
+        title, _, grams = entry
+        for gram in grams:
+            self.postings[gram].discard(listing_id)
+        for word in set(normalize(title)):
+            position = bisect_left(self.words, (word, listing_id))
+            if position < len(self.words) and self.words[position] == (word, listing_id):
+                del self.words[position]
+
+    def apply(self, listing_id, title, campus, is_active):
+        self.remove(listing_id)
+        if is_active:
+            self.add(listing_id, title, campus)
+
+
+class TitleSuggestionIndex:
+    """
+    In-process trigram + word-prefix index over active listing titles.
+
+    Used when pg_trgm is unavailable. The index loads lazily on first use,
+    is patched in place by the listing signals, and reloads after
+    ``LISTING_SUGGEST_INDEX_MAX_AGE`` seconds so writes made by other worker
+    processes show up too.
+
+    A reload reads the table outside ``lock`` while other requests keep
+    answering from the old snapshot. Signal updates that arrive meanwhile
+    are replayed onto the new snapshot before it is swapped in.
+    """
+
+    def __init__(self, max_age=None):
+        self.max_age = max_age
+        self.lock = threading.RLock()
+        self.build_lock = threading.Lock()
+        self.generation = 0
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.snapshot = None
+            self.loaded_at = None
+            # Listing changes seen while a reload runs: {id: (title, campus, is_active)}.
+            self.changes = None
+            self.generation += 1
+
+    @property
+    def is_loaded(self):
+        return self.snapshot is not None
+
+    def get_max_age(self):
+        if self.max_age is not None:
+            return self.max_age
+        return settings.LISTING_SUGGEST_INDEX_MAX_AGE
+
+    def is_fresh(self):
+        with self.lock:
+            return self.is_loaded and time.monotonic() - self.loaded_at < self.get_max_age()
+
+    def ensure_loaded(self):
+        if self.is_fresh():
+            return
+        if self.is_loaded:
+            # Stale: one request reloads, the rest keep using the current snapshot.
+            if not self.build_lock.acquire(blocking=False):
+                return
+        else:
+            self.build_lock.acquire()
+        try:
+            if not self.is_fresh():
+                self.rebuild()
+        finally:
+            self.build_lock.release()
+
+    def rebuild(self):
+        while True:
+            with self.lock:
+                generation = self.generation
+                self.changes = {}
+            started = time.monotonic()
+            snapshot = TitleSnapshot.load()
+            with self.lock:
+                if generation != self.generation:
+                    continue  # reset() meanwhile (e.g. a bulk import); load again
+                for listing_id, change in self.changes.items():
+                    snapshot.apply(listing_id, *change)
+                self.snapshot, self.loaded_at, self.changes = snapshot, started, None
+                return
+
+    def record(self, listing_id, title=None, campus=None, is_active=False):
+        with self.lock:
+            if self.changes is not None:
+                self.changes[listing_id] = (title, campus, is_active)
+            if self.snapshot is not None:
+                self.snapshot.apply(listing_id, title, campus, is_active)
+
+    def update(self, listing):
+        """Apply a saved listing; a no-op until the index is first loaded."""
+        self.record(listing.pk, listing.title, listing.campus, listing.is_active)
+
+    def remove(self, listing_id):
+        self.record(listing_id)
+
+    @staticmethod
+    def _prefix_matches(snapshot, prefix):
+        words = snapshot.words
+        position = bisect_left(words, (prefix,))
+        while position < len(words) and words[position][0].startswith(prefix):
+            yield words[position][1]
+            position += 1
+
+    @staticmethod
+    def _fuzzy_candidates(snapshot, query_grams):
+        # Prefix filtering: a title reaching the threshold must share at least
+        # one trigram with the rarest (n - required + 1) query trigrams, so
+        # only those posting lists need scanning.
+        required = max(1, math.ceil(WORD_SIMILARITY_THRESHOLD * len(query_grams)))
+        rarest = sorted(query_grams, key=lambda gram: len(snapshot.postings.get(gram, ())))
+        candidates = set()
+        for gram in rarest[:len(query_grams) - required + 1]:
+            candidates.update(snapshot.postings.get(gram, ()))
+        return candidates
+
+    def suggest(self, term, campus=None, limit=8):
+        self.ensure_loaded()
+        query_words = normalize(term)
+        if not query_words:
+            return []
+        query_grams = trigrams(term)
+
+        with self.lock:
+            snapshot = self.snapshot
+            if snapshot is None:  # reset() since ensure_loaded()
+                return []
+            prefix_ids = set(self._prefix_matches(snapshot, query_words[-1]))
+            scored = []
+            for listing_id in self._fuzzy_candidates(snapshot, query_grams) | prefix_ids:
+                title, listing_campus, grams = snapshot.entries[listing_id]
+                if campus and listing_campus != campus:
+                    continue
+                # Share of the query's trigrams found in the title, the
+                # in-process analogue of pg_trgm's word_similarity().
+                similarity = len(query_grams & grams) / len(query_grams)
+                is_prefix = listing_id in prefix_ids
+                if not is_prefix and similarity < WORD_SIMILARITY_THRESHOLD:
+                    continue
+                scored.append((is_prefix, similarity, listing_id, title))
+
+        best = heapq.nlargest(limit, scored)
+        return [
+            {'id': listing_id, 'title': title, 'score': round(similarity, 3)}
+            for _, similarity, listing_id, title in best
+        ]
+
+
+title_index = TitleSuggestionIndex()
+_trigram_support = {}
+
+
+def has_trigram_support(using='default'):
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return False
+    if using not in _trigram_support:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            _trigram_support[using] = cursor.fetchone() is not None
+    return _trigram_support[using]
+
+
+def suggest_titles(term, campus=None, limit=8):
+    """Top ``limit`` active listing titles similar to ``term``, best first."""
+    term = (term or '').strip()
+    if not term:
+        return []
+    if not has_trigram_support():
+        return title_index.suggest(term, campus=campus, limit=limit)
+
+    queryset = Listing.objects.filter(is_active=True, title__trigram_word_similar=term)
+    if campus:
+        queryset = queryset.filter(campus=campus)
+    rows = (
+        queryset.annotate(score=TrigramWordSimilarity(term, 'title'))
+        .order_by('-score', '-id')
+        .values('id', 'title', 'score')[:limit]
+    )
+    return [{**row, 'score': round(row['score'], 3)} for row in rows]
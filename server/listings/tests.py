@@ -1,8 +1,52 @@
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from importlib.util import find_spec
+from io import StringIO
+from unittest import mock, skipUnless
+
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from rest_framework import status
-from rest_framework.test import APITestCase
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from api.models import Notification, Profile
+from api.outbox import drain
+from listings.benchmarking import seed_listings
+from listings.checkout import OrderError, place_order
+from listings.reservations import Sweeper, create_hold, sweep_expired
+
+from listings import cache as listing_cache
+from listings.models import (
+    Listing, ListingImage, ListingNeighbor, Order, PendingSimilarityUpdate, Reservation, Review, Wishlist,
+)
+from listings.serializers import ListingSerializer
+from listings.similarity import rebuild_all, refresh_pending
+from listings.suggestions import TitleSnapshot, TitleSuggestionIndex, title_index
+from listings.views import ListingListCreateView
+
 
-from listings.models import Listing, Order
+def create_listing(seller, title, **fields):
+    """A saved listing with neutral defaults; tests pass only the fields they depend on."""
+    return Listing.objects.create(**{
+        "seller": seller,
+        "title": title,
+        "description": "For sale",
+        "price": "20.00",
+        "category": "Books",
+        "campus": "Main Campus",
+        "condition": "Good",
+        "type": "SECOND_HAND",
+        **fields,
+    })
 
 
 class ListingMutationTests(APITestCase):
@@ -155,3 +199,1402 @@ class ListingMutationTests(APITestCase):
         self.listing.refresh_from_db()
         self.assertEqual(self.listing.quantity, 10)
         self.assertEqual(self.listing.status, "AVAILABLE")
+
+
+class ListingCursorPaginationTests(APITestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user(
+            username="pager@campus.edu",
+            email="pager@campus.edu",
+            password="pass12345",
+        )
+        self.listings = [
+            Listing.objects.create(
+                seller=self.seller,
+                title=f"Textbook {index}",
+                description="Course textbook",
+                price="10.00",
+                category="Books",
+                campus="Main Campus",
+                condition="Good",
+                type="SECOND_HAND",
+            )
+            for index in range(5)
+        ]
+        # Force a timestamp tie so ordering has to fall back to the id.
+        tied_at = self.listings[0].created_at
+        Listing.objects.filter(pk__in=[item.pk for item in self.listings[:3]]).update(created_at=tied_at)
+
+    def expected_ids(self):
+        return list(Listing.objects.order_by("-created_at", "-id").values_list("id", flat=True))
+
+    def test_listings_are_unpaginated_without_cursor_params(self):
+        response = self.client.get("/api/listings/")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsInstance(response.data, list)
+        self.assertEqual(len(response.data), 5)
+
+    def test_cursor_walks_every_listing_once_in_stable_order(self):
+        seen = []
+        url = "/api/listings/?page_size=2"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data["items"]), 2)
+            seen.extend(item["id"] for item in response.data["items"])
+            url = response.data["next"]
+
+        self.assertEqual(seen, self.expected_ids())
+
+    def test_prev_cursor_returns_previous_page(self):
+        first_page = self.client.get("/api/listings/?page_size=2")
+        second_page = self.client.get(first_page.data["next"])
+        back_page = self.client.get(second_page.data["prev"])
+
+        self.assertIsNone(first_page.data["prev"])
+        self.assertEqual(
+            [item["id"] for item in back_page.data["items"]],
+            [item["id"] for item in first_page.data["items"]],
+        )
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get("/api/listings/?cursor=not-a-cursor")
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_my_listings_support_cursor_mode(self):
+        self.client.force_authenticate(user=self.seller)
+
+        response = self.client.get("/api/listings/mine/?page_size=3")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item["id"] for item in response.data["items"]], self.expected_ids()[:3])
+        self.assertIsNotNone(response.data["next"])
+
+
+class ListingQueryBudgetTests(APITestCase):
+    def setUp(self):
+        self.viewer = User.objects.create_user(
+            username="viewer@campus.edu",
+            email="viewer@campus.edu",
+            password="pass12345",
+        )
+
+    def create_listings(self, count):
+        for index in range(count):
+            seller = User.objects.create_user(
+                username=f"budget-seller-{Listing.objects.count()}@campus.edu",
+                email=f"budget-seller-{Listing.objects.count()}@campus.edu",
+                password="pass12345",
+            )
+            listing = Listing.objects.create(
+                seller=seller,
+                title=f"Calculator {index}",
+                description="Graphing calculator",
+                price="40.00",
+                category="Electronics",
+                campus="Main Campus",
+                condition="Good",
+                type="SECOND_HAND",
+            )
+            ListingImage.objects.create(listing=listing, image="listing_images/calculator.png")
+            Wishlist.objects.create(user=self.viewer, listing=listing)
+
+    def count_list_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(context.captured_queries), response
+
+    def test_listing_page_query_count_does_not_grow_with_rows(self):
+        self.client.force_authenticate(user=self.viewer)
+        self.create_listings(2)
+        small_count, _ = self.count_list_queries("/api/listings/")
+
+        self.create_listings(8)
+        large_count, response = self.count_list_queries("/api/listings/")
+
+        self.assertEqual(len(response.data), 10)
+        self.assertEqual(small_count, large_count)
+        self.assertTrue(all(item["isWishlisted"] for item in response.data))
+        self.assertTrue(all(len(item["images"]) == 1 for item in response.data))
+
+    def test_cursor_page_query_count_does_not_grow_with_page_size(self):
+        self.create_listings(10)
+        small_count, _ = self.count_list_queries("/api/listings/?page_size=2")
+        large_count, response = self.count_list_queries("/api/listings/?page_size=10")
+
+        self.assertEqual(len(response.data["items"]), 10)
+        self.assertEqual(small_count, large_count)
+        self.assertFalse(any(item["isWishlisted"] for item in response.data["items"]))
+
+
+class ListingSearchTests(APITestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user(
+            username="searcher@campus.edu",
+            email="searcher@campus.edu",
+            password="pass12345",
+        )
+        self.title_match = create_listing(
+            self.seller, "Organic Chemistry Textbook", description="Barely used, no highlights",
+        )
+        self.description_match = create_listing(
+            self.seller, "Lab Bundle", description="Goggles plus a chemistry textbook", category="Supplies",
+        )
+        self.category_match = create_listing(self.seller, "Study Lamp", description="Bright LED", category="Chemistry")
+        self.unrelated = create_listing(self.seller, "Desk Chair", description="Ergonomic chair", category="Furniture")
+
+    def test_search_matches_title_description_and_category(self):
+        response = self.client.get("/api/listings/", {"search": "chemistry"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            {item["id"] for item in response.data},
+            {self.title_match.id, self.description_match.id, self.category_match.id},
+        )
+
+    @skipUnless(connection.vendor == "postgresql", "ranking needs the Postgres search vector")
+    def test_search_ranks_title_matches_first(self):
+        response = self.client.get("/api/listings/", {"search": "chemistry textbook"})
+
+        ids = [item["id"] for item in response.data]
+        self.assertEqual(ids[0], self.title_match.id)
+        self.assertIn(self.description_match.id, ids)
+
+    @skipUnless(connection.vendor == "postgresql", "ranking needs the Postgres search vector")
+    def test_cursor_pages_keep_the_ranked_order(self):
+        # Newer but weaker matches, so created_at order would differ from rank order.
+        for index in range(3):
+            create_listing(
+                self.seller, f"Mug {index}", description="Came with a chemistry textbook", category="Kitchen",
+            )
+        ranked = [item["id"] for item in self.client.get("/api/listings/", {"search": "chemistry textbook"}).data]
+
+        paged = []
+        response = self.client.get("/api/listings/", {"search": "chemistry textbook", "page_size": 2})
+        while True:
+            paged += [item["id"] for item in response.data["items"]]
+            if not response.data["next"]:
+                break
+            response = self.client.get(response.data["next"])
+
+        self.assertEqual(paged, ranked)
+        self.assertEqual(paged[0], self.title_match.id)
+
+    @skipUnless(connection.vendor == "postgresql", "search vector is maintained by a Postgres trigger")
+    def test_search_vector_follows_title_edits(self):
+        self.unrelated.title = "Chemistry Goggles"
+        self.unrelated.save()
+
+        response = self.client.get("/api/listings/", {"search": "goggles"})
+
+        self.assertIn(self.unrelated.id, [item["id"] for item in response.data])
+
+
+class ListingSuggestTests(APITestCase):
+    def setUp(self):
+        title_index.reset()
+        self.seller = User.objects.create_user(
+            username="suggest@campus.edu",
+            email="suggest@campus.edu",
+            password="pass12345",
+        )
+        self.calculus = create_listing(self.seller, "Calculus Early Transcendentals")
+        self.headphones = create_listing(self.seller, "Sony Headphones", campus="North Campus")
+
+    def tearDown(self):
+        title_index.reset()
+
+    def suggested_ids(self, query, **headers):
+        response = self.client.get("/api/listings/suggest/", {"q": query}, **headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item["id"] for item in response.data["items"]]
+
+    def test_suggest_tolerates_typos_and_prefixes(self):
+        self.assertEqual(self.suggested_ids("calculas"), [self.calculus.id])
+        self.assertEqual(self.suggested_ids("headph"), [self.headphones.id])
+        self.assertEqual(self.suggested_ids("zzzz"), [])
+
+    def test_suggest_honours_campus_header(self):
+        self.assertEqual(self.suggested_ids("sony", HTTP_X_CAMPUS="Main Campus"), [])
+        self.assertEqual(self.suggested_ids("sony", HTTP_X_CAMPUS="North Campus"), [self.headphones.id])
+
+    def test_suggest_index_follows_creates_edits_and_soft_deletes(self):
+        self.suggested_ids("calculus")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            lamp = create_listing(self.seller, "Desk Lamp")
+        self.assertEqual(self.suggested_ids("lamp"), [lamp.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            lamp.title = "Reading Light"
+            lamp.save()
+        self.assertEqual(self.suggested_ids("lamp"), [])
+        self.assertEqual(self.suggested_ids("reading"), [lamp.id])
+
+        self.client.force_authenticate(user=self.seller)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f"/api/listings/{lamp.id}/")
+        self.assertEqual(self.suggested_ids("reading"), [])
+
+    def test_stale_index_answers_while_another_request_reloads_it(self):
+        index = TitleSuggestionIndex(max_age=0)
+        index.ensure_loaded()
+
+        with index.build_lock, CaptureQueriesContext(connection) as context:
+            results = index.suggest("calculus")
+
+        self.assertEqual([item["id"] for item in results], [self.calculus.id])
+        self.assertEqual(len(context.captured_queries), 0)
+
+    def test_reload_replays_changes_made_while_it_reads_the_table(self):
+        index = TitleSuggestionIndex(max_age=3600)
+        index.ensure_loaded()
+        index.loaded_at -= 3600
+        load = TitleSnapshot.load
+
+        def load_then_edit():
+            snapshot = load()
+            self.calculus.title = "Linear Algebra Done Right"
+            index.update(self.calculus)
+            return snapshot
+
+        with mock.patch.object(TitleSnapshot, "load", side_effect=load_then_edit):
+            index.ensure_loaded()
+
+        self.assertEqual([item["id"] for item in index.suggest("algebra")], [self.calculus.id])
+        self.assertEqual(index.suggest("calculus"), [])
+
+    def test_index_ranks_prefix_matches_before_fuzzy_ones(self):
+        calculator = create_listing(self.seller, "Calculator TI-84")
+        index = TitleSuggestionIndex(max_age=3600)
+
+        results = index.suggest("calcula")
+
+        self.assertEqual([item["id"] for item in results], [calculator.id, self.calculus.id])
+
+
+@skipUnless(connection.vendor == "postgresql", "EXPLAIN plans are asserted against Postgres")
+class ListingQueryPlanTests(APITestCase):
+    """Hot browse shapes from ListingListCreateView must not seq-scan listings."""
+
+    PAGE_SIZE = 24
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_listings(20000, batch_size=5000)
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE listings_listing")
+
+    def explain_browse(self, params=None, campus=None):
+        headers = {"HTTP_X_CAMPUS": campus} if campus else {}
+        request = Request(APIRequestFactory().get("/api/listings/", params or {}, **headers))
+        view = ListingListCreateView()
+        view.setup(request)
+        view.request = request
+        queryset = view.get_queryset().order_by("-created_at", "-id")[: self.PAGE_SIZE + 1]
+        return queryset.explain()
+
+    def assert_uses_listing_index(self, plan):
+        self.assertNotIn("Seq Scan on listings_listing", plan, plan)
+        self.assertRegex(plan, r"(Index|Index Only|Bitmap Index) Scan (Backward )?(using|on) listing_active_", plan)
+
+    def test_all_campus_browse_uses_index(self):
+        self.assert_uses_listing_index(self.explain_browse())
+
+    def test_campus_browse_uses_index(self):
+        self.assert_uses_listing_index(self.explain_browse(campus="North Campus"))
+
+    def test_category_browse_uses_index(self):
+        self.assert_uses_listing_index(self.explain_browse({"category": "Books"}))
+
+    def test_campus_category_browse_uses_index(self):
+        plan = self.explain_browse({"category": "Kitchen", "condition": "Good"}, campus="City Campus")
+        self.assert_uses_listing_index(plan)
+
+    def test_campus_price_range_uses_index(self):
+        plan = self.explain_browse({"min_price": "10", "max_price": "12", "type": "NEW"}, campus="Main Campus")
+        self.assert_uses_listing_index(plan)
+
+    def test_category_price_range_uses_index(self):
+        plan = self.explain_browse({"category": "Sports", "min_price": "480", "max_price": "500"})
+        self.assert_uses_listing_index(plan)
+
+
+class ListingBrowseCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.seller = User.objects.create_user(
+            username="cache-seller@campus.edu",
+            email="cache-seller@campus.edu",
+            password="pass12345",
+        )
+        self.main = create_listing(self.seller, "Kettle", category="Kitchen")
+        self.north = create_listing(self.seller, "Toaster", category="Kitchen", campus="North Campus")
+
+    def tearDown(self):
+        cache.clear()
+
+    def browse(self, params=None, campus=None):
+        headers = {"HTTP_X_CAMPUS": campus} if campus else {}
+        response = self.client.get("/api/listings/", params or {}, **headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def test_repeat_anonymous_browse_is_served_from_cache(self):
+        self.browse({"category": "Kitchen", "search": ""}, campus="Main Campus")
+        with CaptureQueriesContext(connection) as context:
+            response = self.browse({"category": "Kitchen"}, campus="Main Campus")
+
+        # The ETag comes from the cache generation too, so nothing reaches the database.
+        self.assertEqual(len(context.captured_queries), 0)
+        self.assertEqual([item["id"] for item in response.data], [self.main.id])
+        self.assertEqual(listing_cache.get_cache_stats(), {"hits": 1, "misses": 1})
+
+    @override_settings(ALLOWED_HOSTS=["testserver", "mirror.campus.edu"])
+    def test_pages_are_cached_per_host_and_scheme(self):
+        self.browse()
+        self.client.get("/api/listings/", HTTP_HOST="mirror.campus.edu")
+        self.client.get("/api/listings/", secure=True)
+        self.browse()
+
+        self.assertEqual(listing_cache.get_cache_stats(), {"hits": 1, "misses": 3})
+
+    def test_listing_save_invalidates_only_its_campus(self):
+        self.browse(campus="Main Campus")
+        self.browse(campus="North Campus")
+        main_generation = listing_cache.get_generation("Main Campus")
+        north_generation = listing_cache.get_generation("North Campus")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.main.title = "Electric Kettle"
+            self.main.save()
+
+        self.assertGreater(listing_cache.get_generation("Main Campus"), main_generation)
+        self.assertEqual(listing_cache.get_generation("North Campus"), north_generation)
+        self.assertEqual(self.browse(campus="Main Campus").data[0]["title"], "Electric Kettle")
+
+    def test_moving_listing_invalidates_previous_campus(self):
+        self.browse(campus="Main Campus")
+        listing = Listing.objects.get(pk=self.main.pk)
+        listing.campus = "North Campus"
+        listing.save()
+
+        self.assertEqual(self.browse(campus="Main Campus").data, [])
+
+    def test_order_invalidates_all_campus_browse(self):
+        buyer = User.objects.create_user(
+            username="cache-buyer@campus.edu",
+            email="cache-buyer@campus.edu",
+            password="pass12345",
+        )
+        self.browse()
+        Order.objects.create(listing=self.north, buyer=buyer, seller=self.seller, amount="15.00")
+
+        self.browse()
+
+        self.assertEqual(listing_cache.get_cache_stats(), {"hits": 0, "misses": 2})
+
+    def test_authenticated_browse_bypasses_cache(self):
+        self.client.force_authenticate(user=self.seller)
+        self.browse()
+        self.browse()
+
+        self.assertEqual(listing_cache.get_cache_stats(), {"hits": 0, "misses": 0})
+
+
+class ListingConditionalGetTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.seller = User.objects.create_user(
+            username="etag-seller@campus.edu",
+            email="etag-seller@campus.edu",
+            password="pass12345",
+        )
+        self.viewer = User.objects.create_user(
+            username="etag-viewer@campus.edu",
+            email="etag-viewer@campus.edu",
+            password="pass12345",
+        )
+        self.listing = Listing.objects.create(
+            seller=self.seller,
+            title="Bike Lock",
+            description="U-lock with two keys",
+            price="12.00",
+            category="Sports",
+            campus="Main Campus",
+            condition="Good",
+            type="SECOND_HAND",
+            quantity=3,
+        )
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_list_answers_matching_etag_without_serializing(self):
+        first = self.client.get("/api/listings/")
+        self.assertIn("ETag", first)
+
+        with mock.patch("listings.views.ListingSerializer.to_representation") as to_representation, \
+                CaptureQueriesContext(connection) as context:
+            second = self.client.get("/api/listings/", HTTP_IF_NONE_MATCH=first["ETag"])
+
+        self.assertEqual(second.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(second["ETag"], first["ETag"])
+        to_representation.assert_not_called()
+        # Anonymous validators come from the cache generation, not a COUNT/MAX.
+        self.assertEqual(len(context.captured_queries), 0)
+
+    def test_list_answers_matching_etag_after_the_cached_page_expires(self):
+        first = self.client.get("/api/listings/", HTTP_X_CAMPUS="Main Campus")
+        request = Request(APIRequestFactory().get("/api/listings/", HTTP_X_CAMPUS="Main Campus"))
+        cache.delete(listing_cache.browse_cache_key(request))
+
+        with mock.patch("listings.views.ListingSerializer.to_representation") as to_representation, \
+                CaptureQueriesContext(connection) as context:
+            second = self.client.get(
+                "/api/listings/", HTTP_X_CAMPUS="Main Campus", HTTP_IF_NONE_MATCH=first["ETag"],
+            )
+
+        self.assertEqual(second.status_code, status.HTTP_304_NOT_MODIFIED)
+        to_representation.assert_not_called()
+        self.assertEqual(len(context.captured_queries), 0)
+
+    def test_authenticated_list_etag_comes_from_the_listing_aggregate(self):
+        self.client.force_authenticate(user=self.viewer)
+        first = self.client.get("/api/listings/")
+        self.assertIn("Last-Modified", first)
+
+        second = self.client.get("/api/listings/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(second.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.client.post(f"/api/listings/{self.listing.id}/order/")
+        third = self.client.get("/api/listings/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(third.status_code, status.HTTP_200_OK)
+
+    def test_list_etag_changes_when_a_listing_is_ordered(self):
+        first = self.client.get("/api/listings/")
+        self.client.force_authenticate(user=self.viewer)
+        self.client.post(f"/api/listings/{self.listing.id}/order/")
+        self.client.force_authenticate(user=None)
+
+        second = self.client.get("/api/listings/", HTTP_IF_NONE_MATCH=first["ETag"])
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.data[0]["quantity"], 2)
+        self.assertNotEqual(second["ETag"], first["ETag"])
+
+    def test_list_etag_changes_when_a_listing_is_soft_deleted(self):
+        first = self.client.get("/api/listings/")
+        self.client.force_authenticate(user=self.seller)
+        self.client.delete(f"/api/listings/{self.listing.id}/")
+        self.client.force_authenticate(user=None)
+
+        second = self.client.get("/api/listings/", HTTP_IF_NONE_MATCH=first["ETag"])
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.data, [])
+
+    def test_detail_supports_etag_and_if_modified_since(self):
+        url = f"/api/listings/{self.listing.id}/"
+        first = self.client.get(url)
+
+        by_etag = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        by_date = self.client.get(url, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+
+        self.assertEqual(by_etag.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(by_date.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_etags_change_when_the_seller_sells_another_listing(self):
+        other = Listing.objects.create(
+            seller=self.seller, title="Helmet", description="Barely used", price="20.00", category="Sports",
+            campus="North Campus", condition="Good", type="SECOND_HAND",
+        )
+        url = f"/api/listings/{self.listing.id}/"
+        anonymous_page = self.client.get("/api/listings/", HTTP_X_CAMPUS="Main Campus")
+        self.client.force_authenticate(user=self.viewer)
+        detail = self.client.get(url)
+        listing_page = self.client.get("/api/listings/", HTTP_X_CAMPUS="Main Campus")
+
+        self.client.post(f"/api/listings/{other.id}/order/")
+
+        detail_after = self.client.get(url, HTTP_IF_NONE_MATCH=detail["ETag"])
+        self.assertEqual(detail_after.status_code, status.HTTP_200_OK)
+        self.assertEqual(detail_after.data["seller"]["transactions"], detail.data["seller"]["transactions"] + 1)
+        list_after = self.client.get(
+            "/api/listings/", HTTP_X_CAMPUS="Main Campus", HTTP_IF_NONE_MATCH=listing_page["ETag"],
+        )
+        self.assertEqual(list_after.status_code, status.HTTP_200_OK)
+
+        self.client.force_authenticate(user=None)
+        anonymous_after = self.client.get(
+            "/api/listings/", HTTP_X_CAMPUS="Main Campus", HTTP_IF_NONE_MATCH=anonymous_page["ETag"],
+        )
+        self.assertEqual(anonymous_after.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            anonymous_after.data[0]["seller"]["transactions"], anonymous_page.data[0]["seller"]["transactions"] + 1,
+        )
+
+    def test_detail_etag_tracks_viewer_wishlist(self):
+        url = f"/api/listings/{self.listing.id}/"
+        self.client.force_authenticate(user=self.viewer)
+        first = self.client.get(url)
+
+        self.client.post(f"/api/listings/{self.listing.id}/wishlist/")
+        second = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertTrue(second.data["isWishlisted"])
+
+
+class ListingFacetsTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.seller = User.objects.create_user(
+            username="facet-seller@campus.edu",
+            email="facet-seller@campus.edu",
+            password="pass12345",
+        )
+        create_listing(self.seller, "Algebra", category="Books", price="8.00")
+        create_listing(self.seller, "Biology", category="Books", condition="New", type="NEW", price="30.00")
+        create_listing(self.seller, "Laptop", category="Electronics", price="400.00")
+        create_listing(self.seller, "Phone", category="Electronics", price="120.00", campus="North Campus")
+
+    def tearDown(self):
+        cache.clear()
+
+    def facets(self, params=None, campus=None):
+        headers = {"HTTP_X_CAMPUS": campus} if campus else {}
+        response = self.client.get("/api/listings/facets/", params or {}, **headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def as_dict(self, items):
+        return {item["value"]: item["count"] for item in items}
+
+    def test_facets_count_each_dimension_in_one_query(self):
+        with CaptureQueriesContext(connection) as context:
+            data = self.facets()
+
+        self.assertEqual(len(context.captured_queries), 1)
+        self.assertEqual(data["total"], 4)
+        self.assertEqual(self.as_dict(data["categories"]), {"Books": 2, "Electronics": 2})
+        self.assertEqual(self.as_dict(data["conditions"]), {"Good": 3, "New": 1})
+        self.assertEqual(self.as_dict(data["types"]), {"SECOND_HAND": 3, "NEW": 1})
+        self.assertEqual([bucket["count"] for bucket in data["priceBuckets"]], [1, 0, 1, 0, 1, 1])
+
+    def test_facets_honour_campus_and_keep_own_selection_open(self):
+        data = self.facets({"category": "Books"}, campus="Main Campus")
+
+        self.assertEqual(data["total"], 2)
+        self.assertEqual(self.as_dict(data["categories"]), {"Books": 2, "Electronics": 1})
+        self.assertEqual(self.as_dict(data["conditions"]), {"Good": 1, "New": 1})
+
+    def test_facets_are_cached_until_a_listing_changes(self):
+        self.facets(campus="North Campus")
+        with CaptureQueriesContext(connection) as context:
+            self.facets(campus="North Campus")
+        self.assertEqual(len(context.captured_queries), 0)
+
+        create_listing(
+            self.seller, "Tablet", category="Electronics", condition="New", type="NEW", price="90.00",
+            campus="North Campus",
+        )
+
+        self.assertEqual(self.facets(campus="North Campus")["total"], 2)
+
+    def test_facets_apply_search(self):
+        data = self.facets({"search": "laptop"})
+
+        self.assertEqual(data["total"], 1)
+        self.assertEqual(self.as_dict(data["categories"]), {"Electronics": 1})
+
+
+class RelatedListingsTests(APITestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user(
+            username="related@campus.edu",
+            email="related@campus.edu",
+            password="pass12345",
+        )
+        self.organic, self.organic_notes, self.calculus, self.statistics = (
+            create_listing(self.seller, title, description=description)
+            for title, description in (
+                ("Organic Chemistry Textbook", "Clayden organic chemistry, 2nd edition"),
+                ("Organic Chemistry Notes", "Lecture notes for organic chemistry"),
+                ("Calculus Textbook", "Stewart calculus with solutions"),
+                ("Statistics Workbook", "Intro statistics exercises"),
+            )
+        )
+        self.chair = create_listing(
+            self.seller, "Desk Chair", description="Organic chemistry lab stool", category="Furniture",
+        )
+
+    def related_ids(self, listing):
+        response = self.client.get(f"/api/listings/{listing.id}/related/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item["id"] for item in response.data["items"]]
+
+    def test_related_falls_back_to_same_category_without_index(self):
+        ids = self.related_ids(self.organic)
+
+        self.assertEqual(len(ids), 3)
+        self.assertNotIn(self.organic.id, ids)
+        self.assertNotIn(self.chair.id, ids)
+
+    def test_listing_edits_queue_similarity_refresh_but_orders_do_not(self):
+        PendingSimilarityUpdate.objects.all().delete()
+        self.calculus.quantity = 0
+        self.calculus.save(update_fields=["quantity", "updated_at"])
+        self.assertFalse(PendingSimilarityUpdate.objects.exists())
+
+        self.calculus.title = "Calculus Early Transcendentals"
+        self.calculus.save()
+        self.assertTrue(PendingSimilarityUpdate.objects.filter(listing=self.calculus).exists())
+
+    @skipUnless(find_spec("numpy") and find_spec("scipy"), "similarity index needs NumPy and SciPy")
+    def test_full_build_ranks_most_similar_listing_first(self):
+        rebuild_all()
+
+        self.assertEqual(self.related_ids(self.organic)[0], self.organic_notes.id)
+        self.assertFalse(PendingSimilarityUpdate.objects.exists())
+        self.assertFalse(ListingNeighbor.objects.filter(listing=self.organic, related=self.chair).exists())
+
+    @skipUnless(find_spec("numpy") and find_spec("scipy"), "similarity index needs NumPy and SciPy")
+    def test_incremental_refresh_tracks_new_and_deleted_listings(self):
+        rebuild_all()
+        lab_manual = create_listing(
+            self.seller, "Organic Chemistry Lab Manual", description="Organic chemistry experiments",
+        )
+
+        refresh_pending()
+
+        self.assertIn(self.organic.id, self.related_ids(lab_manual)[:2])
+        self.assertTrue(ListingNeighbor.objects.filter(listing=self.organic, related=lab_manual).exists())
+
+        lab_manual.is_active = False
+        lab_manual.save()
+        output = StringIO()
+        call_command("build_related_listings", "--incremental", stdout=output)
+        self.assertEqual(output.getvalue().strip(), "Refreshed 1 listings.")
+
+        self.assertFalse(ListingNeighbor.objects.filter(related=lab_manual).exists())
+        self.assertFalse(PendingSimilarityUpdate.objects.exists())
+
+
+class ListingSparseFieldsetTests(APITestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user(
+            username="cards@campus.edu",
+            email="cards@campus.edu",
+            password="pass12345",
+        )
+        self.linked = create_listing(self.seller, "Desk Lamp", image_urls=["https://i.ibb.co/lamp/main.jpg"])
+        self.uploaded = create_listing(self.seller, "Kettle")
+        ListingImage.objects.create(listing=self.uploaded, image="listing_images/kettle.png")
+
+    def list_with_sql(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, " ".join(query["sql"] for query in context.captured_queries)
+
+    def test_card_view_returns_compact_shape_with_first_image(self):
+        response, sql = self.list_with_sql("/api/listings/?view=card")
+
+        cards = {item["id"]: item for item in response.data}
+        self.assertEqual(
+            set(cards[self.linked.id]),
+            {"id", "title", "price", "campus", "status", "image", "rating", "reviewCount"},
+        )
+        self.assertEqual(cards[self.linked.id]["image"], "https://i.ibb.co/lamp/main.jpg")
+        self.assertTrue(cards[self.uploaded.id]["image"].endswith("/listing_images/kettle.png"))
+        self.assertNotIn('"description"', sql)
+        self.assertNotIn("auth_user", sql)
+
+    def test_fields_param_narrows_output_and_columns(self):
+        response, sql = self.list_with_sql("/api/listings/?fields=id,title,sellerId&page_size=1")
+
+        self.assertEqual(set(response.data["items"][0]), {"id", "title", "sellerId"})
+        self.assertEqual(response.data["items"][0]["sellerId"], self.seller.id)
+        self.assertNotIn('"description"', sql)
+        self.assertNotIn("listings_listingimage", sql)
+
+    def test_fields_param_applies_to_card_view(self):
+        response = self.client.get("/api/listings/?view=card&fields=id,image")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(all(set(item) == {"id", "image"} for item in response.data))
+
+    def test_unknown_fields_or_view_are_rejected(self):
+        bad_field = self.client.get("/api/listings/?fields=id,secret")
+        bad_view = self.client.get("/api/listings/?view=poster")
+        card_only_field = self.client.get("/api/listings/?fields=image")
+
+        self.assertEqual(bad_field.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("secret", bad_field.data["fields"])
+        self.assertEqual(bad_view.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(card_only_field.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_full_shape_is_unchanged_without_params(self):
+        response = self.client.get("/api/listings/")
+
+        self.assertEqual(set(response.data[0]), set(ListingSerializer.Meta.fields))
+
+    def test_my_listings_supports_card_view(self):
+        self.client.force_authenticate(user=self.seller)
+        response = self.client.get("/api/listings/mine/?view=card")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item["title"] for item in response.data], ["Kettle", "Desk Lamp"])
+        self.assertNotIn("description", response.data[0])
+
+
+class BulkListingImportTests(APITestCase):
+    CSV = (
+        "title,description,price,category,campus,condition,type,quantity,images\n"
+        "Desk Lamp,LED lamp,12.50,Home,,Good,SECOND_HAND,2,https://i.ibb.co/a/lamp.jpg|https://i.ibb.co/b/lamp.jpg\n"
+        "Broken Row,,not-a-price,Home,,Good,SECOND_HAND,1,\n"
+        "Calculator,Graphing,40.00,Electronics,North Campus,Good,NEW,0,\n"
+    )
+
+    def setUp(self):
+        self.store = User.objects.create_user(
+            username="bookstore@campus.edu",
+            email="bookstore@campus.edu",
+            password="pass12345",
+        )
+        self.client.force_authenticate(user=self.store)
+
+    def post_csv(self, body, url="/api/listings/bulk/"):
+        return self.client.generic("POST", url, body, content_type="text/csv", HTTP_X_CAMPUS="Main Campus")
+
+    def test_csv_body_imports_valid_rows_and_reports_bad_ones(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.post_csv(self.CSV)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual((response.data["created"], response.data["failed"]), (2, 1))
+        self.assertEqual(response.data["errors"][0]["row"], 2)
+        self.assertEqual(set(response.data["errors"][0]["errors"]), {"description", "price"})
+
+        lamp = Listing.objects.get(title="Desk Lamp")
+        calculator = Listing.objects.get(title="Calculator")
+        self.assertEqual(lamp.seller, self.store)
+        self.assertEqual(lamp.campus, "Main Campus")
+        self.assertEqual(lamp.image_urls, ["https://i.ibb.co/a/lamp.jpg", "https://i.ibb.co/b/lamp.jpg"])
+        self.assertEqual((calculator.campus, calculator.status), ("North Campus", "SOLD"))
+        self.assertEqual(PendingSimilarityUpdate.objects.filter(listing__in=[lamp, calculator]).count(), 2)
+
+    def test_ndjson_file_upload_reports_unparseable_lines(self):
+        lines = "\n".join(
+            '{"title": "Notebook %d", "description": "A5", "price": "3.00", "category": "Stationery",'
+            ' "condition": "New", "type": "NEW"}' % index
+            for index in range(5)
+        )
+        upload = SimpleUploadedFile("items.ndjson", (lines + "\nnot json\n").encode(), "application/x-ndjson")
+
+        response = self.client.post("/api/listings/bulk/", {"file": upload}, format="multipart")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["created"], 5)
+        self.assertEqual(response.data["errors"], [{"row": 6, "errors": {"error": "Invalid JSON."}}])
+        self.assertEqual(Listing.objects.filter(seller=self.store, title__startswith="Notebook").count(), 5)
+
+    def test_import_invalidates_cached_browse_pages(self):
+        self.client.force_authenticate(user=None)
+        self.assertEqual(self.client.get("/api/listings/").data, [])
+        self.client.force_authenticate(user=self.store)
+
+        self.post_csv(self.CSV)
+        self.client.force_authenticate(user=None)
+
+        self.assertEqual(len(self.client.get("/api/listings/").data), 2)
+
+    def test_dry_run_validates_without_writing(self):
+        response = self.post_csv(self.CSV, url="/api/listings/bulk/?dryRun=1")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data["valid"], response.data["created"], response.data["failed"]), (2, 0, 1))
+        self.assertFalse(Listing.objects.exists())
+
+    def test_rejects_unknown_format_and_anonymous_callers(self):
+        response = self.client.post("/api/listings/bulk/", {"items": []}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+
+        self.client.force_authenticate(user=None)
+        self.assertEqual(self.post_csv(self.CSV).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_management_command_imports_file(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as handle:
+            handle.write(self.CSV)
+        self.addCleanup(os.remove, handle.name)
+        output = StringIO()
+
+        call_command("import_listings", handle.name, seller=self.store.username, campus="East", stdout=output, stderr=StringIO())
+
+        self.assertIn("Imported 2 listings", output.getvalue())
+        self.assertEqual(Listing.objects.get(title="Desk Lamp").campus, "East")
+
+
+class SellerReputationTests(APITestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user(
+            username="reputable@campus.edu",
+            email="reputable@campus.edu",
+            password="pass12345",
+        )
+        self.buyer = User.objects.create_user(
+            username="reviewer@campus.edu",
+            email="reviewer@campus.edu",
+            password="pass12345",
+        )
+        self.listing = Listing.objects.create(
+            seller=self.seller,
+            title="Desk Lamp",
+            description="LED",
+            price="12.00",
+            category="Home",
+            campus="Main Campus",
+            condition="Good",
+            type="SECOND_HAND",
+            quantity=5,
+        )
+
+    def stats(self):
+        profile = Profile.objects.get(user=self.seller)
+        return profile.rating_avg, profile.rating_count, profile.completed_sales
+
+    def test_reviews_and_orders_update_seller_stats(self):
+        self.client.force_authenticate(user=self.buyer)
+        self.client.post(f"/api/listings/{self.listing.id}/review/", {"rating": 5, "content": "Great"})
+        self.client.post(f"/api/listings/{self.listing.id}/review/", {"rating": 2, "content": "Meh"})
+        self.client.post(f"/api/listings/{self.listing.id}/order/")
+
+        self.assertEqual(self.stats(), (3.5, 2, 1))
+        seller = self.client.get(f"/api/listings/{self.listing.id}/").data["seller"]
+        self.assertEqual((seller["rating"], seller["transactions"]), (3.5, 1))
+
+    def test_deleting_reviews_and_orders_reverses_stats(self):
+        first = Review.objects.create(listing=self.listing, reviewer=self.buyer, content="A", rating=4)
+        second = Review.objects.create(listing=self.listing, reviewer=self.buyer, content="B", rating=1)
+        order = Order.objects.create(listing=self.listing, buyer=self.buyer, seller=self.seller, amount="12.00")
+
+        second.delete()
+        order.delete()
+        self.assertEqual(self.stats(), (4.0, 1, 0))
+
+        first.delete()
+        self.assertEqual(self.stats(), (0.0, 0, 0))
+
+    def test_stale_profile_save_keeps_counters(self):
+        stale_user = User.objects.select_related("profile").get(pk=self.seller.pk)
+        Review.objects.create(listing=self.listing, reviewer=self.buyer, content="A", rating=5)
+
+        stale_user.profile.full_name = "Renamed"
+        stale_user.save()
+
+        self.assertEqual(self.stats(), (5.0, 1, 0))
+        self.assertEqual(Profile.objects.get(user=self.seller).full_name, "Renamed")
+
+    def test_reconcile_command_repairs_drift(self):
+        Review.objects.create(listing=self.listing, reviewer=self.buyer, content="A", rating=3)
+        Order.objects.create(listing=self.listing, buyer=self.buyer, seller=self.seller, amount="12.00")
+        Profile.objects.filter(user=self.seller).update(rating_avg=0, rating_count=9, completed_sales=7)
+        Profile.objects.filter(user=self.buyer).update(completed_sales=3)
+
+        call_command("reconcile_seller_stats", batch_size=1, stdout=StringIO())
+
+        self.assertEqual(self.stats(), (3.0, 1, 1))
+        self.assertEqual(Profile.objects.get(user=self.buyer).completed_sales, 0)
+
+
+class ListingReviewsTests(APITestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user(
+            username="reviewed@campus.edu",
+            email="reviewed@campus.edu",
+            password="pass12345",
+        )
+        self.listing = Listing.objects.create(
+            seller=self.seller,
+            title="Desk Lamp",
+            description="LED",
+            price="12.00",
+            category="Home",
+            campus="Main Campus",
+            condition="Good",
+            type="SECOND_HAND",
+        )
+
+    def add_reviews(self, count):
+        for index in range(count):
+            reviewer = User.objects.create_user(
+                username=f"reviewer-{Review.objects.count()}@campus.edu",
+                email=f"reviewer-{Review.objects.count()}@campus.edu",
+                password="pass12345",
+            )
+            Review.objects.create(listing=self.listing, reviewer=reviewer, content=f"Review {index}", rating=index % 5 + 1)
+
+    def test_reviews_are_paginated_newest_first_with_aggregates(self):
+        self.add_reviews(3)
+
+        first = self.client.get(f"/api/listings/{self.listing.id}/reviews/?page_size=2")
+        second = self.client.get(first.data["next"])
+
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual([item["content"] for item in first.data["items"]], ["Review 2", "Review 1"])
+        self.assertEqual([item["content"] for item in second.data["items"]], ["Review 0"])
+        self.assertIsNone(second.data["next"])
+        self.assertEqual((first.data["rating"], first.data["reviewCount"]), (2.0, 3))
+
+    def test_reviews_page_query_count_does_not_grow_with_rows(self):
+        self.add_reviews(2)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(f"/api/listings/{self.listing.id}/reviews/")
+        self.add_reviews(8)
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get(f"/api/listings/{self.listing.id}/reviews/")
+
+        self.assertEqual(len(response.data["items"]), 10)
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+    def test_review_insert_updates_listing_rating_and_etag(self):
+        before = self.client.get(f"/api/listings/{self.listing.id}/")
+        self.add_reviews(2)
+        after = self.client.get(f"/api/listings/{self.listing.id}/", HTTP_IF_NONE_MATCH=before["ETag"])
+
+        self.assertEqual(after.status_code, status.HTTP_200_OK)
+        self.assertEqual((after.data["rating"], after.data["reviewCount"]), (1.5, 2))
+
+    def test_card_ratings_come_from_listing_columns(self):
+        self.add_reviews(1)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get("/api/listings/?view=card")
+
+        self.assertEqual((response.data[0]["rating"], response.data[0]["reviewCount"]), (1.0, 1))
+        self.assertNotIn("listings_review", " ".join(query["sql"] for query in context.captured_queries))
+
+    def test_reviews_of_missing_listing_return_404(self):
+        response = self.client.get("/api/listings/999/reviews/")
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class CheckoutTests(APITestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user(
+            username="store@campus.edu",
+            email="store@campus.edu",
+            password="pass12345",
+        )
+        self.buyer = User.objects.create_user(
+            username="student@campus.edu",
+            email="student@campus.edu",
+            password="pass12345",
+        )
+        self.textbook = create_listing(self.seller, "Calculus Textbook", quantity=3)
+        self.lamp = create_listing(self.seller, "Desk Lamp", quantity=1, campus="North Campus")
+        self.client.force_authenticate(user=self.buyer)
+
+    def checkout(self, *items):
+        return self.client.post(
+            "/api/orders/checkout/",
+            {"items": [{"listingId": listing_id, "quantity": quantity} for listing_id, quantity in items]},
+            format="json",
+        )
+
+    def test_checkout_orders_every_line_in_one_request(self):
+        response = self.checkout((self.textbook.id, 2), (self.lamp.id, 1))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        textbook, lamp = response.data["items"]
+        self.assertEqual((textbook["quantity"], textbook["status"], len(textbook["orderIds"])), (1, "AVAILABLE", 2))
+        self.assertEqual((lamp["quantity"], lamp["status"]), (0, "SOLD"))
+        self.lamp.refresh_from_db()
+        self.assertEqual((self.lamp.quantity, self.lamp.status), (0, "SOLD"))
+        self.assertEqual(Order.objects.filter(buyer=self.buyer).count(), 3)
+        drain()
+        self.assertEqual(Notification.objects.filter(recipient=self.seller).count(), 2)
+        self.assertIn('2 units of "Calculus Textbook"', Notification.objects.get(body__contains="Calculus").body)
+        self.assertEqual(Profile.objects.get(user=self.seller).completed_sales, 3)
+
+    def test_failed_lines_are_reported_without_blocking_others(self):
+        own = create_listing(self.buyer, "My Own Chair", quantity=1)
+
+        response = self.checkout((self.textbook.id, 5), (own.id, 1), (999, 1), (self.lamp.id, 1))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = {item["listingId"]: item for item in response.data["items"]}
+        self.assertEqual(results[self.textbook.id]["error"], "Only 3 left in stock.")
+        self.assertEqual(results[own.id]["error"], "You cannot place an order on your own listing.")
+        self.assertEqual(results[999]["error"], "This listing is not available for ordering.")
+        self.assertTrue(results[self.lamp.id]["success"])
+        self.textbook.refresh_from_db()
+        self.assertEqual(self.textbook.quantity, 3)
+
+    def test_duplicate_lines_are_merged(self):
+        response = self.checkout((self.textbook.id, 1), (self.textbook.id, 2))
+
+        self.assertEqual(len(response.data["items"]), 1)
+        self.assertEqual(response.data["items"][0]["quantity"], 0)
+
+    def test_checkout_orders_out_of_the_buyers_hold_on_the_last_unit(self):
+        other = User.objects.create_user(
+            username="other-student@campus.edu",
+            email="other-student@campus.edu",
+            password="pass12345",
+        )
+        create_hold(self.buyer, self.lamp.id)
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.checkout((self.lamp.id, 1)).status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.client.force_authenticate(user=self.buyer)
+        response = self.checkout((self.lamp.id, 1), (self.textbook.id, 1))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        lamp, textbook = response.data["items"]
+        self.assertEqual((lamp["success"], lamp["quantity"], lamp["status"]), (True, 0, "SOLD"))
+        self.assertEqual(textbook["quantity"], 2)
+        self.assertEqual(Reservation.objects.get().status, "CONVERTED")
+        self.assertEqual(Order.objects.filter(buyer=self.buyer, listing=self.lamp).count(), 1)
+
+    def test_cart_with_no_orderable_lines_is_rejected(self):
+        response = self.checkout((self.lamp.id, 2))
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(response.data["success"])
+        self.assertFalse(Order.objects.exists())
+
+    def test_malformed_carts_are_rejected(self):
+        for payload in ({}, {"items": []}, {"items": [{"listingId": "x"}]}, {"items": [{"listingId": 1, "quantity": 0}]}):
+            response = self.client.post("/api/orders/checkout/", payload, format="json")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, payload)
+
+    def test_checkout_query_count_does_not_grow_with_cart(self):
+        small = [create_listing(self.seller, f"Small {index}", quantity=2) for index in range(2)]
+        large = [create_listing(self.seller, f"Large {index}", quantity=2) for index in range(8)]
+
+        with CaptureQueriesContext(connection) as small_context:
+            self.checkout(*[(listing.id, 2) for listing in small])
+        with CaptureQueriesContext(connection) as large_context:
+            self.checkout(*[(listing.id, 2) for listing in large])
+
+        self.assertEqual(len(small_context.captured_queries), len(large_context.captured_queries))
+
+    @skipUnless(connection.vendor == "postgresql", "row locks need Postgres")
+    def test_listings_are_locked_in_primary_key_order(self):
+        with CaptureQueriesContext(connection) as context:
+            self.checkout((self.lamp.id, 1), (self.textbook.id, 1))
+
+        locking = [
+            query["sql"] for query in context.captured_queries
+            if "FOR UPDATE" in query["sql"] and 'FROM "listings_listing"' in query["sql"]
+        ]
+        self.assertEqual(len(locking), 1)
+        self.assertIn('ORDER BY "listings_listing"."id" ASC', locking[0])
+
+
+class OrderStrategyTests(APITestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user(
+            username="maker@campus.edu",
+            email="maker@campus.edu",
+            password="pass12345",
+        )
+        self.buyer = User.objects.create_user(
+            username="fan@campus.edu",
+            email="fan@campus.edu",
+            password="pass12345",
+        )
+        self.listing = Listing.objects.create(
+            seller=self.seller,
+            title="Desk Lamp",
+            description="Warm light",
+            price="15.50",
+            category="Furniture",
+            campus="Main Campus",
+            condition="Good",
+            type="SECOND_HAND",
+            quantity=2,
+        )
+
+    def order(self, user):
+        self.client.force_authenticate(user=user)
+        return self.client.post(f"/api/listings/{self.listing.id}/order/")
+
+    def test_strategies_give_the_same_answers(self):
+        for strategy in ("conditional", "locking"):
+            with self.subTest(strategy=strategy), override_settings(LISTING_ORDER_STRATEGY=strategy):
+                Listing.objects.filter(pk=self.listing.pk).update(quantity=2, status="AVAILABLE")
+                Order.objects.all().delete()
+                Notification.objects.all().delete()
+
+                first = self.order(self.buyer)
+                second = self.order(self.buyer)
+                sold_out = self.order(self.buyer)
+                own = self.order(self.seller)
+
+                self.assertEqual((first.data["quantity"], first.data["status"]), (1, "AVAILABLE"))
+                self.assertEqual((second.data["quantity"], second.data["status"]), (0, "SOLD"))
+                self.assertEqual(sold_out.data["error"], "This listing is not available for ordering.")
+                self.assertEqual(own.data["error"], "You cannot place an order on your own listing.")
+                order = Order.objects.get(pk=first.data["order_id"])
+                self.assertEqual((order.seller_id, str(order.amount)), (self.seller.id, "15.50"))
+                drain()
+                notification = Notification.objects.get(recipient=self.seller)
+                self.assertEqual((notification.count, notification.display_title), (2, '2 new orders on "Desk Lamp"'))
+
+    def test_conditional_order_is_a_single_guarded_update(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.order(self.buyer)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        sql = [query["sql"] for query in context.captured_queries]
+        self.assertFalse(any("FOR UPDATE" in statement for statement in sql))
+        self.assertEqual(sum(statement.lstrip().startswith("UPDATE") and "listings_listing" in statement for statement in sql), 1)
+
+    def test_unknown_listing_is_not_found(self):
+        self.client.force_authenticate(user=self.buyer)
+
+        response = self.client.post("/api/listings/999999/order/")
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+@skipUnless(connection.vendor == "postgresql", "concurrent orders need Postgres row locking")
+class OrderContentionTests(TransactionTestCase):
+    BUYERS = 12
+    QUANTITY = 5
+
+    def setUp(self):
+        seller = User.objects.create_user(username="hot@campus.edu", email="hot@campus.edu")
+        self.buyers = [
+            User.objects.create_user(username=f"rush{index}@campus.edu", email=f"rush{index}@campus.edu")
+            for index in range(self.BUYERS)
+        ]
+        self.listing = Listing.objects.create(
+            seller=seller,
+            title="Concert Ticket",
+            description="Front row",
+            price="30.00",
+            category="Other",
+            campus="Main Campus",
+            condition="New",
+            type="NEW",
+            quantity=self.QUANTITY,
+        )
+
+    def race(self, strategy):
+        def attempt(buyer):
+            try:
+                place_order(buyer, self.listing.pk, strategy)
+                return True
+            except OrderError:
+                return False
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=self.BUYERS) as pool:
+            return sum(pool.map(attempt, self.buyers))
+
+    def test_concurrent_buyers_never_oversell(self):
+        for strategy in ("conditional", "locking"):
+            with self.subTest(strategy=strategy):
+                Order.objects.all().delete()
+                Listing.objects.filter(pk=self.listing.pk).update(quantity=self.QUANTITY, status="AVAILABLE")
+
+                accepted = self.race(strategy)
+
+                self.listing.refresh_from_db()
+                self.assertEqual(accepted, self.QUANTITY)
+                self.assertEqual(Order.objects.filter(listing=self.listing).count(), self.QUANTITY)
+                self.assertEqual((self.listing.quantity, self.listing.status), (0, "SOLD"))
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, **delta):
+        self.now += timedelta(**delta)
+
+
+class ReservationTests(APITestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user(
+            username="shop@campus.edu",
+            email="shop@campus.edu",
+            password="pass12345",
+        )
+        self.buyer = User.objects.create_user(
+            username="holder@campus.edu",
+            email="holder@campus.edu",
+            password="pass12345",
+        )
+        self.other = User.objects.create_user(
+            username="browser@campus.edu",
+            email="browser@campus.edu",
+            password="pass12345",
+        )
+        self.listing = Listing.objects.create(
+            seller=self.seller,
+            title="Mini Fridge",
+            description="Dorm sized",
+            price="60.00",
+            category="Kitchen",
+            campus="Main Campus",
+            condition="Good",
+            type="SECOND_HAND",
+            quantity=2,
+        )
+        self.clock = FakeClock(timezone.now())
+
+    def reserve(self, user, quantity=1):
+        self.client.force_authenticate(user=user)
+        return self.client.post(f"/api/listings/{self.listing.id}/reserve/", {"quantity": quantity}, format="json")
+
+    def order(self, user):
+        self.client.force_authenticate(user=user)
+        return self.client.post(f"/api/listings/{self.listing.id}/order/")
+
+    def test_holding_the_last_units_reserves_the_listing(self):
+        response = self.reserve(self.buyer, 2)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.listing.refresh_from_db()
+        self.assertEqual((self.listing.quantity, self.listing.status), (0, "RESERVED"))
+        self.assertEqual(self.order(self.other).data["error"], "This listing is not available for ordering.")
+        self.assertEqual(self.reserve(self.other).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_holder_orders_out_of_the_hold(self):
+        self.reserve(self.buyer, 2)
+
+        first = self.order(self.buyer)
+        second = self.order(self.buyer)
+
+        self.assertEqual((first.data["quantity"], first.data["status"]), (0, "RESERVED"))
+        self.assertEqual((second.data["quantity"], second.data["status"]), (0, "SOLD"))
+        self.assertEqual(Order.objects.filter(buyer=self.buyer).count(), 2)
+        self.assertEqual(Reservation.objects.get().status, "CONVERTED")
+
+    def test_holds_are_checked_like_orders(self):
+        self.assertEqual(self.reserve(self.buyer, 3).data["error"], "Only 2 left in stock.")
+        self.assertEqual(self.reserve(self.seller).data["error"], "You cannot place an order on your own listing.")
+        self.assertEqual(self.reserve(self.buyer, 0).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Reservation.objects.exists())
+
+    def test_cancelling_returns_units_to_stock(self):
+        self.reserve(self.buyer, 2)
+
+        response = self.client.delete(f"/api/listings/{self.listing.id}/reserve/")
+
+        self.assertEqual(response.data["released"], 1)
+        self.listing.refresh_from_db()
+        self.assertEqual((self.listing.quantity, self.listing.status), (2, "AVAILABLE"))
+
+    def test_sweeper_releases_only_expired_holds(self):
+        create_hold(self.buyer, self.listing.id, 2, now=self.clock())
+
+        self.clock.advance(minutes=14)
+        self.assertEqual(sweep_expired(now=self.clock()), 0)
+        self.clock.advance(minutes=2)
+        self.assertEqual(sweep_expired(now=self.clock()), 1)
+
+        self.listing.refresh_from_db()
+        self.assertEqual((self.listing.quantity, self.listing.status), (2, "AVAILABLE"))
+        self.assertEqual(Reservation.objects.get().status, "EXPIRED")
+        # An expired hold no longer counts as the holder's stock.
+        self.assertEqual(self.order(self.buyer).data["quantity"], 1)
+
+    def test_seller_edit_during_a_hold_keeps_the_listing_sellable_after_expiry(self):
+        create_hold(self.buyer, self.listing.id, 2, now=self.clock())
+        self.client.force_authenticate(user=self.seller)
+
+        response = self.client.patch(f"/api/listings/{self.listing.id}/", {"description": "Now with ice tray"}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.listing.refresh_from_db()
+        self.assertEqual((self.listing.quantity, self.listing.status), (0, "RESERVED"))
+
+        self.clock.advance(hours=1)
+        sweep_expired(now=self.clock())
+        self.listing.refresh_from_db()
+        self.assertEqual((self.listing.quantity, self.listing.status), (2, "AVAILABLE"))
+        self.assertEqual(self.order(self.other).status_code, status.HTTP_200_OK)
+
+    def test_order_taking_the_last_free_unit_is_undone_by_expiry(self):
+        create_hold(self.buyer, self.listing.id, 1, now=self.clock())
+        self.assertEqual(self.order(self.other).data["status"], "SOLD")
+
+        self.clock.advance(hours=1)
+        sweep_expired(now=self.clock())
+
+        self.listing.refresh_from_db()
+        self.assertEqual((self.listing.quantity, self.listing.status), (1, "AVAILABLE"))
+
+    def test_marking_sold_cancels_holds(self):
+        create_hold(self.buyer, self.listing.id, 1, now=self.clock())
+        self.client.force_authenticate(user=self.seller)
+
+        self.client.patch(f"/api/listings/{self.listing.id}/", {"status": "SOLD"}, format="json")
+        self.clock.advance(hours=1)
+        sweep_expired(now=self.clock())
+
+        self.listing.refresh_from_db()
+        self.assertEqual((self.listing.quantity, self.listing.status), (0, "SOLD"))
+        self.assertEqual(Reservation.objects.get().status, "RELEASED")
+
+    def test_sweeper_releases_each_batch_with_one_update_per_table(self):
+        self.listing.quantity = 6
+        self.listing.save(update_fields=["quantity"])
+        for _ in range(5):
+            create_hold(self.buyer, self.listing.id, 1, now=self.clock())
+        self.clock.advance(hours=1)
+
+        with CaptureQueriesContext(connection) as context:
+            released = sweep_expired(now=self.clock(), batch_size=2)
+
+        updates = [query["sql"] for query in context.captured_queries if query["sql"].startswith("UPDATE")]
+        self.assertEqual(released, 5)
+        self.assertEqual(len(updates), 6)  # three batches, one reservation + one listing UPDATE each
+        self.listing.refresh_from_db()
+        self.assertEqual(self.listing.quantity, 6)
+
+    @skipUnless(connection.vendor == "postgresql", "row locks need Postgres")
+    def test_sweeper_locks_listings_in_primary_key_order_before_restocking(self):
+        second = create_listing(self.seller, "Microwave", quantity=1)
+        create_hold(self.buyer, second.id, 1, now=self.clock())
+        create_hold(self.buyer, self.listing.id, 1, now=self.clock())
+        self.clock.advance(hours=1)
+
+        with CaptureQueriesContext(connection) as context:
+            sweep_expired(now=self.clock())
+
+        listing_queries = [
+            query["sql"] for query in context.captured_queries
+            if 'FROM "listings_listing"' in query["sql"] or query["sql"].startswith('UPDATE "listings_listing"')
+        ]
+        self.assertIn("FOR UPDATE", listing_queries[0])
+        self.assertIn('ORDER BY "listings_listing"."id" ASC', listing_queries[0])
+        self.assertTrue(listing_queries[1].startswith('UPDATE "listings_listing"'))
+
+    def test_sweeper_loop_uses_its_clock_and_interval(self):
+        create_hold(self.buyer, self.listing.id, 1, now=self.clock())
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            self.clock.advance(minutes=10)
+
+        sweeper = Sweeper(interval=30, clock=self.clock, sleep=sleep)
+        released = sweeper.run(iterations=3)
+
+        self.assertEqual(released, 1)
+        self.assertEqual(sleeps, [30, 30])
+        self.assertEqual(Reservation.objects.get().status, "EXPIRED")
@@ -4,13 +4,18 @@ from . import views
 urlpatterns = [
     path('upload-image/',            views.ListingImageUploadView.as_view(), name='listing-image-upload'),
     path('mine/',                    views.MyListingsView.as_view(),         name='listing-mine'),
+    path('bulk/',                    views.BulkListingImportView.as_view(),  name='listing-bulk-import'),
+    path('facets/',                  views.ListingFacetsView.as_view(),      name='listing-facets'),
+    path('suggest/',                 views.SuggestListingsView.as_view(),    name='listing-suggest'),
     path('',                        views.ListingListCreateView.as_view(),  name='listing-list-create'),
     path('<int:pk>/',               views.ListingDetailView.as_view(),      name='listing-detail'),
     path('<int:pk>/related/',       views.RelatedListingsView.as_view(),    name='listing-related'),
     path('<int:pk>/wishlist/',      views.ToggleWishlistView.as_view(),     name='listing-wishlist'),
     path('<int:pk>/report/',        views.ReportListingView.as_view(),      name='listing-report'),
+    path('<int:pk>/reviews/',       views.ListingReviewsView.as_view(),     name='listing-reviews'),
     path('<int:pk>/review/',        views.SubmitReviewView.as_view(),       name='listing-review'),
     path('<int:pk>/order/',         views.CreateOrderView.as_view(),        name='listing-order'),
+    path('<int:pk>/reserve/',       views.ReserveListingView.as_view(),     name='listing-reserve'),
     path('<int:pk>/offer/',         views.SubmitOfferView.as_view(),        name='listing-offer'),
     path('<int:pk>/status/',        views.UpdateListingStatusView.as_view(),name='listing-status'),
 ]
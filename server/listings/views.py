@@ -5,32 +5,67 @@ from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
 from django.conf import settings
 from django.shortcuts import get_object_or_404
-from django.db import transaction
+from django.utils.decorators import method_decorator
+from django.db.models import Exists, OuterRef, Subquery, Value
 import base64
 import requests
-from api.models import Notification
+from api.idempotency import idempotent
 from .models import (
-    Listing, Wishlist, Review,
+    Listing, ListingImage, Wishlist, Review,
     Report, Order, Offer
 )
 from .serializers import (
     ListingSerializer, ReviewSerializer,
     ReportSerializer, OrderSerializer, OfferSerializer,
 )
+from . import cache as listing_cache
+from .checkout import CartError, OrderError, checkout, parse_cart, place_order
+from .conditional import (
+    apply_validators, build_etag, latest, listing_set_version, not_modified, wishlist_marker,
+)
+from .facets import FACET_FIELDS, compute_facets
+from .fieldsets import columns_for, parse_fieldset
+from .importing import CSVRowsParser, NDJSONRowsParser, detect_format, import_listings, read_rows
+from .reservations import ReservationError, cancel_holds, create_hold, held_units, release_holds
+from .pagination import ListingCursorPagination, ReviewCursorPagination
+from .search import search_listings
+from .suggestions import suggest_titles
 
 IMGBB_API_KEY = getattr(settings, 'IMGBB_API_KEY', '')
-
-
-# ── GET /api/listings/   POST /api/listings/ ─────────────────────
-class ListingListCreateView(generics.ListCreateAPIView):
-    serializer_class = ListingSerializer
-
-    def get_permissions(self):
-        if self.request.method == 'GET':
-            return [permissions.AllowAny()]
-        return [permissions.IsAuthenticated()]
-
-    def get_queryset(self):
+FULL_FIELDS = frozenset(ListingSerializer.Meta.fields)
+
+
+def with_listing_relations(queryset, request, fields=None):
+    """
+    Batch everything ListingSerializer reads so a page costs O(1) queries.
+
+    With a sparse ``fields`` set only the columns, joins and prefetches those
+    fields need are fetched.
+    """
+    if fields is None:
+        fields = FULL_FIELDS
+    else:
+        queryset = queryset.only(*columns_for(fields))
+    if 'seller' in fields:
+        queryset = queryset.select_related('seller__profile')
+    if 'images' in fields:
+        queryset = queryset.prefetch_related('images')
+    if 'image' in fields:
+        first_upload = ListingImage.objects.filter(listing=OuterRef('pk')).exclude(image='').order_by('id')
+        queryset = queryset.annotate(first_image=Subquery(first_upload.values('image')[:1]))
+    if 'isWishlisted' not in fields:
+        return queryset
+    user = getattr(request, 'user', None)
+    if user and user.is_authenticated:
+        wishlisted = Wishlist.objects.filter(listing=OuterRef('pk'), user=user)
+        return queryset.annotate(is_wishlisted=Exists(wishlisted))
+    return queryset.annotate(is_wishlisted=Value(False))
+
+
+class ListingFilterMixin:
+    """Browse filters shared by the listing list and facet endpoints."""
+
+    def get_filtered_queryset(self, skip=()):
         include_inactive = self.request.query_params.get('includeInactive') in {'1', 'true', 'True'}
         seller_id = self.request.query_params.get('sellerId')
         is_admin = bool(
@@ -60,15 +95,84 @@ class ListingListCreateView(generics.ListCreateAPIView):
         condition = self.request.query_params.get('condition')
         type_     = self.request.query_params.get('type')
 
-        if category:  qs = qs.filter(category=category)
-        if search:    qs = qs.filter(title__icontains=search)
-        if min_price: qs = qs.filter(price__gte=min_price)
-        if max_price: qs = qs.filter(price__lte=max_price)
-        if condition: qs = qs.filter(condition=condition)
-        if type_:     qs = qs.filter(type=type_)
+        if category and 'category' not in skip:   qs = qs.filter(category=category)
+        if search:                                qs = search_listings(qs, search)
+        if min_price:                             qs = qs.filter(price__gte=min_price)
+        if max_price:                             qs = qs.filter(price__lte=max_price)
+        if condition and 'condition' not in skip: qs = qs.filter(condition=condition)
+        if type_ and 'type' not in skip:          qs = qs.filter(type=type_)
 
         return qs
 
+
+class ListingFieldsetMixin:
+    """``?view=card`` and ``?fields=a,b`` narrow list payloads and the SQL behind them."""
+
+    def get_fieldset(self):
+        if not hasattr(self, '_fieldset'):
+            self._fieldset = parse_fieldset(self.request)
+        return self._fieldset
+
+    def get_serializer(self, *args, **kwargs):
+        if self.request.method != 'GET':
+            return super().get_serializer(*args, **kwargs)
+        serializer_class, fields = self.get_fieldset()
+        kwargs.setdefault('context', self.get_serializer_context())
+        return serializer_class(*args, fields=fields, **kwargs)
+
+    def with_relations(self, queryset):
+        return with_listing_relations(queryset, self.request, self.get_fieldset()[1])
+
+
+# ── GET /api/listings/   POST /api/listings/ ─────────────────────
+class ListingListCreateView(ListingFilterMixin, ListingFieldsetMixin, generics.ListCreateAPIView):
+    serializer_class = ListingSerializer
+    pagination_class = ListingCursorPagination
+
+    def get_permissions(self):
+        if self.request.method == 'GET':
+            return [permissions.AllowAny()]
+        return [permissions.IsAuthenticated()]
+
+    def get_queryset(self):
+        return self.with_relations(self.get_filtered_queryset())
+
+    def list(self, request, *args, **kwargs):
+        # Reject a bad view/fields before any validator work.
+        self.get_fieldset()
+        if listing_cache.is_cacheable(request):
+            return self.cached_list(request, *args, **kwargs)
+
+        version = listing_set_version(self.get_filtered_queryset())
+        etag = build_etag(
+            'listings',
+            request.get_full_path(),
+            request.headers.get('X-Campus', ''),
+            version['total'],
+            version['listings_modified'],
+            version['sellers_modified'],
+            wishlist_marker(request),
+        )
+        cached = not_modified(request, etag)
+        if cached is not None:
+            return cached
+        return apply_validators(super().list(request, *args, **kwargs), etag, version['last_modified'])
+
+    def cached_list(self, request, *args, **kwargs):
+        # Anonymous pages are cached under the campus generation, which every
+        # listing write bumps, so the cache key is already a version: a
+        # revalidation is answered before the cache body or the database.
+        key = listing_cache.browse_cache_key(request)
+        etag = build_etag('listings', key)
+        cached = not_modified(request, etag)
+        if cached is not None:
+            return cached
+        data = listing_cache.get_cached_response_data(key)
+        if data is None:
+            data = super().list(request, *args, **kwargs).data
+            listing_cache.store_response_data(key, data)
+        return apply_validators(Response(data), etag)
+
     def get_serializer_context(self):
         return {'request': self.request}
 
@@ -88,8 +192,58 @@ class ListingListCreateView(generics.ListCreateAPIView):
         )
 
 
-class MyListingsView(generics.ListAPIView):
+# ── POST /api/listings/bulk/ ──────────────────────────────────────
+class BulkListingImportView(APIView):
+    """CSV or NDJSON, as the raw body or a multipart ``file``; see importing.py."""
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [CSVRowsParser, NDJSONRowsParser, MultiPartParser]
+
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if upload is not None:
+            fmt = detect_format(upload.name, upload.content_type or '')
+            source = upload
+        else:
+            fmt = detect_format(content_type=request.content_type or '')
+            source = request.data
+        if fmt is None:
+            return Response(
+                {'error': 'Send CSV or NDJSON rows, as the request body or a "file" upload.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        dry_run = request.query_params.get('dryRun') in {'1', 'true', 'True'}
+        result = import_listings(
+            read_rows(source, fmt),
+            request.user,
+            default_campus=request.headers.get('X-Campus', ''),
+            dry_run=dry_run,
+        )
+        if dry_run:
+            return Response(result)
+        if not result['created']:
+            return Response(result, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result, status=status.HTTP_201_CREATED)
+
+
+# ── GET /api/listings/facets/ ────────────────────────────────────
+class ListingFacetsView(ListingFilterMixin, APIView):
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        selected = {field: request.query_params.get(field) for field in FACET_FIELDS}
+        queryset = self.get_filtered_queryset(skip=FACET_FIELDS)
+        if request.query_params.get('includeInactive') in {'1', 'true', 'True'}:
+            # Admin-only variant; keep it out of the shared cache.
+            return Response(compute_facets(queryset, selected))
+        return Response(
+            listing_cache.get_or_compute(request, 'facets', lambda: compute_facets(queryset, selected))
+        )
+
+
+class MyListingsView(ListingFieldsetMixin, generics.ListAPIView):
     serializer_class = ListingSerializer
+    pagination_class = ListingCursorPagination
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
@@ -97,7 +251,7 @@ class MyListingsView(generics.ListAPIView):
         queryset = Listing.objects.filter(seller=self.request.user)
         if not include_inactive:
             queryset = queryset.filter(is_active=True)
-        return queryset.order_by('-created_at')
+        return self.with_relations(queryset).order_by('-created_at')
 
     def get_serializer_context(self):
         return {'request': self.request}
@@ -116,11 +270,28 @@ class ListingDetailView(generics.RetrieveUpdateDestroyAPIView):
         return {'request': self.request}
 
     def get_queryset(self):
-        base_queryset = Listing.objects.all()
+        base_queryset = with_listing_relations(Listing.objects.all(), self.request)
         if self.request.method in {'PATCH', 'PUT', 'DELETE'}:
             return base_queryset.filter(seller=self.request.user, is_active=True)
         return base_queryset.filter(is_active=True)
 
+    def retrieve(self, request, *args, **kwargs):
+        modified = (
+            Listing.objects.filter(pk=kwargs['pk'], is_active=True)
+            .values_list('updated_at', 'seller__profile__stats_updated_at')
+            .first()
+        )
+        if modified is None:
+            return super().retrieve(request, *args, **kwargs)
+
+        # The payload nests the seller's rating and sales, so their changes count too.
+        last_modified = latest(*modified)
+        etag = build_etag('listing', kwargs['pk'], *modified, wishlist_marker(request))
+        cached = not_modified(request, etag, last_modified)
+        if cached is not None:
+            return cached
+        return apply_validators(super().retrieve(request, *args, **kwargs), etag, last_modified)
+
     def get_object(self):
         instance = super().get_object()
         if self.request.method in {'PATCH', 'PUT', 'DELETE'} and instance.seller_id != self.request.user.id:
@@ -141,19 +312,22 @@ class ListingDetailView(generics.RetrieveUpdateDestroyAPIView):
                 next_quantity = current.quantity
 
         requested_status = self.request.data.get('status')
-        if next_quantity == 0:
-            next_status = 'SOLD'
-        elif requested_status == 'SOLD':
+        # Units out on hold are still stock: the sweeper may put them back.
+        held = held_units(current.pk)
+        if requested_status == 'SOLD':
             next_quantity = 0
             next_status = 'SOLD'
+            cancel_holds(current.pk)
+        elif next_quantity == 0:
+            next_status = 'RESERVED' if held else 'SOLD'
         elif requested_status == 'RESERVED':
-            if next_quantity != 1:
+            if next_quantity + held != 1:
                 raise ValidationError({'status': 'Reserved status is only allowed when quantity is exactly 1.'})
             next_status = 'RESERVED'
         elif requested_status == 'AVAILABLE':
             next_status = 'AVAILABLE'
         else:
-            next_status = 'RESERVED' if current.status == 'RESERVED' and next_quantity == 1 else 'AVAILABLE'
+            next_status = 'RESERVED' if current.status == 'RESERVED' and next_quantity + held == 1 else 'AVAILABLE'
 
         if campus is not None:
             serializer.save(campus=campus, quantity=next_quantity, status=next_status)
@@ -211,17 +385,49 @@ class ListingImageUploadView(APIView):
         return Response({'imageUrl': image_url}, status=status.HTTP_201_CREATED)
 
 
+# ── GET /api/listings/suggest/?q= ────────────────────────────────
+class SuggestListingsView(APIView):
+    permission_classes = [permissions.AllowAny]
+    default_limit = 8
+    max_limit = 20
+
+    def get(self, request):
+        try:
+            limit = int(request.query_params.get('limit', self.default_limit))
+        except (TypeError, ValueError):
+            limit = self.default_limit
+        limit = min(max(limit, 1), self.max_limit)
+
+        items = suggest_titles(
+            request.query_params.get('q', ''),
+            campus=request.headers.get('X-Campus'),
+            limit=limit,
+        )
+        return Response({'items': items})
+
+
 # ── GET /api/listings/:id/related/ ───────────────────────────────
 class RelatedListingsView(APIView):
     permission_classes = [permissions.AllowAny]
 
     def get(self, request, pk):
-        listing = get_object_or_404(Listing, pk=pk)
-        related = Listing.objects.filter(
-            category=listing.category,
-            is_active=True,
-            status='AVAILABLE'
-        ).exclude(pk=pk)[:3]
+        # Precomputed neighbours (build_related_listings) are one indexed join.
+        related = list(
+            with_listing_relations(
+                Listing.objects.filter(neighbor_of__listing_id=pk, is_active=True, status='AVAILABLE'),
+                request,
+            ).order_by('-neighbor_of__score')[:3]
+        )
+        if not related:
+            listing = get_object_or_404(Listing, pk=pk)
+            related = with_listing_relations(
+                Listing.objects.filter(
+                    category=listing.category,
+                    is_active=True,
+                    status='AVAILABLE'
+                ).exclude(pk=pk),
+                request,
+            ).order_by('-created_at')[:3]
         serializer = ListingSerializer(
             related, many=True, context={'request': request}
         )
@@ -257,6 +463,23 @@ class ReportListingView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+# ── GET /api/listings/:id/reviews/ ───────────────────────────────
+class ListingReviewsView(generics.ListAPIView):
+    serializer_class = ReviewSerializer
+    pagination_class = ReviewCursorPagination
+    permission_classes = [permissions.AllowAny]
+
+    def get_queryset(self):
+        self.listing = get_object_or_404(Listing, pk=self.kwargs['pk'], is_active=True)
+        return Review.objects.filter(listing=self.listing).select_related('reviewer__profile')
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        response.data['rating'] = round(self.listing.review_avg, 1)
+        response.data['reviewCount'] = self.listing.review_count
+        return response
+
+
 # ── POST /api/listings/:id/review/ ───────────────────────────────
 class SubmitReviewView(APIView):
     permission_classes = [permissions.IsAuthenticated]
@@ -274,41 +497,12 @@ class SubmitReviewView(APIView):
 class CreateOrderView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
+    @method_decorator(idempotent)
     def post(self, request, pk):
-        with transaction.atomic():
-            listing = get_object_or_404(Listing.objects.select_for_update(), pk=pk, is_active=True)
-            if listing.seller_id == request.user.id:
-                return Response(
-                    {'error': 'You cannot place an order on your own listing.'},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-            if listing.status != 'AVAILABLE':
-                return Response(
-                    {'error': 'This listing is not available for ordering.'},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-            if listing.quantity <= 0:
-                listing.status = 'SOLD'
-                listing.save(update_fields=['status'])
-                return Response(
-                    {'error': 'This item is out of stock.'},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            order = Order.objects.create(
-                listing=listing,
-                buyer=request.user,
-                seller=listing.seller,
-                amount=listing.price,
-            )
-            listing.quantity = max(0, listing.quantity - 1)
-            listing.status = 'SOLD' if listing.quantity == 0 else 'AVAILABLE'
-            listing.save(update_fields=['quantity', 'status'])
-            Notification.objects.create(
-                recipient=listing.seller,
-                title='New order placed',
-                body=f'{request.user.profile.full_name or request.user.email} placed an order for "{listing.title}".',
-            )
+        try:
+            order, listing = place_order(request.user, pk)
+        except OrderError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
         return Response({
             'success':  True,
             'message':  'Order request placed',
@@ -318,10 +512,56 @@ class CreateOrderView(APIView):
         })
 
 
+# ── POST /api/orders/checkout/ ───────────────────────────────────
+class CheckoutView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    @method_decorator(idempotent)
+    def post(self, request):
+        try:
+            cart = parse_cart(request.data)
+        except CartError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        results = checkout(request.user, cart)
+        ordered = any(result['success'] for result in results)
+        return Response(
+            {'success': ordered, 'items': results},
+            status=status.HTTP_200_OK if ordered else status.HTTP_400_BAD_REQUEST,
+        )
+
+
+# ── POST/DELETE /api/listings/:id/reserve/ ──────────────────────
+class ReserveListingView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    @method_decorator(idempotent)
+    def post(self, request, pk):
+        try:
+            quantity = int(request.data.get('quantity', 1))
+        except (TypeError, ValueError):
+            return Response({'error': 'quantity must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            hold = create_hold(request.user, pk, quantity)
+        except ReservationError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'id':        hold.id,
+            'listingId': hold.listing_id,
+            'quantity':  hold.quantity,
+            'status':    hold.status,
+            'expiresAt': hold.expires_at,
+        }, status=status.HTTP_201_CREATED)
+
+    def delete(self, request, pk):
+        return Response({'success': True, 'released': release_holds(request.user, pk)})
+
+
 # ── POST /api/listings/:id/offer/ ────────────────────────────────
 class SubmitOfferView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
+    @method_decorator(idempotent)
     def post(self, request, pk):
         listing    = get_object_or_404(Listing, pk=pk)
         serializer = OfferSerializer(data=request.data)
@@ -356,7 +596,7 @@ class UpdateListingStatusView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        if new_status == 'RESERVED' and listing.quantity != 1:
+        if new_status == 'RESERVED' and listing.quantity + held_units(listing.pk) != 1:
             return Response(
                 {'error': 'Reserved status is only allowed when quantity is exactly 1.'},
                 status=status.HTTP_400_BAD_REQUEST,
@@ -364,8 +604,9 @@ class UpdateListingStatusView(APIView):
 
         listing.status = new_status
         if new_status == 'SOLD':
+            cancel_holds(listing.pk)
             listing.quantity = 0
-            listing.save(update_fields=['status', 'quantity'])
+            listing.save(update_fields=['status', 'quantity', 'updated_at'])
         else:
-            listing.save(update_fields=['status'])
+            listing.save(update_fields=['status', 'updated_at'])
         return Response({'success': True, 'status': listing.status, 'quantity': listing.quantity})